@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# benchmarks/bench_normalizacao.py
+#
+# Compara a normalização de texto anterior (NFD + unicodedata.category por
+# caractere, via .apply) com normalizacao.normalizar / normalizar_serie,
+# conferindo que o resultado é idêntico.
+#
+# Uso:
+#   python benchmarks/bench_normalizacao.py
+#   python benchmarks/bench_normalizacao.py --linhas 50000 --distintos 400
+
+import os
+import sys
+import random
+import argparse
+import unicodedata
+from time import perf_counter
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from normalizacao import normalizar, normalizar_serie, _normalizar
+
+def normalize_text_legado(text) -> str:
+    """
+    Implementação anterior de utils.normalize_text, só como referência.
+    """
+    s = str(text).upper()
+    s = unicodedata.normalize('NFD', s)
+    s = ''.join(ch for ch in s if unicodedata.category(ch) != 'Mn')
+    return ' '.join(s.split())
+
+ESPECIES = ["Bovinos", "Bovino", "Bubalinos"]
+SEXOS    = ["Fêmea", "Macho", "Fêmeas", "Machos"]
+FAIXAS   = ["0 a 12 meses", "13 a 24 meses", "25 a 36 meses", "Acima de 36 meses", "+ de 36 meses"]
+CLASSES  = ["Comum", "Nelore PO", "Genética Superior", "Reprodução", "Angus/Cruzado"]
+
+def descricoes(rng: random.Random, distintos: int) -> list[str]:
+    base = set()
+    while len(base) < distintos:
+        base.add(f"{rng.choice(ESPECIES)} {rng.choice(SEXOS)}  {rng.choice(FAIXAS)} "
+                 f"- {rng.choice(CLASSES)} {rng.randint(1, 999)}")
+    return sorted(base)
+
+def cronometrar(func, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = perf_counter()
+        func()
+        melhor = min(melhor, perf_counter() - t0)
+    return melhor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=20000, help="linhas da coluna (como a pauta)")
+    parser.add_argument("--distintos", type=int, default=300, help="valores distintos na coluna")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semente)
+    unicos = descricoes(rng, args.distintos)
+    serie = pd.Series([rng.choice(unicos) for _ in range(args.linhas)])
+
+    esperado = serie.apply(normalize_text_legado)
+    assert normalizar_serie(serie).tolist() == esperado.tolist(), "saída diferente da implementação anterior"
+    assert [normalizar(s) for s in unicos] == [normalize_text_legado(s) for s in unicos]
+
+    def escalar_frio():
+        _normalizar.cache_clear()
+        for s in unicos:
+            normalizar(s)
+
+    medidas = [
+        ("escalar legado (distintos)",   lambda: [normalize_text_legado(s) for s in unicos]),
+        ("escalar novo, cache frio",      escalar_frio),
+        ("escalar novo, cache quente",    lambda: [normalizar(s) for s in unicos]),
+        ("série legado (.apply)",         lambda: serie.apply(normalize_text_legado)),
+        ("série nova (normalizar_serie)", lambda: normalizar_serie(serie)),
+    ]
+    print(f"{args.linhas} linhas, {args.distintos} distintos, melhor de {args.repeticoes}\n")
+    tempos = {}
+    for nome, func in medidas:
+        tempos[nome] = cronometrar(func, args.repeticoes)
+        print(f"{nome:32s} {tempos[nome] * 1e3:9.2f} ms")
+
+    print()
+    print(f"escalar (cache frio):  {tempos['escalar legado (distintos)'] / tempos['escalar novo, cache frio']:.1f}x")
+    print(f"série:                 {tempos['série legado (.apply)'] / tempos['série nova (normalizar_serie)']:.1f}x")
+
+if __name__ == "__main__":
+    main()
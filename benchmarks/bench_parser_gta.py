@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# benchmarks/bench_parser_gta.py
+#
+# Compara o parser de GTA atual (uma passada, padrões pré-compilados) com o
+# parser anterior (uma busca por campo), conferindo que a saída é idêntica.
+#
+# Uso:
+#   python benchmarks/bench_parser_gta.py "GTAs/*.pdf"
+#   python benchmarks/bench_parser_gta.py --sintetico 500
+#
+# Os PDFs são lidos uma vez antes da medição: o tempo é só o da interpretação.
+
+import os
+import re
+import sys
+import glob
+import random
+import argparse
+import statistics
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pegar_dados_GTA import interpretar_texto_gta, ler_pdf
+from corpus import texto_sintetico
+
+def interpretar_texto_legado(texto: str) -> dict:
+    """
+    Parser anterior (várias passadas pelo texto), mantido só como referência
+    de saída e de tempo.
+    """
+    linhas = texto.splitlines()
+    dados = {}
+
+    # Número da GTA
+    m_num = re.search(r'\bNumero\b.*?(\d{5,})', texto, re.IGNORECASE | re.DOTALL)
+    dados["numero_gta"] = m_num.group(1).strip() if m_num else None
+
+    # UF
+    dados["uf"] = None
+    for i, ln in enumerate(linhas):
+        if ln.strip().upper() == "UF":
+            for nx in linhas[i+1:i+6]:
+                v = nx.strip()
+                if re.fullmatch(r'[A-Z]{2}', v):
+                    dados["uf"] = v
+                    break
+            break
+
+    # Série
+    dados["serie"] = None
+    for i, ln in enumerate(linhas):
+        if ln.strip().upper() in ("SÉRIE", "SERIE"):
+            for nx in linhas[i+1:i+6]:
+                v = nx.strip()
+                if len(v)==1 and v.isalnum():
+                    dados["serie"] = v
+                    break
+            break
+
+    # Validade
+    m_val = re.search(r'Validade\s*[:\-]\s*(\d{2}/\d{2}/\d{4})', texto)
+    dados["validade"] = m_val.group(1) if m_val else None
+
+    # CPF/CNPJ
+    cpfs = re.findall(r'CPF/CNPJ[:]\s*(\d+)', texto)
+    dados["cpf_procedencia"] = cpfs[0] if len(cpfs)>0 else None
+    dados["cpf_destino"]     = cpfs[1] if len(cpfs)>1 else None
+
+    # Nomes
+    nomes = re.findall(r'Nome[:]\s*(.+)', texto)
+    dados["nome_procedencia"] = nomes[0].strip() if len(nomes)>0 else None
+    dados["nome_destino"]     = nomes[1].strip() if len(nomes)>1 else None
+
+    # Estabelecimentos
+    ests = re.findall(r'Estabelecimento[:]\s*(.+)', texto)
+    dados["estabelecimento_procedencia"] = ests[0].strip() if len(ests)>0 else None
+    dados["estabelecimento_destino"]     = ests[1].strip() if len(ests)>1 else None
+
+    # Municípios
+    muns = re.findall(r'Município - UF[:]\s*(.+)', texto)
+    dados["municipio_procedencia"] = muns[0].strip() if len(muns)>0 else None
+    dados["municipio_destino"]     = muns[1].strip() if len(muns)>1 else None
+
+    # Finalidade
+    m_fin = re.search(r'Finalidade[:]\s*(.+?)\s+Meio de Transporte', texto, re.DOTALL)
+    dados["finalidade"] = m_fin.group(1).strip() if m_fin else None
+
+    # Extrai categorias: layout vertical
+    categorias = []
+    # localiza índice do header "Grupo"
+    for idx, ln in enumerate(linhas):
+        if ln.strip().upper() == "GRUPO":
+            # data começa 6 linhas adiante
+            start = idx + 6
+            # enquanto houver blocos completos
+            while start + 5 < len(linhas):
+                grp = linhas[start].strip()
+                esp = linhas[start+1].strip()    # ESPÉCIE correta
+                cat = linhas[start+2].strip() if linhas[start+2].strip()!='-' else None
+                fx  = linhas[start+3].strip()
+                sx  = linhas[start+4].strip()
+                qt  = re.sub(r'\D+', '', linhas[start+5].strip())
+                if not grp or not esp or not fx or not qt:
+                    break
+                try:
+                    qtd = int(qt)
+                except:
+                    break
+                categorias.append({
+                    "grupo": grp,
+                    "especie": esp,
+                    "categoria": cat,
+                    "faixa": fx,
+                    "sexo": sx,
+                    "quantidade": qtd
+                })
+                start += 6
+            break
+
+    # opções horizontais (fallback)
+    padrao_h = re.findall(
+        r'(Bovideos|Bovídeos)\s+(Bovinos)\s+\-\s+(.+?)\s+(Macho|Fêmea|Femea)\s+(\d+)',
+        texto, re.IGNORECASE
+    )
+    for grp, esp, fx, sx, qt in padrao_h:
+        categorias.append({
+            "grupo": grp,
+            "especie": esp,
+            "categoria": None,
+            "faixa": fx,
+            "sexo": sx,
+            "quantidade": int(qt)
+        })
+
+    # remove duplicados
+    unicos = []
+    seen = set()
+    for c in categorias:
+        key = (c['especie'], c.get('categoria') or '', c['faixa'], c['sexo'], c['quantidade'])
+        if key not in seen:
+            seen.add(key)
+            unicos.append(c)
+    dados["categorias"] = unicos
+    return dados
+
+
+def carregar_corpus(args) -> list[str]:
+    if args.pdfs:
+        caminhos = []
+        for p in args.pdfs:
+            caminhos += glob.glob(os.path.join(p, "*.pdf")) if os.path.isdir(p) else glob.glob(p)
+        return [ler_pdf(c) for c in sorted(caminhos)]
+    rng = random.Random(args.semente)
+    return [texto_sintetico(rng, rng.randint(1, 8), rng.random() < 0.7)
+            for _ in range(args.sintetico)]
+
+def medir(funcs, textos: list[str], repeticoes: int) -> list[list[float]]:
+    """
+    Tempo por documento (µs) de cada função, melhor de `repeticoes` rodadas.
+    As funções são alternadas documento a documento para que variações da
+    máquina afetem as duas medições igualmente.
+    """
+    melhores = [[float("inf")] * len(textos) for _ in funcs]
+    for _ in range(repeticoes):
+        for i, t in enumerate(textos):
+            for k, func in enumerate(funcs):
+                ini = perf_counter()
+                func(t)
+                melhores[k][i] = min(melhores[k][i], (perf_counter() - ini) * 1e6)
+    return melhores
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdfs", nargs="*", help="PDFs, pastas ou globs de GTAs reais")
+    parser.add_argument("--sintetico", type=int, default=300, help="nº de textos sintéticos (sem PDFs)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    textos = carregar_corpus(args)
+    if not textos:
+        print("❌ Corpus vazio.")
+        return 1
+
+    divergentes = [i for i, t in enumerate(textos)
+                   if interpretar_texto_legado(t) != interpretar_texto_gta(t)]
+    if divergentes:
+        print(f"❌ Saída diferente do parser anterior em {len(divergentes)} documento(s): {divergentes[:10]}")
+        return 1
+
+    antes, depois = medir((interpretar_texto_legado, interpretar_texto_gta), textos, args.repeticoes)
+    print(f"📄 {len(textos)} documento(s), saída idêntica ao parser anterior")
+    print(f"{'':10}{'p50 (µs)':>12}{'p95 (µs)':>12}{'média (µs)':>12}")
+    for nome, tempos in (("antes", antes), ("depois", depois)):
+        q = statistics.quantiles(tempos, n=20) if len(tempos) > 1 else tempos * 19
+        print(f"{nome:10}{statistics.median(tempos):12.1f}{q[18]:12.1f}{statistics.fmean(tempos):12.1f}")
+    print(f"⚡ ganho (mediana): {statistics.median(antes) / statistics.median(depois):.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
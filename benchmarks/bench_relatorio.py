@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# benchmarks/bench_relatorio.py
+#
+# Mede linhas/s na gravação da aba "Dados GTA" com tabelas grandes de
+# produtos: escrita anterior (openpyxl célula a célula) x escritores em
+# streaming de relatorio_xlsx (openpyxl write-only e xlsxwriter).
+# Antes de medir, confere que todos geram o mesmo layout (valores e negrito).
+#
+# Uso:
+#   python benchmarks/bench_relatorio.py
+#   python benchmarks/bench_relatorio.py --linhas 10000 100000
+
+import os
+import sys
+import random
+import argparse
+import tempfile
+from time import perf_counter
+from decimal import Decimal
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from relatorio_xlsx import abrir_escritor, linhas_relatorio, CABECALHO_PRODUTOS
+
+DADOS = {
+    "numero_gta": "414733", "uf": "TO", "serie": "I",
+    "cpf_procedencia": "123.456.789-00", "nome_procedencia": "JOSE DA SILVA",
+    "estabelecimento_procedencia": "FAZENDA VERONICA", "municipio_procedencia": "ARAGUAINA",
+    "cpf_destino": "987.654.321-00", "nome_destino": "MARIA SOUZA",
+    "estabelecimento_destino": "FAZENDA BOA VISTA", "municipio_destino": "GURUPI",
+    "finalidade": "ENGORDA", "validade": "20/10/2026",
+}
+
+def produtos_sinteticos(n: int, semente: int = 42) -> list[tuple]:
+    rng = random.Random(semente)
+    return [
+        ("Bovinos", rng.choice(["Femea", "Macho"]), rng.choice(["0 a 12 Meses", "13 a 24 Meses"]),
+         rng.randint(1, 80), "Comum", Decimal(rng.choice(["1200.00", "1800.00", "2000.00"])),
+         "18/10/2026")
+        for _ in range(n)
+    ]
+
+def escrever_legado(caminho: str, dados: dict, produtos: list[tuple]):
+    """
+    Escrita anterior de report.generate_report (célula a célula), só como referência.
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Dados GTA"
+    bold = Font(bold=True)
+    ws['A1'] = "GTA";       ws['A1'].font = bold
+    ws['A2'] = "Número";    ws['B2'] = dados.get('numero_gta', '')
+    ws['A3'] = "UF";        ws['B3'] = dados.get('uf', '')
+    ws['A4'] = "Série";     ws['B4'] = dados.get('serie', '')
+    ws['A6'] = "PROCEDÊNCIA"; ws['A6'].font = bold
+    ws['D6'] = "DESTINO";     ws['D6'].font = bold
+    ws['A7'] = "CPF / CNPJ Procedencia";       ws['A7'].font = bold
+    ws['A8'] = "Nome Procedencia";             ws['A8'].font = bold
+    ws['A9'] = "Estabelecimento Procedencia";  ws['A9'].font = bold
+    ws['A10']= "Municipio Procedencia";        ws['A10'].font = bold
+    ws['B7'] = dados.get('cpf_procedencia','')
+    ws['B8'] = dados.get('nome_procedencia','')
+    ws['B9'] = dados.get('estabelecimento_procedencia','')
+    ws['B10']= dados.get('municipio_procedencia','')
+    ws['D7'] = "CPF / CNPJ Destino";           ws['D7'].font = bold
+    ws['D8'] = "Nome Destino";                 ws['D8'].font = bold
+    ws['D9'] = "Estabelecimento Destino";      ws['D9'].font = bold
+    ws['D10']= "Municipio Destino";            ws['D10'].font = bold
+    ws['E7'] = dados.get('cpf_destino','')
+    ws['E8'] = dados.get('nome_destino','')
+    ws['E9'] = dados.get('estabelecimento_destino','')
+    ws['E10']= dados.get('municipio_destino','')
+    header_row = 12
+    for col_idx, header in enumerate(CABECALHO_PRODUTOS, start=1):
+        cell = ws.cell(row=header_row, column=col_idx, value=header)
+        cell.font = bold
+    for row_idx, row in enumerate(produtos, start=header_row+1):
+        for col_idx, value in enumerate(row, start=1):
+            ws.cell(row=row_idx, column=col_idx, value=value)
+    footer = header_row + 1 + len(produtos) + 1
+    ws[f"A{footer}"]   = "DADOS ADICIONAIS";    ws[f"A{footer}"].font = bold
+    ws[f"A{footer+1}"] = "Finalidade";           ws[f"B{footer+1}"] = dados.get('finalidade', '')
+    ws[f"A{footer+2}"] = "Validade";             ws[f"B{footer+2}"] = dados.get('validade', '')
+    wb.save(caminho)
+
+def escrever_streaming(engine: str):
+    def escrever(caminho: str, dados: dict, produtos: list[tuple]):
+        with abrir_escritor(caminho, engine) as esc:
+            esc.aba("Dados GTA", linhas_relatorio(dados, produtos))
+    return escrever
+
+def layout(caminho: str) -> list:
+    ws = load_workbook(caminho)["Dados GTA"]
+    return [
+        (c.coordinate, float(c.value) if isinstance(c.value, (int, float, Decimal)) else c.value,
+         bool(c.font and c.font.b))
+        for linha in ws.iter_rows() for c in linha if c.value is not None
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1000, 20000, 100000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    escritores = {"legado (célula a célula)": escrever_legado,
+                  "openpyxl write-only": escrever_streaming("openpyxl")}
+    try:
+        import xlsxwriter  # noqa: F401
+        escritores["xlsxwriter"] = escrever_streaming("xlsxwriter")
+    except ImportError:
+        print("(xlsxwriter não instalado: medindo só openpyxl)\n")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        amostra = produtos_sinteticos(50)
+        referencia = None
+        for nome, escrever in escritores.items():
+            caminho = os.path.join(pasta, "layout.xlsx")
+            escrever(caminho, DADOS, amostra)
+            atual = layout(caminho)
+            referencia = referencia or atual
+            assert atual == referencia, f"layout diferente em {nome}"
+        print(f"layout idêntico nos {len(escritores)} escritores\n")
+
+        for n in args.linhas:
+            produtos = produtos_sinteticos(n)
+            print(f"{n} linhas de produto (melhor de {args.repeticoes}):")
+            for nome, escrever in escritores.items():
+                melhor = float("inf")
+                for _ in range(args.repeticoes):
+                    caminho = os.path.join(pasta, "bench.xlsx")
+                    t0 = perf_counter()
+                    escrever(caminho, DADOS, produtos)
+                    melhor = min(melhor, perf_counter() - t0)
+                print(f"  {nome:26s} {melhor * 1e3:9.1f} ms  {n / melhor:12,.0f} linhas/s")
+            print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# benchmarks/bench_suite.py
+#
+# Suíte reproduzível das etapas do fluxo, com dados sintéticos (corpus.py)
+# em várias escalas:
+#   extracao     – N PDFs de GTA (layouts vertical e horizontal): leitura
+#                  sequencial e extrair_em_paralelo (sem cache);
+#   precificacao – PautaIndex de uma pauta com N linhas + N consultas;
+#   relatorio    – generate_report de uma GTA com N categorias;
+#   credenciais  – índice de uma planilha com N fazendas + consultas
+#                  (nome exato, variações e erros de digitação);
+#   selenium     – login no portal (páginas locais de sefaz_local/) até a
+#                  emissão de NF-e Avulsa e preenchimento da nota
+#                  (formulario_nfe x send_keys campo a campo) e a volta à
+#                  emissão com a sessão reaproveitada (sessoes_sefaz);
+#                  precisa do Chrome, só com --selenium.
+#
+# Uso:
+#   python benchmarks/bench_suite.py
+#   python benchmarks/bench_suite.py --escalas 1 100 --etapas extracao relatorio
+#   python benchmarks/bench_suite.py --selenium --logins 10 --atraso 150
+#   python benchmarks/bench_suite.py --pasta /tmp/corpus --saida resultados.json
+#
+# Os arquivos sintéticos são gerados antes da medição (o tempo de geração
+# não entra) e, com --pasta, reaproveitados entre execuções.
+
+import io
+import os
+import sys
+import json
+import random
+import logging
+import argparse
+import tempfile
+import contextlib
+import unicodedata
+from time import perf_counter
+from pathlib import Path
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(AQUI))
+
+import corpus
+from pegar_dados_GTA import extrair_dados_gta, extrair_em_paralelo
+from pauta_index import PautaIndex
+from report import generate_report, produtos_relatorio
+from esperas import esperar
+from credenciais import IndiceCredenciais
+
+ETAPAS = ("extracao", "precificacao", "relatorio", "credenciais", "selenium")
+PAGINAS_SEFAZ = os.path.join(AQUI, "sefaz_local")
+MAX_CONSULTAS = 1000
+# uma etapa que já levou isto não é repetida para pegar o melhor tempo
+ORCAMENTO_S = 10.0
+
+def medir(funcao, repeticoes: int) -> float:
+    """
+    Melhor tempo (s) de `funcao()` em até `repeticoes` rodadas.
+    """
+    melhor, gasto = float("inf"), 0.0
+    for _ in range(repeticoes):
+        t0 = perf_counter()
+        funcao()
+        dt = perf_counter() - t0
+        melhor, gasto = min(melhor, dt), gasto + dt
+        if gasto > ORCAMENTO_S:
+            break
+    return melhor
+
+def _sem_acento(s: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+
+def variacoes(nomes: list[str], n: int, semente: int = 42) -> list[str]:
+    """
+    Consultas como chegam das GTAs: nome exato, sem "Fazenda", sem acento,
+    em maiúsculas ou com uma letra a menos.
+    """
+    rng = random.Random(semente)
+    saida = []
+    for _ in range(n):
+        nome = rng.choice(nomes)
+        tipo = rng.randrange(5)
+        if tipo == 1:
+            nome = nome.replace("Fazenda ", "")
+        elif tipo == 2:
+            nome = _sem_acento(nome)
+        elif tipo == 3:
+            nome = nome.upper()
+        elif tipo == 4 and len(nome) > 12:
+            i = rng.randrange(9, len(nome))
+            nome = nome[:i] + nome[i + 1:]
+        saida.append(nome)
+    return saida
+
+# --- etapas ----------------------------------------------------------------
+# cada uma prepara seus arquivos e devolve [(rótulo, itens, segundos)]
+
+def etapa_extracao(pasta: str, n: int, args) -> list:
+    caminhos = sorted(str(p) for p in Path(pasta, f"gtas_{n}").glob("*.pdf"))
+    if len(caminhos) != n:
+        caminhos = corpus.gerar_corpus_pdf(os.path.join(pasta, f"gtas_{n}"), n, args.semente)
+    sequencial = medir(lambda: [extrair_dados_gta(c) for c in caminhos], args.repeticoes)
+    resultados = [("sequencial", n, sequencial)]
+    if n > 1:
+        paralelo = medir(lambda: list(extrair_em_paralelo(caminhos, workers=args.workers)),
+                         args.repeticoes)
+        resultados.append(("paralelo", n, paralelo))
+    return resultados
+
+def etapa_precificacao(pasta: str, n: int, args) -> list:
+    df = corpus.dataframe_pauta(max(n, 8), args.semente)
+    categorias = corpus.categorias_sinteticas(n, args.semente)
+    consultas = [("Comum", f"{c['especie']} {c['sexo']} {c['faixa']}") for c in categorias]
+    indice = PautaIndex(df)
+    assert None not in indice.price(consultas), "consulta sem preço na pauta sintética"
+    return [
+        ("índice", len(df), medir(lambda: PautaIndex(df), args.repeticoes)),
+        ("consultas", n, medir(lambda: indice.price(consultas), args.repeticoes)),
+    ]
+
+def etapa_relatorio(pasta: str, n: int, args) -> list:
+    df = corpus.dataframe_pauta(64, args.semente)
+    dados = {"numero_gta": f"{n:06d}", "uf": "TO", "serie": "A",
+             "estabelecimento_procedencia": "FAZENDA ORIGEM", "nome_procedencia": "PRODUTOR",
+             "finalidade": "Engorda", "validade": "18/10/2026",
+             "categorias": corpus.categorias_sinteticas(n, args.semente)}
+    indice = PautaIndex(df)
+    # generate_report grava em Relatórios/ e JSON/ do diretório atual
+    atual = os.getcwd()
+    os.chdir(pasta)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            segundos = medir(lambda: generate_report(dados, "Comum", indice), args.repeticoes)
+        return [("generate_report", n, segundos)]
+    finally:
+        os.chdir(atual)
+
+def etapa_credenciais(pasta: str, n: int, args) -> list:
+    caminho = os.path.join(pasta, f"credenciais_{n}.xlsx")
+    nomes = corpus.gerar_credenciais(caminho, n, args.semente) if not os.path.exists(caminho) \
+        else corpus.nomes_fazendas(n, args.semente)
+    consultas = variacoes(nomes, min(n * 2, MAX_CONSULTAS), args.semente)
+    indice = IndiceCredenciais(caminho)
+
+    def buscar_todas():
+        for nome in consultas:
+            try:
+                indice.buscar(nome)
+            except ValueError:
+                pass  # nome ambíguo ou sem par: também conta o tempo da busca
+
+    nivel = logging.getLogger().level
+    logging.getLogger().setLevel(logging.ERROR)  # sem um aviso por casamento aproximado
+    try:
+        return [
+            ("índice", n, medir(lambda: IndiceCredenciais(caminho), args.repeticoes)),
+            ("consultas", len(consultas), medir(buscar_todas, args.repeticoes)),
+        ]
+    finally:
+        logging.getLogger().setLevel(nivel)
+
+def preencher_send_keys(driver, itens: list[dict], seletores: dict):
+    """
+    Preenchimento campo a campo com send_keys (como um operador faria), só
+    como referência para formulario_nfe.preencher_nfe.
+    """
+    from selenium.webdriver.common.by import By
+    for i, item in enumerate(itens):
+        driver.find_element(By.CSS_SELECTOR, seletores["adicionar_item"]).click()
+        esperar(driver, lambda d: len(d.find_elements(By.CSS_SELECTOR, seletores["linhas"])) > i, 10)
+        linha = driver.find_elements(By.CSS_SELECTOR, seletores["linhas"])[i]
+        for campo, valor in item["campos"].items():
+            el = linha.find_element(By.CSS_SELECTOR, seletores["item"][campo])
+            el.clear()
+            el.send_keys(valor)
+
+def etapa_selenium(pasta: str, n: int, args) -> list:
+    from driver_pool import PoolDrivers
+    from login import perform_login_with_selenium, OPERACOES
+    from formulario_nfe import preencher_nfe, itens_nfe, conferir_totais, carregar_seletores
+    from sessoes_sefaz import SessoesSefaz
+
+    caminho = os.path.join(pasta, "credenciais_selenium.xlsx")
+    nome = corpus.gerar_credenciais(caminho, 1, args.semente)[0]
+    sufixo = f"?atraso={args.atraso}" if args.atraso else ""
+    url = Path(PAGINAS_SEFAZ, "login.html").as_uri() + sufixo
+    url_nfe = Path(PAGINAS_SEFAZ, "nfe_avulsa.html").as_uri() + sufixo
+    dados = {"numero_gta": "000001", "categorias": corpus.categorias_sinteticas(args.itens, args.semente),
+             "cpf_destino": "12345678900", "nome_destino": "PRODUTOR DE DESTINO",
+             "estabelecimento_destino": "FAZENDA DESTINO", "municipio_destino": "GURUPI - TO"}
+    df_prod = produtos_relatorio(dados, "Comum", PautaIndex(corpus.dataframe_pauta(64, args.semente)))
+    seletores = carregar_seletores()
+    itens = itens_nfe(df_prod)
+
+    with PoolDrivers(tamanho=1, headless=not args.visivel) as pool:
+        t0 = perf_counter()
+        pool.aquecer()
+        resultados = [("abrir navegador", 1, perf_counter() - t0)]
+        logins, formularios, legado = [], [], []
+        for _ in range(args.logins):
+            with pool.sessao() as driver:
+                t0 = perf_counter()
+                _, ok = perform_login_with_selenium(caminho, nome, OPERACOES[0], driver=driver, url=url)
+                logins.append(perf_counter() - t0)
+                if not ok:
+                    raise RuntimeError("login nas páginas locais falhou")
+                t0 = perf_counter()
+                preencher_nfe(driver, dados, df_prod, OPERACOES[0], seletores=seletores)
+                formularios.append(perf_counter() - t0)
+
+                driver.get(url_nfe)
+                t0 = perf_counter()
+                preencher_send_keys(driver, itens, seletores)
+                conferir_totais(driver, seletores, itens)
+                legado.append(perf_counter() - t0)
+
+        sessoes, retomadas = SessoesSefaz(caminho, url), []
+        with pool.sessao() as driver:
+            for _ in range(args.logins + 1):
+                t0 = perf_counter()
+                if not sessoes.abrir(driver, nome)[1]:
+                    raise RuntimeError("sessão nas páginas locais falhou")
+                retomadas.append(perf_counter() - t0)
+        resultados += [
+            ("sessao reaproveitada", len(retomadas) - 1, min(retomadas[1:] or retomadas)),
+            ("login (melhor)", 1, min(logins)),
+            ("login (todos)", len(logins), sum(logins)),
+            ("nfe execute_script", len(itens), min(formularios)),
+            ("nfe send_keys", len(itens), min(legado)),
+        ]
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks das etapas com dados sintéticos.")
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--etapas", nargs="+", choices=ETAPAS, default=list(ETAPAS[:-1]))
+    parser.add_argument("--selenium", action="store_true",
+                        help="inclui o login nas páginas locais (precisa do Chrome)")
+    parser.add_argument("--logins", type=int, default=5, help="logins medidos com --selenium")
+    parser.add_argument("--itens", type=int, default=8,
+                        help="linhas de produto na NF-e medida com --selenium")
+    parser.add_argument("--atraso", type=int, default=0,
+                        help="atraso simulado (ms) das páginas locais da SEFAZ")
+    parser.add_argument("--visivel", action="store_true", help="Chrome com janela")
+    parser.add_argument("--workers", type=int, help="processos de extrair_em_paralelo")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--pasta", help="onde gerar (e reaproveitar) o corpus; padrão: temporária")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    args = parser.parse_args()
+
+    etapas = list(args.etapas)
+    if args.selenium and "selenium" not in etapas:
+        etapas.append("selenium")
+
+    temporaria = None
+    if args.pasta:
+        pasta = os.path.abspath(args.pasta)
+        os.makedirs(pasta, exist_ok=True)
+    else:
+        temporaria = tempfile.TemporaryDirectory(prefix="bench_gta_")
+        pasta = temporaria.name
+
+    funcoes = {nome: globals()[f"etapa_{nome}"] for nome in ETAPAS}
+    resultados = []
+    print(f"{'etapa':13s} {'escala':>7s} {'medição':19s} {'itens':>7s} {'tempo (ms)':>11s} "
+          f"{'por item (µs)':>14s} {'itens/s':>11s}")
+    try:
+        for etapa in etapas:
+            # o fluxo do Selenium não depende da escala: roda uma vez só
+            for n in ([1] if etapa == "selenium" else args.escalas):
+                try:
+                    medidas = funcoes[etapa](pasta, n, args)
+                except Exception as e:
+                    if etapa != "selenium":
+                        raise
+                    print(f"⚠️ selenium: {type(e).__name__}: {e}".splitlines()[0])
+                    continue
+                for rotulo, itens, seg in medidas:
+                    resultados.append({"etapa": etapa, "escala": n, "medicao": rotulo,
+                                       "itens": itens, "segundos": seg})
+                    print(f"{etapa:13s} {n:7d} {rotulo:19s} {itens:7d} {seg * 1e3:11.1f} "
+                          f"{seg / itens * 1e6:14.1f} {itens / seg:11,.0f}", flush=True)
+    finally:
+        if temporaria is not None:
+            temporaria.cleanup()
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultados em {args.saida}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
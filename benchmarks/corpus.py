@@ -0,0 +1,165 @@
+# benchmarks/corpus.py
+#
+# Dados sintéticos para os benchmarks, reproduzíveis pela semente:
+#   - texto e PDFs de GTA (PyMuPDF) no layout vertical ("Grupo", uma célula
+#     por linha) e no horizontal (uma categoria por linha);
+#   - planilha da pauta fiscal (aba "Dados", como a exportada pelo site);
+#   - planilha de credenciais (aba "Planilha1": FAZENDA, INSCRICAO ESTADUAL,
+#     SENHA SEFAZ).
+
+import os
+import random
+
+import fitz  # PyMuPDF
+import pandas as pd
+
+FAIXAS = ["0 a 12 Meses", "13 a 24 Meses", "25 a 36 Meses", "Acima de 36 Meses"]
+SEXOS  = ["Macho", "Femea"]
+# blocos de texto fixo de uma GTA real (transporte, sanidade, emissão)
+RODAPE = [
+    "Meio de Transporte", "Rodoviário", "Placa do Veículo", "ABC-1234",
+    "Motorista", "FULANO DE TAL", "Vacinação", "Febre Aftosa", "Brucelose",
+    "Exames", "Não se aplica", "Observações",
+    "ESTE DOCUMENTO NÃO TEM VALOR FISCAL E DEVE ACOMPANHAR OS ANIMAIS",
+    "Emitido por ADAPEC - Agência de Defesa Agropecuária do Estado do Tocantins",
+    "Assinatura do emitente", "Local e data de emissão",
+]
+
+def texto_sintetico(rng: random.Random, n_cat: int, vertical: bool,
+                    fazenda: str = "FAZENDA ORIGEM") -> str:
+    """
+    Texto no formato que o PyMuPDF devolve para uma GTA (uma célula por linha).
+    """
+    linhas = [
+        "GUIA DE TRÂNSITO ANIMAL", "Numero", str(rng.randint(100000, 999999)),
+        "UF", "TO", "Série", rng.choice("ABCF"),
+        f"Validade: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025",
+        "PROCEDÊNCIA",
+        f"CPF/CNPJ: {rng.randint(10**10, 10**11 - 1)}",
+        "Nome: PRODUTOR DE ORIGEM", f"Estabelecimento: {fazenda}",
+        "Município - UF: ARAPOEMA - TO",
+        "DESTINO",
+        f"CPF/CNPJ: {rng.randint(10**10, 10**11 - 1)}",
+        "Nome: PRODUTOR DE DESTINO", "Estabelecimento: FAZENDA DESTINO",
+        "Município - UF: WANDERLÂNDIA - TO",
+        "Finalidade: Engorda", "Meio de Transporte: Rodoviário",
+    ]
+    if vertical:
+        linhas += ["Grupo", "Espécie", "Categoria", "Faixa Etária", "Sexo", "Quantidade"]
+        for _ in range(n_cat):
+            linhas += ["Bovideos", "Bovinos", "-", rng.choice(FAIXAS),
+                       rng.choice(SEXOS), str(rng.randint(1, 200))]
+    else:
+        for _ in range(n_cat):
+            linhas.append(f"Bovídeos Bovinos - {rng.choice(FAIXAS)} "
+                          f"{rng.choice(SEXOS)} {rng.randint(1, 200)}")
+    linhas += RODAPE * rng.randint(1, 8)
+    return "\n".join(linhas) + "\n"
+
+LINHAS_POR_PAGINA = 64
+CLASSES = ["Comum", "Nelore PO", "Genética Superior", "Reprodução"]
+PALAVRAS = ["Santa", "Boa", "Vista", "São", "José", "Olho", "D'Água", "Veronica",
+            "Esperança", "Bela", "Rio", "Verde", "Serra", "Dourada", "Paraíso",
+            "Aurora", "Três", "Irmãos", "Cachoeira", "Lagoa", "Grande", "Pedra"]
+
+def gerar_pdf_gta(caminho: str, texto: str):
+    """
+    Grava `texto` num PDF, uma célula por linha, como o PyMuPDF devolve
+    as GTAs reais; quebra em páginas de LINHAS_POR_PAGINA linhas.
+    """
+    linhas = texto.splitlines()
+    doc = fitz.open()
+    for i in range(0, len(linhas), LINHAS_POR_PAGINA):
+        # um insert_text por página (uma chamada por linha é ~15x mais lento)
+        pagina = doc.new_page()
+        pagina.insert_text((40, 30), linhas[i:i + LINHAS_POR_PAGINA], fontsize=9, lineheight=12 / 9)
+    doc.save(caminho)
+    doc.close()
+
+def gerar_corpus_pdf(pasta: str, n: int, semente: int = 42, fazendas: list = None,
+                     proporcao_vertical: float = 0.7, max_categorias: int = 8) -> list[str]:
+    """
+    `n` PDFs de GTA em `pasta` (layout vertical com `proporcao_vertical`,
+    1 a `max_categorias` categorias). Com `fazendas`, a procedência de cada
+    GTA sai dessa lista. Retorna os caminhos.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    rng = random.Random(semente)
+    caminhos = []
+    for i in range(n):
+        fazenda = rng.choice(fazendas) if fazendas else "FAZENDA ORIGEM"
+        texto = texto_sintetico(rng, rng.randint(1, max_categorias),
+                                rng.random() < proporcao_vertical, fazenda)
+        caminho = os.path.join(pasta, f"GTA {i:05d}.pdf")
+        gerar_pdf_gta(caminho, texto)
+        caminhos.append(caminho)
+    return caminhos
+
+def categorias_sinteticas(n: int, semente: int = 42) -> list[dict]:
+    """
+    `n` categorias no formato de interpretar_texto_gta.
+    """
+    rng = random.Random(semente)
+    return [{"grupo": "Bovideos", "especie": "Bovinos", "categoria": None,
+             "faixa": rng.choice(FAIXAS), "sexo": rng.choice(SEXOS),
+             "quantidade": rng.randint(1, 200)} for _ in range(n)]
+
+def _moeda(valor: int) -> str:
+    return f"{valor:,d}".replace(",", ".") + ",00"
+
+def dataframe_pauta(n: int, semente: int = 42) -> pd.DataFrame:
+    """
+    Pauta com `n` linhas: as 8 descrições de bovino (sexo x faixa) para as
+    classes de CLASSES e, passando disso, classes numeradas.
+    Preços como o site exporta ("1.800,00").
+    """
+    rng = random.Random(semente)
+    linhas = []
+    k = 0
+    while len(linhas) < n:
+        classe = CLASSES[k] if k < len(CLASSES) else f"Classe {k:05d}"
+        for sexo in ("FEMEA", "MACHO"):
+            for faixa in FAIXAS:
+                linhas.append((classe, f"BOVINO {sexo} {faixa.upper()}",
+                               _moeda(rng.randrange(800, 4000, 50))))
+        k += 1
+    return pd.DataFrame(linhas[:n], columns=["Classe", "Descrição", "Valor Pauta"])
+
+def gerar_pauta(caminho: str, n: int, semente: int = 42) -> str:
+    """
+    Grava a pauta sintética como "PAUTA FISCAL - dd.mm.aaaa.xlsx" espera:
+    aba "Dados". Retorna o caminho.
+    """
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    dataframe_pauta(n, semente).to_excel(caminho, sheet_name="Dados", index=False)
+    return caminho
+
+def nomes_fazendas(n: int, semente: int = 42) -> list[str]:
+    """
+    `n` nomes de fazenda distintos ("Fazenda Boa Vista II", ...).
+    """
+    rng = random.Random(semente)
+    nomes, vistos = [], set()
+    while len(nomes) < n:
+        nome = " ".join(rng.sample(PALAVRAS, rng.randint(1, 3)))
+        if len(vistos) > len(PALAVRAS) ** 2:
+            nome += f" {rng.randint(1, 999)}"
+        nome = f"Fazenda {nome}"
+        if nome.upper() not in vistos:
+            vistos.add(nome.upper())
+            nomes.append(nome)
+    return nomes
+
+def gerar_credenciais(caminho: str, n: int, semente: int = 42) -> list[str]:
+    """
+    Planilha de credenciais com `n` fazendas (IE no formato 29.123.456-7).
+    Retorna os nomes das fazendas.
+    """
+    rng = random.Random(semente)
+    nomes = nomes_fazendas(n, semente)
+    ies = [f"29.{rng.randint(100, 999)}.{rng.randint(100, 999)}-{rng.randint(0, 9)}" for _ in nomes]
+    senhas = [f"s{rng.randint(10**5, 10**6 - 1)}" for _ in nomes]
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    pd.DataFrame({"FAZENDA": nomes, "INSCRICAO ESTADUAL": ies, "SENHA SEFAZ": senhas}) \
+      .to_excel(caminho, sheet_name="Planilha1", index=False)
+    return nomes
@@ -0,0 +1,36 @@
+// Comportamento comum das páginas locais da SEFAZ (benchmarks/sefaz_local).
+var sefaz = (function () {
+  var params = new URLSearchParams(window.location.search);
+  var atraso = parseInt(params.get("atraso") || "0", 10) || 0;
+
+  // executa `acao` depois do atraso simulado do servidor
+  function liberar(acao) {
+    if (atraso > 0) { setTimeout(acao, atraso); } else { acao(); }
+  }
+
+  // navega mantendo o ?atraso da sessão
+  function ir(pagina) {
+    liberar(function () {
+      window.location.href = pagina + (atraso ? "?atraso=" + atraso : "");
+    });
+  }
+
+  // máscara da IE como no portal: 29.123.456-7
+  function mascaraIE(campo) {
+    var d = campo.value.replace(/\D/g, "").slice(0, 9);
+    var partes = [d.slice(0, 2), d.slice(2, 5), d.slice(5, 8)].filter(Boolean).join(".");
+    campo.value = d.length > 8 ? partes + "-" + d.slice(8) : partes;
+  }
+
+  function entrar(form) {
+    if (!form.vCONINSEST.value || !form.vSENHA.value) { return false; }
+    form.atraso.value = atraso || "";
+    if (atraso > 0) {
+      setTimeout(function () { form.submit(); }, atraso);
+      return false;
+    }
+    return true;
+  }
+
+  return { liberar: liberar, ir: ir, mascaraIE: mascaraIE, entrar: entrar, atraso: atraso };
+})();
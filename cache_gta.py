@@ -0,0 +1,102 @@
+# cache_gta.py
+#
+# Cache dos dados extraídos das GTAs, indexado pelo SHA-256 do PDF
+# e pela versão do parser. Um PDF já lido volta direto do SQLite,
+# sem abrir o PyMuPDF. Ao passar de `max_itens`, as entradas usadas
+# há mais tempo são descartadas (LRU).
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from utils import sha256_arquivo
+
+CAMINHO_PADRAO = os.path.join("JSON", "cache_gta.sqlite")
+MAX_ITENS      = 5000
+
+class CacheGTA:
+    def __init__(self, versao: str, caminho: str = CAMINHO_PADRAO, max_itens: int = MAX_ITENS):
+        """
+        `versao` é a versão do parser (pegar_dados_GTA.VERSAO_PARSER): entradas
+        gravadas por outra versão são apagadas ao abrir o cache.
+        """
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.versao = versao
+        self.max_itens = max_itens
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(caminho, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS gta (
+                sha256     TEXT NOT NULL,
+                versao     TEXT NOT NULL,
+                dados      TEXT NOT NULL,
+                ultimo_uso REAL NOT NULL,
+                PRIMARY KEY (sha256, versao)
+            )
+        """)
+        self._con.execute("CREATE INDEX IF NOT EXISTS gta_uso ON gta (ultimo_uso)")
+        self.invalidar()
+
+    def chave(self, caminho_pdf: str, variante: str = "", sha: str = None) -> str:
+        """
+        SHA-256 do PDF (ou `sha`, se já calculado); `variante` separa
+        resultados de modos de leitura diferentes do mesmo arquivo
+        (ex.: "posicional").
+        """
+        sha = sha or sha256_arquivo(caminho_pdf)
+        return f"{sha}:{variante}" if variante else sha
+
+    def obter(self, sha: str):
+        """
+        Retorna o `dados` guardado para o hash (ou None) e marca como usado.
+        """
+        with self._lock, self._con:
+            linha = self._con.execute(
+                "SELECT dados FROM gta WHERE sha256 = ? AND versao = ?",
+                (sha, self.versao)
+            ).fetchone()
+            if linha is None:
+                return None
+            self._con.execute(
+                "UPDATE gta SET ultimo_uso = ? WHERE sha256 = ? AND versao = ?",
+                (time.time(), sha, self.versao)
+            )
+        return json.loads(linha[0])
+
+    def guardar(self, sha: str, dados: dict):
+        with self._lock, self._con:
+            self._con.execute(
+                "INSERT OR REPLACE INTO gta (sha256, versao, dados, ultimo_uso) VALUES (?, ?, ?, ?)",
+                (sha, self.versao, json.dumps(dados, ensure_ascii=False), time.time())
+            )
+            total = self._con.execute("SELECT COUNT(*) FROM gta").fetchone()[0]
+            if total > self.max_itens:
+                self._con.execute(
+                    "DELETE FROM gta WHERE rowid IN "
+                    "(SELECT rowid FROM gta ORDER BY ultimo_uso LIMIT ?)",
+                    (total - self.max_itens,)
+                )
+
+    def invalidar(self, todas: bool = False) -> int:
+        """
+        Apaga as entradas de outras versões do parser (ou todas, se `todas`).
+        Retorna quantas foram removidas.
+        """
+        with self._lock, self._con:
+            if todas:
+                cur = self._con.execute("DELETE FROM gta")
+            else:
+                cur = self._con.execute("DELETE FROM gta WHERE versao != ?", (self.versao,))
+        return cur.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._con.execute("SELECT COUNT(*) FROM gta").fetchone()[0]
+
+    def fechar(self):
+        self._con.close()
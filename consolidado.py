@@ -0,0 +1,181 @@
+# consolidado.py
+#
+# Saída consolidada do lote, em vez de um .xlsx e dois .json por GTA:
+#   - RelatorioConsolidado: um único workbook com uma aba por GTA (mesmo
+#     layout do relatório individual) e uma aba "Resumo" com cabeças e
+#     valor de pauta por fazenda e classe;
+#   - ArquivoJSONL: registros de máquina acrescentados a um único arquivo
+#     JSON Lines (opcionalmente .gz, um membro gzip por registro), com um
+#     índice numero_gta -> posição no arquivo para busca direta.
+
+import os
+import gzip
+import json
+import zlib
+from decimal import Decimal
+
+from relatorio_xlsx import abrir_escritor, linhas_relatorio
+
+CABECALHO_RESUMO = ["Fazenda", "Classe", "GTAs", "Cabeças", "Valor Pauta"]
+_PROIBIDOS_ABA   = str.maketrans({c: "_" for c in '[]:*?/\\'})
+
+def _json_padrao(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"{type(obj).__name__} não serializável")
+
+class RelatorioConsolidado:
+    def __init__(self, caminho: str, engine: str = None):
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.caminho  = caminho
+        self._escritor = abrir_escritor(caminho, engine)
+        self._abas    = set()
+        self._totais  = {}  # (fazenda, classe) -> [gtas, cabeças, valor]
+
+    def _nome_aba(self, numero_gta) -> str:
+        base = f"GTA {numero_gta or 'sem número'}".translate(_PROIBIDOS_ABA)[:26]
+        nome, n = base, 1
+        while nome.lower() in self._abas:
+            n += 1
+            nome = f"{base} ({n})"
+        self._abas.add(nome.lower())
+        return nome
+
+    def adicionar(self, dados: dict, df_prod) -> str:
+        """
+        Grava a aba da GTA (produtos de report.produtos_relatorio) e soma
+        cabeças e valor no resumo. Retorna o nome da aba.
+        """
+        nome = self._nome_aba(dados.get("numero_gta"))
+        self._escritor.aba(nome, linhas_relatorio(
+            dados, df_prod.itertuples(index=False, name=None), list(df_prod.columns)
+        ))
+        fazenda = dados.get("estabelecimento_procedencia") or ""
+        for classe, qtd, preco in zip(df_prod["Classe"], df_prod["Quantidade"],
+                                      df_prod["Preço Pauta Fiscal"]):
+            total = self._totais.setdefault((fazenda, classe), [set(), 0, Decimal(0)])
+            total[0].add(nome)
+            total[1] += int(qtd or 0)
+            if preco is not None:
+                total[2] += Decimal(int(qtd or 0)) * preco
+        return nome
+
+    def _linhas_resumo(self):
+        yield [(h, "negrito") for h in CABECALHO_RESUMO]
+        gtas, cabecas, valor = set(), 0, Decimal(0)
+        for (fazenda, classe), (abas, qtd, soma) in sorted(self._totais.items()):
+            yield [fazenda, classe, len(abas), qtd, (soma, "moeda")]
+            gtas |= abas; cabecas += qtd; valor += soma
+        yield []
+        yield [("TOTAL", "negrito"), None, len(gtas), cabecas, (valor, "moeda")]
+
+    def fechar(self):
+        self._escritor.aba("Resumo", self._linhas_resumo(), {"A": 40, "B": 20, "E": 16})
+        self._escritor.fechar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is None:
+            self.fechar()
+
+class ArquivoJSONL:
+    def __init__(self, caminho: str):
+        """
+        `caminho` terminado em .gz grava cada registro como um membro gzip
+        próprio (o arquivo continua legível por gzip.open / zcat).
+        O índice fica ao lado, em <caminho>.idx (numero_gta, início, tamanho).
+        """
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho
+        self.gzip    = caminho.endswith(".gz")
+        self.caminho_indice = caminho + ".idx"
+        self._indice = {}
+        self._carregar_indice()
+
+    def _carregar_indice(self):
+        tamanho = os.path.getsize(self.caminho) if os.path.exists(self.caminho) else 0
+        fim = 0
+        if os.path.exists(self.caminho_indice):
+            with open(self.caminho_indice, encoding="utf-8") as f:
+                for linha in f:
+                    numero, ini, n = linha.rstrip("\n").split("\t")
+                    self._indice[numero] = (int(ini), int(n))
+                    fim = max(fim, int(ini) + int(n))
+        if fim != tamanho:
+            self.reconstruir_indice()
+
+    def reconstruir_indice(self):
+        """
+        Refaz o índice lendo o arquivo inteiro (índice ausente ou desatualizado).
+        """
+        self._indice = {}
+        if os.path.exists(self.caminho):
+            for ini, n, registro in self._varrer():
+                self._indice[str(registro.get("numero_gta"))] = (ini, n)
+        with open(self.caminho_indice, "w", encoding="utf-8") as f:
+            for numero, (ini, n) in self._indice.items():
+                f.write(f"{numero}\t{ini}\t{n}\n")
+
+    def _varrer(self):
+        with open(self.caminho, "rb") as f:
+            bruto = f.read()
+        pos = 0
+        if not self.gzip:
+            for linha in bruto.splitlines(keepends=True):
+                if linha.strip():
+                    yield pos, len(linha), json.loads(linha)
+                pos += len(linha)
+            return
+        while pos < len(bruto):
+            # um membro gzip por registro: descomprime até o fim do membro
+            d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            partes, i = [], pos
+            while not d.eof and i < len(bruto):
+                bloco = bruto[i:i + 65536]
+                partes.append(d.decompress(bloco))
+                i += len(bloco)
+            n = i - len(d.unused_data) - pos
+            yield pos, n, json.loads(b"".join(partes))
+            pos += n
+
+    def acrescentar(self, registro: dict) -> tuple[int, int]:
+        """
+        Acrescenta o registro (uma linha JSON compacta) e indexa pelo
+        numero_gta; um número repetido passa a apontar para o mais recente.
+        """
+        linha = json.dumps(registro, ensure_ascii=False, separators=(",", ":"),
+                           default=_json_padrao).encode("utf-8") + b"\n"
+        if self.gzip:
+            linha = gzip.compress(linha)
+        with open(self.caminho, "ab") as f:
+            ini = f.tell()
+            f.write(linha)
+        numero = str(registro.get("numero_gta"))
+        self._indice[numero] = (ini, len(linha))
+        with open(self.caminho_indice, "a", encoding="utf-8") as f:
+            f.write(f"{numero}\t{ini}\t{len(linha)}\n")
+        return ini, len(linha)
+
+    def buscar(self, numero_gta):
+        """
+        Último registro gravado para o número da GTA, ou None.
+        """
+        pos = self._indice.get(str(numero_gta))
+        if pos is None:
+            return None
+        with open(self.caminho, "rb") as f:
+            f.seek(pos[0])
+            bruto = f.read(pos[1])
+        return json.loads(gzip.decompress(bruto) if self.gzip else bruto)
+
+    def __contains__(self, numero_gta):
+        return str(numero_gta) in self._indice
+
+    def __len__(self):
+        return len(self._indice)
@@ -0,0 +1,154 @@
+# controle_gtas.py
+#
+# Controle (SQLite) de até onde cada GTA já chegou, indexado por
+# numero_gta + SHA-256 do PDF. Um lote ou emissão interrompido, rodado de
+# novo, pula o que já foi feito em vez de refazer tudo — e, principalmente,
+# não emite de novo uma nota que já tem protocolo.
+#
+# Etapas, em ordem (cada uma implica as anteriores):
+#   lida → relatorio → login → emitida
+#
+# Na abertura as linhas vão para dicionários em memória (por hash e por
+# número da GTA): as consultas não tocam no banco. Cada registrar() grava na
+# hora, então um crash perde no máximo a etapa em andamento.
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from utils import sha256_arquivo
+
+CAMINHO_PADRAO = os.path.join("JSON", "controle_gtas.sqlite")
+# nível gravado no banco para cada etapa; o 1 ficou vago quando a etapa
+# "precificada" (nunca registrada: o preço sai junto com o relatório) saiu
+NIVEIS = {"lida": 0, "relatorio": 2, "login": 3, "emitida": 4}
+ETAPAS = tuple(NIVEIS)
+_ETAPA_DO_NIVEL = {nivel: etapa for etapa, nivel in NIVEIS.items()}
+
+class ControleGTAs:
+    def __init__(self, caminho: str = CAMINHO_PADRAO):
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(caminho, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS gta (
+                numero_gta  TEXT NOT NULL,
+                sha256      TEXT NOT NULL,
+                etapa       INTEGER NOT NULL,
+                arquivo     TEXT,
+                detalhes    TEXT NOT NULL,
+                atualizado  REAL NOT NULL,
+                PRIMARY KEY (numero_gta, sha256)
+            )
+        """)
+        # sha256 -> [numero_gta, etapa, detalhes]; numero_gta -> protocolo da nota emitida
+        self._por_sha = {}
+        self._emitidas = {}
+        for numero, sha, etapa, detalhes in self._con.execute(
+                "SELECT numero_gta, sha256, etapa, detalhes FROM gta ORDER BY atualizado"):
+            self._lembrar(numero, sha, etapa, json.loads(detalhes))
+
+    def _lembrar(self, numero: str, sha: str, etapa: int, detalhes: dict):
+        self._por_sha[sha] = [numero, etapa, detalhes]
+        if etapa == NIVEIS["emitida"]:
+            self._emitidas[numero] = detalhes.get("protocolo")
+
+    def chave(self, caminho_pdf: str) -> str:
+        return sha256_arquivo(caminho_pdf)
+
+    def chaves(self, caminhos) -> dict:
+        """
+        {caminho: SHA-256}, lendo cada PDF uma vez; None para os que não
+        abrem (a leitura da GTA relata o erro). Repasse o dicionário a
+        extrair_em_paralelo(shas=...) para o cache não ler os PDFs de novo.
+        """
+        shas = {}
+        for c in caminhos:
+            try:
+                shas[c] = sha256_arquivo(c)
+            except OSError:
+                shas[c] = None
+        return shas
+
+    def etapa(self, sha: str):
+        """
+        Última etapa concluída do PDF (um dos ETAPAS) ou None.
+        """
+        registro = self._por_sha.get(sha)
+        return _ETAPA_DO_NIVEL[registro[1]] if registro else None
+
+    def concluida(self, sha: str, etapa: str) -> bool:
+        registro = self._por_sha.get(sha)
+        return registro is not None and registro[1] >= NIVEIS[etapa]
+
+    def detalhes(self, sha: str) -> dict:
+        """
+        O que foi guardado junto com as etapas do PDF (vazio se nada).
+        """
+        registro = self._por_sha.get(sha)
+        return dict(registro[2]) if registro else {}
+
+    def emitida(self, numero_gta: str):
+        """
+        Protocolo da NF-e já emitida para a GTA (por número, venha de qual
+        PDF vier), "" se foi emitida sem protocolo registrado, ou None.
+        """
+        numero_gta = str(numero_gta or "")
+        if not numero_gta or numero_gta not in self._emitidas:
+            return None
+        return self._emitidas[numero_gta] or ""
+
+    def registrar(self, sha: str, numero_gta: str, etapa: str, arquivo: str = None,
+                  detalhes: dict = None):
+        """
+        Marca a `etapa` como concluída para o PDF. A etapa nunca volta (uma
+        GTA emitida continua emitida); `detalhes` são somados aos já
+        guardados.
+        """
+        if not sha:
+            return
+        numero_gta = str(numero_gta or "")
+        detalhes = dict(detalhes or {})
+        with self._lock:
+            anterior = self._por_sha.get(sha)
+            nivel = NIVEIS[etapa]
+            if anterior is not None:
+                nivel = max(nivel, anterior[1])
+                detalhes = {**anterior[2], **detalhes}
+                # sem número (ex.: PDF ilegível na primeira vez) fica o que já havia
+                numero_gta = numero_gta or anterior[0]
+            with self._con:
+                if anterior is not None and anterior[0] != numero_gta:
+                    self._con.execute("DELETE FROM gta WHERE numero_gta = ? AND sha256 = ?",
+                                      (anterior[0], sha))
+                self._con.execute(
+                    "INSERT INTO gta (numero_gta, sha256, etapa, arquivo, detalhes, atualizado) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (numero_gta, sha256) DO UPDATE SET "
+                    "etapa = excluded.etapa, arquivo = COALESCE(excluded.arquivo, gta.arquivo), "
+                    "detalhes = excluded.detalhes, atualizado = excluded.atualizado",
+                    (numero_gta, sha, nivel, arquivo, json.dumps(detalhes, ensure_ascii=False, default=str),
+                     time.time())
+                )
+            self._lembrar(numero_gta, sha, nivel, detalhes)
+
+    def resumo(self) -> dict:
+        """
+        Quantos PDFs pararam em cada etapa.
+        """
+        contagem = {}
+        for _, nivel, _ in self._por_sha.values():
+            etapa = _ETAPA_DO_NIVEL[nivel]
+            contagem[etapa] = contagem.get(etapa, 0) + 1
+        return contagem
+
+    def __len__(self):
+        return len(self._por_sha)
+
+    def fechar(self):
+        self._con.close()
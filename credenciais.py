@@ -0,0 +1,175 @@
+# credenciais.py
+#
+# Índice da planilha de credenciais (Arquivos/*.xlsx, aba "Planilha1").
+# A planilha é lida uma vez; as chaves normalizadas de cada fazenda ficam
+# num dict (busca exata) e numa lista ordenada (busca por prefixo via
+# bisect). Só na falta das duas cai na busca por trecho, como antes.
+# O índice é recarregado apenas quando a planilha muda (mtime/tamanho e,
+# se esses mudarem, o SHA-256).
+#
+# Se nada casar, o nome é procurado por aproximação (trigramas) e aceito
+# se o score passar de `limiar` (padrão: CREDENCIAL_LIMIAR ou 0.75).
+#
+# Se mais de uma fazenda com inscrições diferentes casar com o nome da GTA,
+# levanta CredencialAmbigua em vez de escolher a primeira.
+
+import os
+import re
+import bisect
+import logging
+import threading
+
+import pandas as pd
+
+from utils import normalize_text, sha256_arquivo
+from similaridade import IndiceTrigramas
+
+ABA    = "Planilha1"
+LIMIAR = float(os.environ.get("CREDENCIAL_LIMIAR", "0.75"))
+# candidatos aproximados a menos disso do melhor score contam como empate
+EMPATE = 0.02
+
+_RE_PONTUACAO = re.compile(r"[^\w\s]")
+_RE_FAZENDA   = re.compile(r"\bFAZENDA\b")
+_RE_IE        = re.compile(r"[.\-/]")
+
+class FazendaNaoEncontrada(ValueError):
+    def __init__(self, farm_name: str, sugestoes: list = ()):
+        self.sugestoes = list(sugestoes)
+        msg = f"Fazenda '{farm_name}' não encontrada."
+        if self.sugestoes:
+            msg += " Parecidas: " + ", ".join(f"{nome} ({score:.2f})" for nome, score in self.sugestoes)
+        super().__init__(msg)
+
+class CredencialAmbigua(ValueError):
+    def __init__(self, farm_name: str, candidatos: list):
+        self.candidatos = candidatos
+        nomes = ", ".join(f"{nome} (IE {ie})" for nome, ie in candidatos)
+        super().__init__(f"Fazenda '{farm_name}' é ambígua: {nomes}")
+
+def chave_fazenda(nome: str) -> str:
+    """
+    Nome da fazenda sem acentos, pontuação e a palavra FAZENDA.
+    """
+    s = _RE_FAZENDA.sub(" ", normalize_text(nome))
+    return " ".join(_RE_PONTUACAO.sub("", s).upper().split())
+
+class IndiceCredenciais:
+    def __init__(self, excel_path: str):
+        self.excel_path = excel_path
+        self._assinatura = None  # (mtime, tamanho)
+        self._sha = None
+        self._lock = threading.Lock()
+        self.atualizar()
+
+    def atualizar(self) -> bool:
+        """
+        Relê a planilha se ela mudou. Retorna True se o índice foi refeito.
+        """
+        with self._lock:
+            st = os.stat(self.excel_path)
+            assinatura = (st.st_mtime, st.st_size)
+            if assinatura == self._assinatura:
+                return False
+            sha = sha256_arquivo(self.excel_path)
+            self._assinatura = assinatura
+            if sha == self._sha:
+                return False
+            self._montar()
+            self._sha = sha
+            return True
+
+    def _montar(self):
+        df = pd.read_excel(self.excel_path, sheet_name=ABA, engine="openpyxl",
+                           dtype={"INSCRICAO ESTADUAL": str, "SENHA SEFAZ": str})
+        linhas, exato, normal = [], {}, []
+        for nome, ie, senha in zip(df["FAZENDA"], df["INSCRICAO ESTADUAL"], df["SENHA SEFAZ"]):
+            if pd.isna(nome):
+                continue
+            chave = chave_fazenda(nome)
+            simples = chave.replace(" ", "")
+            if not simples:
+                continue
+            ie = "" if pd.isna(ie) else _RE_IE.sub("", str(ie).strip())
+            senha = "" if pd.isna(senha) else str(senha)
+            exato.setdefault(simples, []).append(len(linhas))
+            normal.append(chave)
+            linhas.append((str(nome), ie, senha))
+        self.linhas   = linhas
+        self._exato   = exato
+        self._normal  = normal
+        self._simples = [s.replace(" ", "") for s in normal]
+        self._ordem   = sorted((s, i) for i, s in enumerate(self._simples))
+        self._chaves  = [s for s, _ in self._ordem]
+        self._trigramas = IndiceTrigramas(normal)
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def candidatos(self, farm_name: str) -> list[int]:
+        """
+        Índices das linhas que casam com o nome, na primeira regra que
+        encontrar algo: chave exata, prefixo, trecho (sem espaços), trecho.
+        """
+        chave = chave_fazenda(farm_name)
+        simples = chave.replace(" ", "")
+        if not simples:
+            return []
+        if simples in self._exato:
+            return self._exato[simples]
+        ini = bisect.bisect_left(self._chaves, simples)
+        fim = bisect.bisect_left(self._chaves, simples + "\uffff", ini)
+        if ini < fim:
+            return sorted(i for _, i in self._ordem[ini:fim])
+        achados = [i for i, s in enumerate(self._simples) if simples in s]
+        return achados or [i for i, s in enumerate(self._normal) if chave in s]
+
+    def sugerir(self, farm_name: str, limite: int = 5, minimo: float = 0.0) -> list[tuple]:
+        """
+        Fazendas mais parecidas com o nome: lista de (score, índice da linha).
+        """
+        return self._trigramas.ranquear(chave_fazenda(farm_name), limite, minimo)
+
+    def buscar(self, farm_name: str, limiar: float = None) -> tuple[str, str]:
+        """
+        (IE, senha) da fazenda. Sem casamento exato/prefixo/trecho, aceita a
+        fazenda mais parecida se o score for >= `limiar`. Levanta
+        FazendaNaoEncontrada (com sugestões) se não achar e CredencialAmbigua
+        se os candidatos tiverem inscrições diferentes.
+        """
+        limiar = LIMIAR if limiar is None else limiar
+        achados = self.candidatos(farm_name)
+        if not achados:
+            ranking = self.sugerir(farm_name)
+            if not ranking or ranking[0][0] < limiar:
+                raise FazendaNaoEncontrada(
+                    farm_name, [(self.linhas[i][0], score) for score, i in ranking[:3]]
+                )
+            melhor = ranking[0][0]
+            achados = [i for score, i in ranking if score >= melhor - EMPATE]
+            logging.warning(f"⚠️ Fazenda '{farm_name}' casada por aproximação com "
+                            f"'{self.linhas[achados[0]][0]}' (score {melhor:.2f})")
+        inscricoes = {}
+        for i in achados:
+            nome, ie, _ = self.linhas[i]
+            inscricoes.setdefault(ie, nome)
+        if len(inscricoes) > 1:
+            raise CredencialAmbigua(farm_name, [(nome, ie) for ie, nome in inscricoes.items()])
+        _, ie, senha = self.linhas[achados[0]]
+        return ie, senha
+
+_indices = {}
+_lock_indices = threading.Lock()
+
+def indice_credenciais(excel_path: str) -> IndiceCredenciais:
+    """
+    Índice da planilha, criado uma vez por caminho e atualizado se ela mudar.
+    """
+    chave = os.path.abspath(excel_path)
+    with _lock_indices:
+        indice = _indices.get(chave)
+        if indice is None:
+            _indices[chave] = IndiceCredenciais(excel_path)
+            return _indices[chave]
+    indice.atualizar()
+    return indice
@@ -0,0 +1,121 @@
+# downloads.py
+#
+# Espera um download do navegador terminar numa pasta.
+# No Linux usa inotify (via ctypes) para acordar a cada evento do sistema
+# de arquivos; nos outros sistemas, ou se o inotify falhar, faz polling.
+#
+# Um arquivo é considerado pronto quando:
+#   - tem a extensão esperada e não é temporário (~$, .crdownload, .part, ...);
+#   - foi criado/modificado depois de `desde`;
+#   - não há nenhum arquivo temporário de download na pasta;
+#   - foi fechado/renomeado (evento do inotify) ou o tamanho ficou estável
+#     por `estabilidade` segundos.
+
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+
+SUFIXOS_TEMPORARIOS = (".crdownload", ".part", ".partial", ".download", ".tmp")
+
+# constantes de <sys/inotify.h>
+_IN_MODIFY      = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO    = 0x00000080
+_IN_CREATE      = 0x00000100
+_EVENTO         = struct.Struct("iIII")
+
+def _temporario(nome: str) -> bool:
+    n = nome.lower()
+    return nome.startswith("~$") or nome.startswith(".") or n.endswith(SUFIXOS_TEMPORARIOS)
+
+def _abrir_inotify(pasta: str):
+    """
+    Descritor inotify observando `pasta`, ou None se não houver suporte.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        mascara = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(pasta), mascara) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+def _ler_eventos(fd: int) -> set:
+    """
+    Consome os eventos pendentes e devolve os nomes de arquivos
+    fechados após escrita ou renomeados para dentro da pasta.
+    """
+    fechados = set()
+    while True:
+        try:
+            buf = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return fechados
+        pos = 0
+        while pos + _EVENTO.size <= len(buf):
+            _, mascara, _, tam = _EVENTO.unpack_from(buf, pos)
+            nome = buf[pos + _EVENTO.size:pos + _EVENTO.size + tam].rstrip(b"\0")
+            pos += _EVENTO.size + tam
+            if nome and mascara & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                fechados.add(os.fsdecode(nome))
+
+def aguardar_download(pasta: str, extensao: str = ".xlsx", timeout: float = 60,
+                      desde: float = None, estabilidade: float = 1.0,
+                      intervalo: float = 0.25) -> str:
+    """
+    Bloqueia até um arquivo `extensao` terminar de ser baixado em `pasta`
+    e devolve o caminho dele. `desde` (epoch) ignora arquivos anteriores ao
+    clique; padrão: o momento da chamada. Levanta TimeoutError após `timeout`.
+    """
+    desde = time.time() if desde is None else desde
+    prazo = time.monotonic() + timeout
+    fd = _abrir_inotify(pasta)
+    fechados = set()
+    vistos = {}  # nome -> (tamanho, mtime, instante em que ficou assim)
+    try:
+        while True:
+            agora = time.monotonic()
+            nomes = os.listdir(pasta)
+            if not any(n.lower().endswith(SUFIXOS_TEMPORARIOS) for n in nomes):
+                candidatos = []
+                for nome in nomes:
+                    if not nome.lower().endswith(extensao) or _temporario(nome):
+                        continue
+                    try:
+                        st = os.stat(os.path.join(pasta, nome))
+                    except FileNotFoundError:
+                        continue
+                    if st.st_mtime < desde - 1 or st.st_size == 0:
+                        continue  # anterior ao clique (1 s de folga de resolução) ou vazio
+                    estado = (st.st_size, st.st_mtime)
+                    if nome not in vistos or vistos[nome][:2] != estado:
+                        vistos[nome] = estado + (agora,)
+                    if nome in fechados or agora - vistos[nome][2] >= estabilidade:
+                        candidatos.append((st.st_mtime, nome))
+                if candidatos:
+                    return os.path.join(pasta, max(candidatos)[1])
+
+            restante = prazo - agora
+            if restante <= 0:
+                raise TimeoutError(f"❌ Timeout de {timeout}s aguardando download em {pasta}")
+            espera = min(restante, intervalo)
+            if fd is not None:
+                prontos, _, _ = select.select([fd], [], [], espera)
+                if prontos:
+                    fechados |= _ler_eventos(fd)
+            else:
+                time.sleep(espera)
+    finally:
+        if fd is not None:
+            os.close(fd)
@@ -0,0 +1,221 @@
+# driver_pool.py
+#
+# Pool de navegadores Chrome já abertos, reaproveitados entre emissões.
+# Resolver o chromedriver e subir o Chrome custam mais que o login em si;
+# aqui o caminho do driver é resolvido uma vez (e lembrado em disco) e
+# até `tamanho` navegadores ficam quentes à espera da próxima fazenda.
+#
+# Uso:
+#   with PoolDrivers(tamanho=2) as pool:
+#       with pool.sessao() as driver:
+#           perform_login_with_selenium(cred, fazenda, op, driver=driver)
+#
+# Entre uma sessão e outra os cookies são apagados e o navegador volta
+# para about:blank. Depois de `max_usos` sessões, ou se o navegador
+# morrer, ele é fechado e outro é aberto no lugar.
+
+import os
+import json
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service as ChromeService
+
+from resiliencia import categoria, NAVEGADOR
+
+CACHE_DRIVER = os.path.join("JSON", "chromedriver.json")
+MAX_USOS     = 25
+
+_caminho_driver = None
+_lock_driver    = threading.Lock()
+
+def caminho_chromedriver(cache: str = CACHE_DRIVER) -> str:
+    """
+    Caminho do chromedriver: variável CHROMEDRIVER, o último resolvido
+    (guardado em `cache`) ou, na falta deles, o ChromeDriverManager.
+    """
+    global _caminho_driver
+    with _lock_driver:
+        if _caminho_driver and os.path.exists(_caminho_driver):
+            return _caminho_driver
+        caminho = os.environ.get("CHROMEDRIVER")
+        if not caminho and os.path.exists(cache):
+            with open(cache, encoding="utf-8") as f:
+                caminho = json.load(f).get("caminho")
+        if not caminho or not os.path.exists(caminho):
+            from webdriver_manager.chrome import ChromeDriverManager
+            caminho = ChromeDriverManager().install()
+            os.makedirs(os.path.dirname(cache) or ".", exist_ok=True)
+            with open(cache, "w", encoding="utf-8") as f:
+                json.dump({"caminho": caminho}, f)
+        _caminho_driver = caminho
+        return caminho
+
+def opcoes_chrome(headless: bool = True, pasta_download: str = None,
+                  perfil: str = None) -> Options:
+    opcoes = Options()
+    if headless:
+        opcoes.add_argument("--headless=new")
+    opcoes.add_argument("--window-size=1366,900")
+    opcoes.add_argument("--disable-gpu")
+    opcoes.add_argument("--no-sandbox")
+    opcoes.add_argument("--disable-dev-shm-usage")
+    if perfil:
+        opcoes.add_argument(f"--user-data-dir={perfil}")
+    if pasta_download:
+        opcoes.add_experimental_option("prefs", {
+            "download.default_directory": pasta_download,
+            "download.prompt_for_download": False,
+            "download.directory_upgrade": True
+        })
+    return opcoes
+
+def novo_driver(headless: bool = True, pasta_download: str = None,
+                perfil: str = None) -> webdriver.Chrome:
+    service = ChromeService(caminho_chromedriver())
+    return webdriver.Chrome(service=service,
+                            options=opcoes_chrome(headless, pasta_download, perfil))
+
+def limpar_sessao(driver):
+    """
+    Apaga cookies (de todos os domínios) e volta para about:blank.
+    """
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    except (WebDriverException, AttributeError):
+        driver.delete_all_cookies()
+    driver.get("about:blank")
+
+def _vivo(driver) -> bool:
+    try:
+        driver.window_handles
+        return True
+    except WebDriverException:
+        return False
+
+def _fechar(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+class PoolDrivers:
+    def __init__(self, tamanho: int = 1, max_usos: int = MAX_USOS,
+                 headless: bool = True, pasta_download: str = None, fabrica=None):
+        """
+        `fabrica()` cria um navegador novo; o padrão é `novo_driver` com
+        `headless`/`pasta_download`. Os navegadores só abrem no primeiro
+        uso, a menos que se chame `aquecer()`.
+        """
+        self.tamanho  = tamanho
+        self.max_usos = max_usos
+        self._fabrica = fabrica or (lambda: novo_driver(headless, pasta_download))
+        self._livres  = queue.LifoQueue()
+        self._usos    = {}
+        self._todos   = set()
+        self._lock    = threading.Lock()
+        for _ in range(tamanho):
+            self._livres.put(None)  # vaga ainda sem navegador
+
+    def _criar(self):
+        driver = self._fabrica()
+        with self._lock:
+            self._usos[id(driver)] = 0
+            self._todos.add(driver)
+        return driver
+
+    def _descartar(self, driver):
+        with self._lock:
+            self._usos.pop(id(driver), None)
+            self._todos.discard(driver)
+        _fechar(driver)
+
+    def aquecer(self):
+        """
+        Abre em paralelo os navegadores que ainda faltam.
+        """
+        itens = []
+        while True:
+            try:
+                itens.append(self._livres.get_nowait())
+            except queue.Empty:
+                break
+        for driver in itens:
+            if driver is not None:
+                self._livres.put(driver)
+        vagas = itens.count(None)
+        with ThreadPoolExecutor(max_workers=max(vagas, 1)) as ex:
+            futuros = [ex.submit(self._criar) for _ in range(vagas)]
+        for f in futuros:
+            try:
+                self._livres.put(f.result())
+            except Exception:
+                logging.exception("❌ Falha ao abrir navegador do pool")
+                self._livres.put(None)
+        return self
+
+    def obter(self, timeout: float = None):
+        """
+        Retira um navegador do pool (bloqueia se todos estiverem em uso).
+        """
+        driver = self._livres.get(timeout=timeout)
+        try:
+            if driver is not None and not _vivo(driver):
+                logging.warning("⚠️ Navegador do pool caiu; abrindo outro.")
+                self._descartar(driver)
+                driver = None
+            return driver if driver is not None else self._criar()
+        except BaseException:
+            self._livres.put(None)
+            raise
+
+    def devolver(self, driver, descartar: bool = False):
+        """
+        Devolve o navegador limpo ao pool; fecha e libera a vaga se
+        `descartar`, se ele caiu ou se atingiu `max_usos`.
+        """
+        with self._lock:
+            usos = self._usos.get(id(driver), 0) + 1
+            self._usos[id(driver)] = usos
+        if not descartar and usos < self.max_usos:
+            try:
+                limpar_sessao(driver)
+                self._livres.put(driver)
+                return
+            except WebDriverException:
+                pass
+        self._descartar(driver)
+        self._livres.put(None)
+
+    @contextmanager
+    def sessao(self, timeout: float = None):
+        driver = self.obter(timeout)
+        descartar = False
+        try:
+            yield driver
+        except WebDriverException as e:
+            # timeout ou elemento ausente não condenam o navegador
+            descartar = categoria(e) == NAVEGADOR
+            raise
+        finally:
+            self.devolver(driver, descartar)
+
+    def fechar(self):
+        with self._lock:
+            drivers = list(self._todos)
+            self._todos.clear()
+            self._usos.clear()
+        for driver in drivers:
+            _fechar(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# emissao_paralela.py
+#
+# Emissão de NF-e para várias fazendas ao mesmo tempo. Cada trabalhador tem
+# o seu Chrome (um PoolDrivers de uma vaga, que troca o navegador se ele
+# cair), com perfil (--user-data-dir) e pasta de downloads próprios;
+# no máximo `paralelo` logins acontecem juntos (EMISSAO_PARALELO, padrão 2),
+# com um intervalo mínimo entre o início de dois logins, para não
+# sobrecarregar a SEFAZ.
+#
+# As GTAs são agrupadas pela inscrição estadual: um grupo roda inteiro num
+# só trabalhador, sob a trava daquela IE, de modo que dois navegadores nunca
+# entram com a mesma IE ao mesmo tempo. O resultado de cada GTA vai para
+# Relatórios/EMISSAO_<data>.csv.
+#
+# Dentro do grupo o login é feito uma vez só (sessoes_sefaz): as GTAs
+# seguintes da mesma IE voltam direto para a emissão de NF-e Avulsa, e o
+# navegador só é limpo quando o grupo termina.
+#
+# Uso:
+#   python emissao_paralela.py "GTAs/" --classe Comum --operacao abate --paralelo 3
+#   python emissao_paralela.py "GTAs/*.pdf" --mapa mapa.json --emitir
+#
+# Sem --emitir as notas são preenchidas e conferidas, mas não emitidas.
+# Contra o portal real é preciso NFE_SELETORES (ver formulario_nfe): sem ele
+# só roda com --url apontando para uma cópia local do formulário.
+# Se a SEFAZ parar de responder (disjuntor de resiliencia aberto), as GTAs
+# restantes saem como "sefaz_indisponivel" sem novas tentativas; o resto do
+# lote segue e a tabela diz o que falta emitir.
+#
+# Login e emissão de cada GTA ficam em controle_gtas: rodar de novo depois de
+# uma queda retoma do relatório já feito e nunca emite outra vez uma GTA
+# que já tem nota (status "ja_emitida", com o protocolo anterior).
+
+import os
+import csv
+import time
+import queue
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from selenium.common.exceptions import WebDriverException
+
+from driver_pool import PoolDrivers, novo_driver
+from login import URL_SEFAZ
+from sessoes_sefaz import SessoesSefaz
+from formulario_nfe import preencher_nfe, TotaisDivergentes
+from resiliencia import categoria, CircuitoAberto, NAVEGADOR
+
+PARALELO  = int(os.environ.get("EMISSAO_PARALELO", "2"))
+# segundos mínimos entre o início de dois logins (todos os trabalhadores)
+INTERVALO = float(os.environ.get("EMISSAO_INTERVALO", "1.0"))
+PASTA_RELATORIOS = "Relatórios"
+PASTA_DOWNLOADS  = "Downloads"
+
+COLUNAS_RESULTADO = ["arquivo", "numero_gta", "fazenda", "inscricao_estadual", "trabalhador",
+                     "status", "protocolo", "itens", "total", "inicio", "duracao_s", "categoria", "erro"]
+
+_travas_ie = {}
+_lock_travas = threading.Lock()
+
+def trava_ie(ie: str) -> threading.Lock:
+    """
+    Trava da inscrição estadual, a mesma para todo o processo.
+    """
+    with _lock_travas:
+        return _travas_ie.setdefault(ie, threading.Lock())
+
+class Ritmo:
+    def __init__(self, intervalo: float):
+        """
+        Espaça eventos em pelo menos `intervalo` segundos, entre threads.
+        """
+        self.intervalo = intervalo
+        self._proximo = 0.0
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        with self._lock:
+            agora = time.monotonic()
+            vez = max(agora, self._proximo)
+            self._proximo = vez + self.intervalo
+        if vez > agora:
+            time.sleep(vez - agora)
+
+class EmissaoParalela:
+    def __init__(self, excel_path: str, paralelo: int = None, headless: bool = True,
+                 emitir: bool = False, url: str = URL_SEFAZ, intervalo: float = None,
+                 pasta_downloads: str = None, fabrica=None, controle=None):
+        """
+        `excel_path`: planilha de credenciais. Cada trabalhador é um
+        driver_pool.PoolDrivers de uma vaga, com perfil temporário próprio
+        (apagado em fechar()) e downloads em `pasta_downloads/<nome>`;
+        `fabrica(headless, pasta_download, perfil)` cria o navegador
+        (padrão: driver_pool.novo_driver).
+        Com `controle` (controle_gtas.ControleGTAs), login e emissão de cada
+        tarefa que tiver "sha256" são registrados nele.
+        """
+        self.excel_path = excel_path
+        self.paralelo = max(1, paralelo or PARALELO)
+        self.emitir = emitir
+        self.url = url
+        self._ritmo = Ritmo(INTERVALO if intervalo is None else intervalo)
+        self.sessoes = SessoesSefaz(excel_path, url)
+        self.controle = controle
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        pasta_downloads = pasta_downloads or os.path.join(PASTA_DOWNLOADS, f"emissao_{ts}")
+        fabrica = fabrica or novo_driver
+        self._trabalhadores = queue.Queue()  # (nome, pool) livres
+        self._pools, self._perfis = [], []
+        for n in range(1, self.paralelo + 1):
+            nome = f"w{n}"
+            perfil = tempfile.mkdtemp(prefix=f"chrome_{nome}_")
+            downloads = os.path.abspath(os.path.join(pasta_downloads, nome))
+            os.makedirs(downloads, exist_ok=True)
+            pool = PoolDrivers(tamanho=1, fabrica=partial(fabrica, headless, downloads, perfil))
+            self._pools.append(pool)
+            self._perfis.append(perfil)
+            self._trabalhadores.put((nome, pool))
+
+    def executar(self, tarefas: list[dict]) -> list[dict]:
+        """
+        Emite as `tarefas` ({"arquivo", "dados", "operacao", "df_prod",
+        "inscricao_estadual"}) e retorna uma linha de resultado por tarefa,
+        na ordem recebida.
+        """
+        grupos = {}
+        for i, tarefa in enumerate(tarefas):
+            grupos.setdefault(tarefa["inscricao_estadual"], []).append(i)
+        resultados = [None] * len(tarefas)
+        # grupos maiores primeiro: o lote termina mais cedo
+        ordem = sorted(grupos.items(), key=lambda kv: -len(kv[1]))
+        with ThreadPoolExecutor(max_workers=self.paralelo, thread_name_prefix="emissao") as ex:
+            futuros = {ex.submit(self._grupo, ie, [tarefas[i] for i in indices]): indices
+                       for ie, indices in ordem}
+            for futuro in as_completed(futuros):
+                for i, resultado in zip(futuros[futuro], futuro.result()):
+                    resultados[i] = resultado
+        logging.info(self.sessoes.resumo())
+        return resultados
+
+    def _grupo(self, ie: str, tarefas: list[dict]) -> list[dict]:
+        # o navegador fica com o grupo inteiro (a sessão da IE vale para todas
+        # as GTAs); só abre na primeira GTA que precisar dele
+        nome, pool = self._trabalhadores.get()
+        resultados, driver = [], None
+        try:
+            with trava_ie(ie):
+                for tarefa in tarefas:
+                    res, driver = self._emitir(nome, pool, driver, tarefa)
+                    resultados.append(res)
+            return resultados
+        finally:
+            if driver is not None:
+                # cookies da fazenda não passam para o próximo grupo
+                self.sessoes.desvincular(driver)
+                pool.devolver(driver)
+            self._trabalhadores.put((nome, pool))
+
+    def _marcar(self, tarefa: dict, etapa: str, detalhes: dict = None):
+        if self.controle is not None and tarefa.get("sha256"):
+            self.controle.registrar(tarefa["sha256"], tarefa["dados"].get("numero_gta"), etapa,
+                                    tarefa["arquivo"], detalhes)
+
+    def _emitir(self, nome: str, pool: PoolDrivers, driver, tarefa: dict):
+        """
+        Emite uma GTA com o `driver` do grupo (None: pega um do `pool`).
+        Retorna (resultado, driver a usar na GTA seguinte).
+        """
+        dados = tarefa["dados"]
+        fazenda = dados.get("estabelecimento_procedencia") or ""
+        res = {"arquivo": tarefa["arquivo"], "numero_gta": dados.get("numero_gta"),
+               "fazenda": fazenda, "inscricao_estadual": tarefa["inscricao_estadual"],
+               "trabalhador": nome, "status": "erro",
+               "inicio": datetime.now().isoformat(timespec="seconds")}
+        protocolo = self.controle.emitida(res["numero_gta"]) if self.controle is not None else None
+        if protocolo is not None:
+            # outro PDF da mesma GTA já foi emitido (nesta execução ou antes)
+            res.update(status="ja_emitida", protocolo=protocolo, duracao_s=0)
+            logging.info(f"⏭️ GTA {res['numero_gta']} já emitida (protocolo {protocolo or '?'})")
+            return res, driver
+        t0 = time.perf_counter()
+        try:
+            if driver is None:
+                driver = pool.obter()
+            self._ritmo.aguardar()
+            _, ok = self.sessoes.abrir(driver, fazenda)
+            if not ok:
+                res["status"] = "falha_login"
+            else:
+                self._marcar(tarefa, "login")
+                nota = preencher_nfe(driver, dados, tarefa["df_prod"], tarefa["operacao"],
+                                     emitir=self.emitir)
+                res.update(status="emitida" if self.emitir else "preenchida",
+                           protocolo=nota["protocolo"], itens=nota["itens"], total=str(nota["total"]))
+                if self.emitir:
+                    self._marcar(tarefa, "emitida", {"protocolo": nota["protocolo"]})
+        except CircuitoAberto as e:
+            res.update(status="sefaz_indisponivel", categoria=e.categoria, erro=str(e))
+        except TotaisDivergentes as e:
+            res.update(status="totais_divergentes", categoria=categoria(e), erro=str(e))
+        except WebDriverException as e:
+            if categoria(e) == NAVEGADOR:
+                # só o Chrome caído é trocado; timeout ou campo ausente não
+                self.sessoes.desvincular(driver)
+                pool.devolver(driver, descartar=True)
+                driver = None
+            res.update(categoria=categoria(e), erro=f"{type(e).__name__}: {e.msg}")
+        except Exception as e:
+            res.update(categoria=categoria(e), erro=f"{type(e).__name__}: {e}")
+        finally:
+            res["duracao_s"] = round(time.perf_counter() - t0, 2)
+        nivel = logging.INFO if res["status"] in ("emitida", "preenchida") else logging.ERROR
+        logging.log(nivel, f"{'✅' if nivel == logging.INFO else '❌'} [{nome}] GTA "
+                           f"{res['numero_gta']} ({fazenda}): {res['status']}"
+                           + (f" — {res['erro']}" if res.get("erro") else ""))
+        return res, driver
+
+    def fechar(self):
+        for pool in self._pools:
+            pool.fechar()
+        for perfil in self._perfis:
+            shutil.rmtree(perfil, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+def salvar_resultados(resultados: list[dict], pasta: str = PASTA_RELATORIOS) -> str:
+    """
+    Tabela de resultados (CSV com ';', abre direto no Excel). Retorna o caminho.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    ts = datetime.now().strftime('%d.%m.%Y_%H-%M-%S')
+    caminho = os.path.join(pasta, f"EMISSAO_{ts}.csv")
+    with open(caminho, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=COLUNAS_RESULTADO, delimiter=";", extrasaction="ignore")
+        w.writeheader()
+        w.writerows(resultados)
+    return caminho
+
+def main(argv=None):
+    from lote            import listar_pdfs, carregar_mapa, processar_gta
+    from pegar_dados_GTA import extrair_em_paralelo, abrir_cache
+    from pauta           import download_and_load_pauta
+    from pauta_index     import PautaIndex
+    from report          import produtos_relatorio
+    from utils           import get_latest_file, normalize_text, configurar_logs
+    from instrumentacao  import iniciar_trace
+    from controle_gtas   import ControleGTAs
+
+    parser = argparse.ArgumentParser(description="Emite NF-e de várias fazendas em paralelo.")
+    parser.add_argument("entrada", help="pasta com PDFs ou padrão glob (entre aspas)")
+    parser.add_argument("--classe", help="classe de gado para todas as GTAs")
+    parser.add_argument("--operacao", help="operação para todas as GTAs (ex.: abate, recria)")
+    parser.add_argument("--mapa", help="JSON/CSV com classe/operação por arquivo")
+    parser.add_argument("--paralelo", type=int, default=PARALELO,
+                        help=f"navegadores ao mesmo tempo (padrão: {PARALELO})")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO,
+                        help=f"segundos entre o início de dois logins (padrão: {INTERVALO})")
+    parser.add_argument("--emitir", action="store_true", help="emite as notas (padrão: só preenche e confere)")
+    parser.add_argument("--visivel", action="store_true", help="abre os navegadores com janela")
+    parser.add_argument("--url", default=URL_SEFAZ, help="página de login (ex.: cópia local)")
+    parser.add_argument("--offline", action="store_true",
+                        help="não baixa a pauta; usa só a que já existe localmente")
+    parser.add_argument("--limiar", type=float,
+                        help="score mínimo (0 a 1) para aceitar fazenda por nome aproximado")
+    args = parser.parse_args(argv)
+
+    configurar_logs("emissao")
+    logging.info(f"🧭 Trace: {iniciar_trace('emissao')}")
+    if args.url == URL_SEFAZ and not os.environ.get("NFE_SELETORES"):
+        # os SELETORES embutidos são os da cópia local, não os do portal
+        logging.error("❌ Defina NFE_SELETORES com os seletores do portal da SEFAZ "
+                      "(ou use --url com uma cópia local do formulário).")
+        return 1
+    caminhos = listar_pdfs(args.entrada)
+    if not caminhos:
+        logging.error(f"❌ Nenhum PDF encontrado em {args.entrada}")
+        return 1
+    try:
+        cred = get_latest_file("Arquivos", ".xlsx")
+    except FileNotFoundError as e:
+        logging.error(f"❌ {e}")
+        return 1
+
+    df_pauta = download_and_load_pauta(offline=args.offline or None)
+    classes = {normalize_text(c): c for c in df_pauta['Classe'].dropna().unique()}
+    indice = PautaIndex(df_pauta)
+    mapa = carregar_mapa(args.mapa) if args.mapa else {}
+
+    # leitura, relatório e credencial de cada GTA, como no lote; o que o
+    # controle já tem (emissão ou relatório de uma execução anterior) é pulado
+    controle = ControleGTAs()
+    shas = controle.chaves(caminhos)
+    resultados, tarefas, pendentes = [], [], []
+    for c in caminhos:
+        if controle.concluida(shas[c], "emitida"):
+            anterior = controle.detalhes(shas[c])
+            resultados.append({"arquivo": c, "numero_gta": anterior.get("numero_gta"),
+                               "fazenda": anterior.get("fazenda"), "status": "ja_emitida",
+                               "protocolo": anterior.get("protocolo")})
+        else:
+            pendentes.append(c)
+    if resultados:
+        logging.info(f"⏭️ {len(resultados)} GTA(s) já emitida(s) em execução anterior: puladas")
+    cache = abrir_cache()
+    try:
+        for res in extrair_em_paralelo(pendentes, cache=cache, shas=shas):
+            if res["erro"]:
+                resultados.append({"arquivo": res["caminho"], "status": "erro",
+                                   "erro": f"Falha na leitura do PDF: {res['erro']}"})
+                continue
+            sha = shas[res["caminho"]]
+            anterior = controle.detalhes(sha)
+            if controle.concluida(sha, "relatorio") and anterior.get("status") == "ok" \
+                    and anterior.get("inscricao_estadual"):
+                item = anterior
+            else:
+                controle.registrar(sha, res["dados"].get("numero_gta"), "lida", res["caminho"])
+                try:
+                    item = processar_gta(res["caminho"], res["dados"], indice, classes, cred,
+                                         args.classe, args.operacao, mapa, args.limiar)
+                except Exception as e:
+                    item = {"status": "erro", "erro": f"{type(e).__name__}: {e}"}
+                if item.get("relatorio"):
+                    controle.registrar(sha, item.get("numero_gta"), "relatorio", res["caminho"], item)
+            if item["status"] != "ok":
+                resultados.append({"arquivo": res["caminho"], "numero_gta": item.get("numero_gta"),
+                                   "fazenda": item.get("fazenda"), "status": item["status"],
+                                   "erro": item.get("erro")})
+                continue
+            tarefas.append({"arquivo": res["caminho"], "dados": res["dados"], "sha256": sha,
+                            "operacao": item["operacao"],
+                            "inscricao_estadual": item["inscricao_estadual"],
+                            "df_prod": produtos_relatorio(res["dados"], item["classe"], indice)})
+    finally:
+        cache.fechar()
+
+    fazendas = len({t["inscricao_estadual"] for t in tarefas})
+    logging.info(f"▶️ Emissão de {len(tarefas)} GTA(s) de {fazendas} fazenda(s), "
+                 f"{args.paralelo} navegador(es)")
+    try:
+        with EmissaoParalela(cred, args.paralelo, not args.visivel, args.emitir,
+                             args.url, args.intervalo, controle=controle) as emissao:
+            resultados += emissao.executar(tarefas)
+    finally:
+        controle.fechar()
+
+    caminho = salvar_resultados(resultados)
+    resumo = {}
+    for r in resultados:
+        resumo[r["status"]] = resumo.get(r["status"], 0) + 1
+    logging.info(f"🏁 Emissão concluída: {resumo} — resultados em {caminho}")
+    return 0 if set(resumo) <= {"emitida", "preenchida", "ja_emitida"} else 2
+
+if __name__ == "__main__":
+    raise SystemExit(main())
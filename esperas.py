@@ -0,0 +1,115 @@
+# esperas.py
+#
+# Esperas por condição (em vez de time.sleep fixo) para o Selenium
+# e cronometragem das etapas do fluxo no log da execução.
+#
+#   crono = Cronometro("login")
+#   with crono.etapa("ie"):
+#       preencher_campo(driver, campo, ie, so_digitos)
+#   crono.registrar()   # ⏱️ login: pagina=0.81s ie=0.05s ... total=2.10s
+
+import re
+import time
+import logging
+from contextlib import contextmanager
+
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+
+# tempo para o valor digitado aparecer no campo antes de tentar outra estratégia
+TIMEOUT_CAMPO = 1.0
+INTERVALO     = 0.05
+
+def so_digitos(valor: str) -> str:
+    return re.sub(r"\D+", "", valor or "")
+
+class valor_do_campo:
+    """
+    Condição: o `value` do elemento, após `normalizar`, é igual a `esperado`.
+    """
+    def __init__(self, elemento, esperado: str, normalizar=None):
+        self.elemento   = elemento
+        self.esperado   = esperado
+        self.normalizar = normalizar or (lambda v: v or "")
+
+    def __call__(self, driver):
+        try:
+            return self.normalizar(self.elemento.get_attribute("value")) == self.esperado
+        except StaleElementReferenceException:
+            return False
+
+class foco_saiu_de:
+    """
+    Condição: o elemento deixou de ser o document.activeElement.
+    """
+    def __init__(self, elemento):
+        self.elemento = elemento
+
+    def __call__(self, driver):
+        return driver.execute_script("return document.activeElement !== arguments[0];",
+                                     self.elemento)
+
+def esperar(driver, condicao, timeout: float = TIMEOUT_CAMPO) -> bool:
+    """
+    True se a condição for atendida dentro de `timeout`, False caso contrário.
+    """
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=INTERVALO).until(condicao)
+        return True
+    except TimeoutException:
+        return False
+
+def preencher_campo(driver, elemento, valor: str, normalizar=None,
+                    timeout: float = TIMEOUT_CAMPO) -> str:
+    """
+    Digita `valor` no campo e espera ele aparecer (comparando com `normalizar`).
+    Se a máscara do site atrapalhar, tenta Ctrl+A/Delete e, por fim, define o
+    valor via JavaScript. Levanta RuntimeError se nenhuma estratégia funcionar.
+    Retorna o nome da estratégia que funcionou.
+    """
+    normalizar = normalizar or (lambda v: v or "")
+    cond = valor_do_campo(elemento, normalizar(valor), normalizar)
+    driver.execute_script("arguments[0].scrollIntoView(true);", elemento)
+
+    elemento.clear(); elemento.send_keys(valor)
+    if esperar(driver, cond, timeout):
+        return "digitado"
+    elemento.send_keys(Keys.CONTROL, "a", Keys.DELETE, valor)
+    if esperar(driver, cond, timeout):
+        return "redigitado"
+    driver.execute_script(
+        "arguments[0].value=arguments[1];arguments[0].dispatchEvent(new Event('input'));",
+        elemento, valor
+    )
+    if esperar(driver, cond, timeout):
+        return "javascript"
+    atual = elemento.get_attribute("value")
+    raise RuntimeError(f"Campo esperava '{valor}', mas site mostrou '{atual}'")
+
+class Cronometro:
+    def __init__(self, fluxo: str):
+        self.fluxo  = fluxo
+        self.etapas = []  # (nome, segundos)
+        self._inicio = time.perf_counter()
+
+    @contextmanager
+    def etapa(self, nome: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas.append((nome, time.perf_counter() - t0))
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self._inicio
+
+    def registrar(self, nivel: int = logging.INFO) -> str:
+        """
+        Escreve no log uma linha com o tempo de cada etapa e o total.
+        """
+        partes = " ".join(f"{nome}={seg:.2f}s" for nome, seg in self.etapas)
+        linha = f"⏱️ {self.fluxo}: {partes} total={self.total:.2f}s"
+        logging.log(nivel, linha)
+        return linha
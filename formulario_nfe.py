@@ -0,0 +1,261 @@
+# formulario_nfe.py
+#
+# Preenchimento da emissão de NF-e Avulsa depois do login: natureza da
+# operação, destinatário e uma linha por produto do relatório (df_prod de
+# report.produtos_relatorio), conferindo os totais calculados pela página
+# antes de emitir.
+#
+# Cada linha de produto é escrita com um único execute_script (inclui a
+# linha, preenche os campos e dispara input/change), em vez de um
+# send_keys por campo; o script devolve o que ficou no DOM para conferência.
+#
+#   driver, ok = perform_login_with_selenium(cred, fazenda, op)
+#   resumo = preencher_nfe(driver, dados, df_prod, op)              # só preenche
+#   resumo = preencher_nfe(driver, dados, df_prod, op, emitir=True)  # e emite
+#
+# Os seletores ficam em SELETORES; NFE_SELETORES=arquivo.json sobrescreve
+# só as chaves informadas. Os de SELETORES são os de
+# benchmarks/sefaz_local/nfe_avulsa.html, uma cópia local do formulário, e
+# não os ids do portal real: para ele é preciso um NFE_SELETORES. Por isso
+# main.py só preenche a nota com --preencher ou --emitir.
+
+import os
+import json
+import logging
+from decimal import Decimal
+
+from esperas import Cronometro, esperar
+from pauta_index import normalize_desc, parse_preco
+from instrumentacao import instrumentar
+
+TIMEOUT      = 20
+TIMEOUT_ITEM = 10
+
+SELETORES = {
+    "operacao":       "#vNATOP",
+    "destinatario": {
+        "cpf":             "#vDESTCPFCNPJ",
+        "nome":            "#vDESTNOME",
+        "estabelecimento": "#vDESTESTAB",
+        "municipio":       "#vDESTMUN",
+    },
+    "adicionar_item": "#BTNADDITEM",
+    "linhas":         "#TBITENS > tbody > tr",
+    "item": {
+        "descricao":      "[name=vPRODDESC]",
+        "quantidade":     "[name=vPRODQTD]",
+        "valor_unitario": "[name=vPRODVUNIT]",
+        "valor_total":    "[name=vPRODVTOT]",
+    },
+    "total_quantidade": "#vTOTQTD",
+    "total_nota":       "#vTOTNF",
+    "emitir":           "#BTNEMITIR",
+    "protocolo":        "#vPROTOCOLO",
+}
+
+# escolhe a opção cujo texto (sem acentos/maiúsculas) é a operação pedida
+_JS_OPERACAO = """
+var sel = document.querySelector(arguments[0]);
+function norm(t) {
+  return t.normalize("NFD").replace(/[\\u0300-\\u036f]/g, "").toUpperCase().replace(/\\s+/g, " ").trim();
+}
+for (var k = 0; k < sel.options.length; k++) {
+  if (norm(sel.options[k].text) === norm(arguments[1])) {
+    sel.selectedIndex = k;
+    sel.dispatchEvent(new Event("change", {bubbles: true}));
+    return sel.options[k].text;
+  }
+}
+return null;
+"""
+
+# define campo a campo e devolve o que ficou em cada um (null: sem o campo)
+_JS_PREENCHER = """
+function preencher(seletores, valores, raiz) {
+  var lidos = {}, campo, el;
+  for (campo in valores) {
+    el = raiz.querySelector(seletores[campo]);
+    if (!el) continue;
+    el.value = valores[campo];
+    el.dispatchEvent(new Event("input", {bubbles: true}));
+    el.dispatchEvent(new Event("change", {bubbles: true}));
+  }
+  for (campo in seletores) {
+    el = raiz.querySelector(seletores[campo]);
+    lidos[campo] = el ? el.value : null;
+  }
+  return lidos;
+}
+"""
+
+_JS_CAMPOS = _JS_PREENCHER + "return preencher(arguments[0], arguments[1], document);"
+
+# garante a linha `i` (clicando em incluir se preciso) e a preenche;
+# null se a linha ainda não apareceu (inclusão assíncrona)
+_JS_ITEM = _JS_PREENCHER + """
+var s = arguments[0], i = arguments[1];
+var linhas = document.querySelectorAll(s.linhas);
+if (linhas.length <= i) {
+  document.querySelector(s.adicionar_item).click();
+  linhas = document.querySelectorAll(s.linhas);
+  if (linhas.length <= i) return null;
+}
+return preencher(s.item, arguments[2], linhas[i]);
+"""
+
+_JS_TOTAIS = """
+var s = arguments[0];
+function ler(sel) {
+  var el = document.querySelector(sel);
+  if (!el) return null;
+  return el.tagName === "INPUT" ? el.value : el.textContent;
+}
+return {linhas: document.querySelectorAll(s.linhas).length,
+        quantidade: ler(s.total_quantidade), total: ler(s.total_nota)};
+"""
+
+class TotaisDivergentes(ValueError):
+    def __init__(self, esperado: dict, encontrado: dict):
+        self.esperado = esperado
+        self.encontrado = encontrado
+        super().__init__(f"Totais da nota não conferem: esperado {esperado}, página mostra {encontrado}")
+
+def carregar_seletores(caminho: str = None) -> dict:
+    """
+    SELETORES com as chaves do JSON em `caminho` (ou NFE_SELETORES) por cima.
+    """
+    seletores = {k: dict(v) if isinstance(v, dict) else v for k, v in SELETORES.items()}
+    caminho = caminho or os.environ.get("NFE_SELETORES")
+    if caminho:
+        with open(caminho, encoding="utf-8") as f:
+            for chave, valor in json.load(f).items():
+                if isinstance(valor, dict) and isinstance(seletores.get(chave), dict):
+                    seletores[chave].update(valor)
+                else:
+                    seletores[chave] = valor
+    return seletores
+
+def _moeda(valor: Decimal) -> str:
+    return f"{valor:.2f}".replace(".", ",")
+
+def itens_nfe(df_prod) -> list[dict]:
+    """
+    Linhas da nota a partir dos produtos do relatório: descrição como na
+    pauta, quantidade e valor unitário já formatados para o formulário e o
+    total esperado (Decimal). Levanta ValueError se algum produto estiver
+    sem preço de pauta.
+    """
+    itens = []
+    for especie, sexo, faixa, qtd, preco in zip(
+        df_prod["Espécie"], df_prod["Sexo"], df_prod["Faixa"],
+        df_prod["Quantidade"], df_prod["Preço Pauta Fiscal"]
+    ):
+        descricao = normalize_desc(f"{especie} {sexo} {faixa}")
+        if preco is None:
+            raise ValueError(f"Produto sem preço na pauta: {descricao}")
+        qtd = int(qtd)
+        itens.append({
+            "campos": {"descricao": descricao, "quantidade": str(qtd),
+                       "valor_unitario": _moeda(preco)},
+            "total": (preco * qtd).quantize(Decimal("0.01")),
+        })
+    return itens
+
+def _conferir_linha(i: int, item: dict, lidos: dict):
+    erros = [campo for campo, valor in item["campos"].items()
+             if lidos.get(campo) is None or
+             (parse_preco(lidos[campo]) != parse_preco(valor) if campo != "descricao"
+              else lidos[campo].strip() != valor)]
+    total = lidos.get("valor_total")
+    if total and parse_preco(total) != item["total"]:
+        erros.append("valor_total")
+    if erros:
+        raise RuntimeError(f"Linha {i + 1} do formulário não ficou como esperado "
+                           f"({', '.join(erros)}): {lidos}")
+
+def _preencher_item(driver, seletores: dict, i: int, item: dict, timeout: float) -> dict:
+    lidos = driver.execute_script(_JS_ITEM, seletores, i, item["campos"])
+    if lidos is None:
+        contar = "return document.querySelectorAll(arguments[0]).length"
+        if not esperar(driver, lambda d: d.execute_script(contar, seletores["linhas"]) > i, timeout):
+            raise RuntimeError(f"Linha {i + 1} não apareceu no formulário após incluir o item")
+        lidos = driver.execute_script(_JS_ITEM, seletores, i, item["campos"])
+    return lidos
+
+def conferir_totais(driver, seletores: dict, itens: list[dict], timeout: float = TIMEOUT_ITEM) -> dict:
+    """
+    Espera a página mostrar os totais esperados (linhas, quantidade e valor
+    da nota). Levanta TotaisDivergentes se não chegar a eles em `timeout`.
+    """
+    esperado = {"linhas": len(itens),
+                "quantidade": sum(int(it["campos"]["quantidade"]) for it in itens),
+                "total": sum((it["total"] for it in itens), Decimal(0))}
+    lido = {}
+
+    def confere(d):
+        lido.update(d.execute_script(_JS_TOTAIS, seletores))
+        return (lido["linhas"] == esperado["linhas"]
+                and (lido["quantidade"] is None or parse_preco(lido["quantidade"]) == esperado["quantidade"])
+                and parse_preco(lido["total"]) == esperado["total"])
+
+    if not esperar(driver, confere, timeout):
+        raise TotaisDivergentes(esperado, lido)
+    return esperado
+
+@instrumentar("formulario", tamanho=lambda driver, dados, df_prod, *a, **k: len(df_prod))
+def preencher_nfe(driver, dados: dict, df_prod, operacao: str, emitir: bool = False,
+                  seletores: dict = None, timeout: float = TIMEOUT) -> dict:
+    """
+    Preenche a NF-e Avulsa já aberta no `driver`. Com `emitir`, clica em
+    emitir depois de conferir os totais e espera o protocolo.
+    Retorna {"itens", "quantidade", "total", "protocolo"}.
+    Levanta ValueError (produto sem preço), TotaisDivergentes ou
+    RuntimeError (campo que não aceitou o valor); nada é emitido nesses casos.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    seletores = seletores or carregar_seletores()
+    itens = itens_nfe(df_prod)
+    wait  = WebDriverWait(driver, timeout)
+    crono = Cronometro(f"nfe {dados.get('numero_gta', '')}")
+
+    with crono.etapa("operacao"):
+        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, seletores["operacao"])))
+        if driver.execute_script(_JS_OPERACAO, seletores["operacao"], operacao) is None:
+            raise ValueError(f"Operação '{operacao}' não existe no formulário.")
+
+    with crono.etapa("destinatario"):
+        valores = {
+            "cpf":             dados.get("cpf_destino") or "",
+            "nome":            dados.get("nome_destino") or "",
+            "estabelecimento": dados.get("estabelecimento_destino") or "",
+            "municipio":       dados.get("municipio_destino") or "",
+        }
+        lidos = driver.execute_script(_JS_CAMPOS, seletores["destinatario"], valores)
+        ausentes = [c for c in valores if lidos.get(c) is None]
+        if ausentes:
+            logging.warning(f"⚠️ Campos do destinatário não encontrados: {', '.join(ausentes)}")
+        errados = [c for c, v in valores.items() if lidos.get(c) is not None and lidos[c] != v]
+        if errados:
+            raise RuntimeError(f"Destinatário não ficou como esperado ({', '.join(errados)}): {lidos}")
+
+    with crono.etapa("itens"):
+        for i, item in enumerate(itens):
+            _conferir_linha(i, item, _preencher_item(driver, seletores, i, item, TIMEOUT_ITEM))
+
+    with crono.etapa("totais"):
+        esperado = conferir_totais(driver, seletores, itens)
+
+    protocolo = None
+    if emitir:
+        with crono.etapa("emitir"):
+            driver.find_element(By.CSS_SELECTOR, seletores["emitir"]).click()
+            protocolo = wait.until(lambda d: d.find_element(By.CSS_SELECTOR, seletores["protocolo"]).text
+                                   or False)
+    crono.registrar()
+    logging.info(f"🧾 NF-e preenchida: {esperado['linhas']} item(ns), {esperado['quantidade']} cabeça(s), "
+                 f"R$ {_moeda(esperado['total'])}" + (f" — protocolo {protocolo}" if protocolo else ""))
+    return {"itens": esperado["linhas"], "quantidade": esperado["quantidade"],
+            "total": esperado["total"], "protocolo": protocolo}
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# instrumentacao.py
+#
+# Trace estruturado das etapas de cada execução: um evento JSON por linha
+# em logs/trace_<prefixo>_<timestamp>.jsonl, com etapa, duração, tamanho
+# da entrada e resultado.
+#
+#   iniciar_trace("run")                      # uma vez, no início do programa
+#
+#   @instrumentar("relatorio", tamanho=lambda dados, *a, **k: len(dados["categorias"]))
+#   def generate_report(dados, ...): ...
+#
+#   with etapa("pauta") as ev:
+#       df = carregar()
+#       ev["saida"] = len(df)
+#
+# Sem iniciar_trace() os eventos não são gravados (a medição continua
+# barata). Para agregar os traces (p50/p95 por etapa):
+#   python instrumentacao.py                  # logs/trace_*.jsonl
+#   python instrumentacao.py logs/trace_lote_*.jsonl --etapa gta
+
+import os
+import sys
+import json
+import time
+import glob
+import logging
+import argparse
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from datetime import datetime
+
+_trava   = threading.Lock()
+_arquivo = None   # caminho do trace da execução atual
+_execucao = None  # identificador da execução, repetido em cada evento
+
+def iniciar_trace(prefixo: str = "run", pasta: str = "logs") -> str:
+    """
+    Passa a gravar os eventos desta execução em `pasta/trace_<prefixo>_<ts>.jsonl`.
+    Retorna o caminho do arquivo.
+    """
+    global _arquivo, _execucao
+    os.makedirs(pasta, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    _execucao = f"{prefixo}_{ts}_{os.getpid()}"
+    _arquivo = os.path.join(pasta, f"trace_{prefixo}_{ts}.jsonl")
+    return _arquivo
+
+def _gravar(evento: dict):
+    if _arquivo is None:
+        return
+    linha = json.dumps(evento, ensure_ascii=False, default=str) + "\n"
+    with _trava:
+        try:
+            with open(_arquivo, "a", encoding="utf-8") as f:
+                f.write(linha)
+        except OSError as e:
+            logging.warning(f"⚠️ Trace não gravado: {e}")
+
+@contextmanager
+def etapa(nome: str, tamanho=None):
+    """
+    Mede o bloco e grava um evento ao sair. O dicionário devolvido aceita
+    campos extras (ex.: ev["saida"] = 120); ev["resultado"] = "falha"
+    marca um fim sem exceção que ainda assim não deu certo.
+    """
+    evento = {"etapa": nome, "tamanho": tamanho, "resultado": "ok"}
+    inicio = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield evento
+    except BaseException as e:
+        evento["resultado"] = "erro"
+        evento["erro"] = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        evento["duracao_s"] = round(time.perf_counter() - t0, 6)
+        _gravar({"execucao": _execucao, "inicio": round(inicio, 3),
+                 "thread": threading.current_thread().name, **evento})
+
+def registrar_evento(nome: str, duracao_s: float, tamanho=None, resultado: str = "ok", **campos):
+    """
+    Grava um evento medido em outro lugar — ex.: num processo filho, que
+    não escreve no trace; o pai registra quando recebe o resultado.
+    """
+    _gravar({"execucao": _execucao, "inicio": round(time.time() - duracao_s, 3),
+             "thread": threading.current_thread().name, "etapa": nome, "tamanho": tamanho,
+             "resultado": resultado, **campos, "duracao_s": round(duracao_s, 6)})
+
+def instrumentar(nome: str, tamanho=None, saida=None, sucesso=None):
+    """
+    Decorador: cada chamada vira um evento `nome`. Os argumentos opcionais
+    são funções:
+      tamanho(*args, **kwargs) – tamanho da entrada (bytes, itens...);
+      saida(retorno)           – tamanho do que foi produzido;
+      sucesso(retorno)         – False registra o evento como "falha".
+    Erros dessas funções não afetam a chamada instrumentada.
+    """
+    def decorador(funcao):
+        @wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with etapa(nome, _medir(tamanho, *args, **kwargs)) as ev:
+                retorno = funcao(*args, **kwargs)
+                if saida is not None:
+                    ev["saida"] = _medir(saida, retorno)
+                if sucesso is not None and _medir(sucesso, retorno) is False:
+                    ev["resultado"] = "falha"
+                return retorno
+        return envolvida
+    return decorador
+
+def _medir(funcao, *args, **kwargs):
+    if funcao is None:
+        return None
+    try:
+        return funcao(*args, **kwargs)
+    except Exception:
+        return None
+
+def tamanho_arquivo(caminho) -> int:
+    """
+    Bytes do arquivo, ou None se `caminho` não existir.
+    """
+    try:
+        return os.path.getsize(caminho)
+    except (OSError, TypeError):
+        return None
+
+# --- agregação (CLI) --------------------------------------------------------
+
+def ler_eventos(caminhos):
+    for caminho in caminhos:
+        with open(caminho, encoding="utf-8") as f:
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
+
+def percentil(valores: list, p: float) -> float:
+    """
+    Percentil `p` (0–100) com interpolação linear; `valores` já ordenados.
+    """
+    if not valores:
+        return float("nan")
+    pos = (len(valores) - 1) * p / 100
+    i = int(pos)
+    if i + 1 >= len(valores):
+        return valores[-1]
+    return valores[i] + (valores[i + 1] - valores[i]) * (pos - i)
+
+def agregar(eventos) -> dict:
+    """
+    Por etapa: n, falhas/erros, p50, p95 e máximo da duração (s) e tamanho
+    médio da entrada.
+    """
+    por_etapa = {}
+    for ev in eventos:
+        por_etapa.setdefault(ev["etapa"], []).append(ev)
+    resumo = {}
+    for nome, evs in por_etapa.items():
+        duracoes = sorted(ev["duracao_s"] for ev in evs)
+        tamanhos = [ev["tamanho"] for ev in evs if isinstance(ev.get("tamanho"), (int, float))]
+        resumo[nome] = {
+            "n":       len(evs),
+            "falhas":  sum(ev["resultado"] == "falha" for ev in evs),
+            "erros":   sum(ev["resultado"] == "erro" for ev in evs),
+            "p50":     percentil(duracoes, 50),
+            "p95":     percentil(duracoes, 95),
+            "max":     duracoes[-1],
+            "tamanho": sum(tamanhos) / len(tamanhos) if tamanhos else None,
+        }
+    return resumo
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resume os traces de execução (p50/p95 por etapa).")
+    parser.add_argument("traces", nargs="*", help="arquivos ou padrões glob (padrão: logs/trace_*.jsonl)")
+    parser.add_argument("--etapa", action="append", help="só estas etapas (pode repetir)")
+    parser.add_argument("--json", action="store_true", help="imprime o resumo em JSON")
+    args = parser.parse_args(argv)
+
+    caminhos = sorted({c for padrao in (args.traces or [os.path.join("logs", "trace_*.jsonl")])
+                       for c in glob.glob(padrao)})
+    if not caminhos:
+        print("❌ Nenhum trace encontrado.")
+        return 1
+    eventos = (ev for ev in ler_eventos(caminhos) if not args.etapa or ev["etapa"] in args.etapa)
+    resumo = agregar(eventos)
+
+    if args.json:
+        json.dump(resumo, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+    execucoes = {ev.get("execucao") for ev in ler_eventos(caminhos)}
+    print(f"⏱️ {len(caminhos)} trace(s), {len(execucoes)} execução(ões)\n")
+    print(f"{'etapa':14s} {'n':>6s} {'falha':>6s} {'erro':>6s} {'p50 (s)':>9s} {'p95 (s)':>9s} {'máx (s)':>9s} {'tamanho':>12s}")
+    for nome, r in sorted(resumo.items(), key=lambda kv: -kv[1]["p95"]):
+        tam = f"{r['tamanho']:12,.0f}" if r["tamanho"] is not None else f"{'-':>12s}"
+        print(f"{nome:14s} {r['n']:6d} {r['falhas']:6d} {r['erros']:6d} "
+              f"{r['p50']:9.3f} {r['p95']:9.3f} {r['max']:9.3f} {tam}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
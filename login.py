@@ -1,51 +1,56 @@
-import re
-import time
-import pandas as pd
-import tkinter as tk
-
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
+import logging
 
 from utils import normalize_text
+from instrumentacao import instrumentar, tamanho_arquivo
+
+# Selenium, Tk e a planilha de credenciais (pandas) são importados dentro das
+# funções que os usam: escolher a operação não precisa carregar o navegador.
 
 URL_SEFAZ = "https://nfewebprodutor.sefaz.to.gov.br/nfeacontribuinte/servlet/logincontribuinte"
 TIMEOUT   = 20
 
-def get_credentials(farm_name: str, excel_path: str) -> tuple[str,str]:
-    df = pd.read_excel(excel_path, sheet_name="Planilha1", engine="openpyxl")
-    raw  = normalize_text(farm_name).replace("FAZENDA", "").strip()
-    clean = re.sub(r"[^\w\s]", "", raw).upper()
-    simple_key = clean.replace(" ", "")
-
-    df["FARM_NORM"]   = df["FAZENDA"].astype(str).apply(normalize_text)\
-                        .str.replace(r"[^\w\s]", "", regex=True).str.upper()
-    df["FARM_SIMPLE"] = df["FARM_NORM"].str.replace(r"\s+", "", regex=True)
-
-    match = df[df["FARM_SIMPLE"].str.contains(simple_key, na=False)]
-    if match.empty:
-        match = df[df["FARM_NORM"].str.contains(clean, na=False)]
-    if match.empty:
-        raise ValueError(f"Fazenda '{farm_name}' não encontrada.")
-    row = match.iloc[0]
-
-    ie_raw = str(row["INSCRICAO ESTADUAL"])
-    ie = re.sub(r"[.\-/]", "", ie_raw)
-    pwd = str(row["SENHA SEFAZ"])
-    return ie, pwd
+OPERACOES = [
+    "REMESSA INTERNA DE TRANSFERÊNCIA DE BOVINO",
+    "VENDA INTERNA DE BOVINO PARA ABATE",
+    "VENDA INTERNA DE BOVINO PARA RECRIA, MONTARIA, TRAÇÃO E ENGORDA"
+]
+
+@instrumentar("credenciais", tamanho=lambda farm_name, excel_path, *a, **k: tamanho_arquivo(excel_path))
+def get_credentials(farm_name: str, excel_path: str, limiar: float = None) -> tuple[str,str]:
+    """
+    (IE, senha) da fazenda pelo índice da planilha de credenciais, aceitando
+    nomes parecidos com score >= `limiar` (padrão credenciais.LIMIAR).
+    Levanta ValueError se não achar e CredencialAmbigua se houver mais de
+    uma fazenda (com inscrições diferentes) para o mesmo nome.
+    """
+    from credenciais import indice_credenciais
+    return indice_credenciais(excel_path).buscar(farm_name, limiar)
+
+def operacao_automatica(dados: dict):
+    """
+    Mesmo CPF/CNPJ na procedência e no destino → transferência interna.
+    Nos demais casos retorna None (a operação precisa ser escolhida).
+    """
+    cpf_p = dados.get('cpf_procedencia','')
+    cpf_d = dados.get('cpf_destino','')
+    if cpf_p and cpf_p == cpf_d:
+        return OPERACOES[0]
+    return None
+
+def resolver_operacao(texto: str) -> str:
+    """
+    Aceita o nome completo da operação ou um trecho dele
+    ("abate", "recria", "transferencia") e retorna o nome oficial.
+    """
+    chave = normalize_text(texto)
+    achadas = [op for op in OPERACOES if chave and chave in normalize_text(op)]
+    if len(achadas) != 1:
+        raise ValueError(f"Operação '{texto}' não reconhecida.")
+    return achadas[0]
 
 def escolher_operacao_gui():
-    ops = [
-        "REMESSA INTERNA DE TRANSFERÊNCIA DE BOVINO",
-        "VENDA INTERNA DE BOVINO PARA ABATE",
-        "VENDA INTERNA DE BOVINO PARA RECRIA, MONTARIA, TRAÇÃO E ENGORDA"
-    ]
+    import tkinter as tk
+    ops = OPERACOES
     root = tk.Tk()
     root.title("Selecione a Operação")
     root.geometry("450x160")
@@ -58,61 +63,123 @@ def escolher_operacao_gui():
     root.destroy()
     return escolha
 
-def perform_login_with_selenium(excel_path: str, farm_name: str, operacao: str):
+def abrir_navegador():
+    """
+    Chrome visível que continua aberto depois que o script termina.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from selenium.webdriver.chrome.options import Options
+    from driver_pool import caminho_chromedriver
+
     chrome_options = Options()
     chrome_options.add_experimental_option("detach", True)
-    service = ChromeService(ChromeDriverManager().install())
-    driver  = webdriver.Chrome(service=service, options=chrome_options)
-    wait    = WebDriverWait(driver, TIMEOUT)
-
-    try:
-        driver.get(URL_SEFAZ)
-        ie, pwd = get_credentials(farm_name, excel_path)
-
-        # Preenche IE
-        ie_field = wait.until(EC.element_to_be_clickable((By.ID, "vCONINSEST")))
-        driver.execute_script("arguments[0].scrollIntoView(true);", ie_field)
-        ie_field.clear(); ie_field.send_keys(ie)
-        time.sleep(0.2)
-        if re.sub(r"\D+", "", ie_field.get_attribute("value")) != ie:
-            ie_field.send_keys(Keys.CONTROL, "a", Keys.DELETE, ie)
-            time.sleep(0.2)
-        if re.sub(r"\D+", "", ie_field.get_attribute("value")) != ie:
-            driver.execute_script(
-                "arguments[0].value=arguments[1];arguments[0].dispatchEvent(new Event('input'));",
-                ie_field, ie
-            )
-            time.sleep(0.1)
-        atual = ie_field.get_attribute("value")
-        if re.sub(r"\D+", "", atual) != ie:
-            raise RuntimeError(f"IE esperado '{ie}', mas site mostrou '{atual}'")
-
-        # Preenche senha
+    service = ChromeService(caminho_chromedriver())
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+SELETOR_MENU_NFE   = "#Smoothnavmenu1 > ul > li:nth-child(2) > a"
+SELETOR_NFE_AVULSA = "#TBNFE > tbody > tr:nth-child(6) > td:nth-child(2) > input:nth-child(2)"
+
+def autenticar(driver, ie: str, pwd: str, url: str = URL_SEFAZ, crono=None):
+    """
+    Abre a página de login, preenche IE e senha e espera o portal sair dela.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from esperas import Cronometro, preencher_campo, esperar, foco_saiu_de, so_digitos
+    from resiliencia import abrir_pagina
+
+    wait  = WebDriverWait(driver, TIMEOUT)
+    crono = crono or Cronometro("login")
+
+    # a página de login é o único passo repetido: o resto depende do estado do formulário
+    with crono.etapa("pagina"):
+        ie_field = abrir_pagina(driver, url, EC.element_to_be_clickable((By.ID, "vCONINSEST")),
+                                "página de login", TIMEOUT)
+
+    # Preenche IE
+    with crono.etapa("ie"):
+        preencher_campo(driver, ie_field, ie, so_digitos)
+
+    # Preenche senha
+    with crono.etapa("senha"):
         pwd_field = wait.until(EC.element_to_be_clickable((By.ID, "vSENHA")))
-        driver.execute_script("arguments[0].scrollIntoView(true);", pwd_field)
-        pwd_field.clear(); pwd_field.send_keys(pwd)
-
-        # Submete
-        pwd_field.send_keys(Keys.TAB); time.sleep(0.2); pwd_field.send_keys(Keys.ENTER)
-        wait.until(EC.url_changes(URL_SEFAZ))
-
-        # NF-E Avulsa
-        menu = wait.until(EC.element_to_be_clickable(
-            (By.CSS_SELECTOR, "#Smoothnavmenu1 > ul > li:nth-child(2) > a")
-        ))
+        preencher_campo(driver, pwd_field, pwd)
+
+    # Submete
+    with crono.etapa("submit"):
+        pwd_field.send_keys(Keys.TAB)
+        esperar(driver, foco_saiu_de(pwd_field))
+        pwd_field.send_keys(Keys.ENTER)
+        wait.until(EC.url_changes(url))
+
+def abrir_nfe_avulsa(driver, crono=None):
+    """
+    Do menu pós-login até a emissão de NF-e Avulsa.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from esperas import Cronometro
+
+    wait  = WebDriverWait(driver, TIMEOUT)
+    crono = crono or Cronometro("menu")
+
+    # NF-E Avulsa
+    with crono.etapa("menu"):
+        menu = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, SELETOR_MENU_NFE)))
         driver.execute_script("arguments[0].scrollIntoView(true);", menu)
         menu.click()
-        
-         # Emitir NF-e Avulsa
-        nfe_avulsa_btn = wait.until(EC.element_to_be_clickable(
-            (By.CSS_SELECTOR, "#TBNFE > tbody > tr:nth-child(6) > td:nth-child(2) > input:nth-child(2)")
-        ))
+
+    # Emitir NF-e Avulsa
+    with crono.etapa("nfe_avulsa"):
+        nfe_avulsa_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, SELETOR_NFE_AVULSA)))
         driver.execute_script("arguments[0].scrollIntoView(true);", nfe_avulsa_btn)
         nfe_avulsa_btn.click()
 
-    except Exception:
-        import traceback; traceback.print_exc()
-        print("❌ Erro no fluxo de login/menu. Navegador permanece aberto.")
+def na_pagina_de_login(driver, url: str = URL_SEFAZ) -> bool:
+    """
+    True se o navegador está na página de login (sessão expirada manda de
+    volta para o servlet logincontribuinte).
+    """
+    from selenium.webdriver.common.by import By
+    atual = (driver.current_url or "").split("?")[0].lower()
+    if atual == url.split("?")[0].lower() or "logincontribuinte" in atual:
+        return True
+    return bool(driver.find_elements(By.ID, "vCONINSEST"))
+
+@instrumentar("login", sucesso=lambda retorno: retorno[1])
+def perform_login_with_selenium(excel_path: str, farm_name: str, operacao: str,
+                                driver=None, url: str = URL_SEFAZ):
+    """
+    Faz login no portal e abre a emissão de NF-e Avulsa.
+    Sem `driver`, abre um Chrome visível que fica aberto ao final; com ele
+    (ex.: uma sessão do driver_pool) usa o navegador recebido.
+    `url` permite apontar para uma cópia local das páginas da SEFAZ.
+    Falhas (inclusive SEFAZ fora do ar, veja resiliencia) são registradas
+    no log com a categoria e retornam (driver, False).
+    Para reaproveitar o login entre GTAs da mesma fazenda, veja sessoes_sefaz.
+    """
+    from esperas import Cronometro
+    from resiliencia import categoria, DESCONHECIDO
+
+    if driver is None:
+        driver = abrir_navegador()
+    crono = Cronometro(f"login {farm_name}")
+
+    try:
+        ie, pwd = get_credentials(farm_name, excel_path)
+        autenticar(driver, ie, pwd, url, crono)
+        abrir_nfe_avulsa(driver, crono)
+
+    except Exception as e:
+        cat = categoria(e)
+        logging.error(f"❌ Erro no fluxo de login/menu ({cat}): {type(e).__name__}: {e}. "
+                      "Navegador permanece aberto.", exc_info=cat == DESCONHECIDO)
+        crono.registrar(logging.WARNING)
         return driver, False
 
+    crono.registrar()
     return driver, True
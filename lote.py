@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# lote.py
+#
+# Modo lote (sem janelas): processa uma pasta ou glob de PDFs de GTA,
+# gera um relatório por GTA e um manifesto com o resumo da execução.
+#
+# Uso:
+#   python lote.py "GTAs/"                    --classe Comum --operacao abate
+#   python lote.py "GTAs/*414733*.pdf"        --mapa mapa.json
+#
+# O mapa (JSON ou CSV) define classe/operação por arquivo:
+#   {"GTA 414733.pdf": {"classe": "Comum", "operacao": "recria"}}
+#   arquivo;classe;operacao
+#
+# Com --consolidado, em vez de um .xlsx e dois .json por GTA, grava um único
+# workbook por lote (uma aba por GTA + "Resumo") e acrescenta os registros
+# em JSON/gtas.jsonl (ou .jsonl.gz com --gzip), indexado por numero_gta.
+#
+# Cada GTA processada fica registrada em JSON/controle_gtas.sqlite
+# (controle_gtas): rodar o mesmo lote de novo pula os PDFs que já têm
+# relatório e retoma os demais. --refazer processa tudo outra vez. Com
+# --consolidado o lote é sempre refeito inteiro, para o workbook sair completo.
+#
+# Código de saída: 0 tudo ok; 2 alguma GTA com erro; 3 nenhuma com erro, mas
+# alguma incompleta (ex.: sem_credencial).
+
+import os
+import csv
+import glob
+import json
+import logging
+import argparse
+from datetime import datetime
+
+from pegar_dados_GTA import extrair_em_paralelo, salvar_dados_json, abrir_cache
+from pauta           import download_and_load_pauta
+from report          import generate_report, produtos_relatorio
+from consolidado     import RelatorioConsolidado, ArquivoJSONL
+from pauta_index     import PautaIndex
+from login           import get_credentials, operacao_automatica, resolver_operacao
+from utils           import get_latest_file, normalize_text, configurar_logs
+from instrumentacao  import iniciar_trace, etapa
+from controle_gtas   import ControleGTAs
+
+PASTA_RELATORIOS = "Relatórios"
+ARQUIVO_JSONL    = os.path.join("JSON", "gtas.jsonl")
+
+def listar_pdfs(entrada: str) -> list[str]:
+    """
+    Aceita uma pasta (todos os .pdf dentro dela) ou um padrão glob.
+    """
+    if os.path.isdir(entrada):
+        padrao = os.path.join(entrada, "*")
+    else:
+        padrao = entrada
+    return sorted(
+        f for f in glob.glob(padrao)
+        if f.lower().endswith(".pdf") and os.path.isfile(f)
+    )
+
+def carregar_mapa(caminho: str) -> dict:
+    """
+    Lê o mapa por arquivo (JSON ou CSV com colunas arquivo/classe/operacao).
+    As chaves ficam pelo nome do arquivo, sem pasta.
+    """
+    if caminho.lower().endswith(".json"):
+        with open(caminho, encoding="utf-8") as f:
+            bruto = json.load(f)
+    else:
+        with open(caminho, encoding="utf-8-sig", newline="") as f:
+            amostra = f.read(2048); f.seek(0)
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=";,\t")
+            bruto = {
+                linha["arquivo"]: {k: v for k, v in linha.items() if k != "arquivo" and v}
+                for linha in csv.DictReader(f, dialect=dialeto)
+            }
+    return {os.path.basename(k): v for k, v in bruto.items()}
+
+def _entrada_do_mapa(mapa: dict, caminho: str) -> dict:
+    nome = os.path.basename(caminho)
+    return mapa.get(nome) or mapa.get(os.path.splitext(nome)[0]) or {}
+
+def _resolver_classe(texto: str, classes: dict) -> str:
+    classe = classes.get(normalize_text(texto))
+    if not classe:
+        raise ValueError(f"Classe '{texto}' não existe na pauta.")
+    return classe
+
+def processar_gta(caminho: str, dados: dict, indice_pauta, classes: dict, cred: str,
+                  classe_padrao: str = None, operacao_padrao: str = None,
+                  mapa: dict = None, limiar: float = None,
+                  consolidado: RelatorioConsolidado = None) -> dict:
+    """
+    Processa uma GTA já extraída sem interação: gera relatório e confere a
+    credencial da fazenda de procedência (aceitando nomes parecidos com
+    score >= `limiar`). Retorna a linha do manifesto.
+    Com `consolidado`, a GTA vira uma aba dele (em vez de arquivos próprios)
+    e os produtos ficam em item["produtos"] para o registro JSONL.
+    """
+    item = {"arquivo": caminho, "status": "erro"}
+    config = _entrada_do_mapa(mapa or {}, caminho)
+
+    if consolidado is None:
+        salvar_dados_json(dados, caminho)
+    item["numero_gta"] = dados.get("numero_gta")
+    item["fazenda"]    = dados.get("estabelecimento_procedencia")
+    if not dados.get("categorias"):
+        item["erro"] = "Nenhuma categoria extraída da GTA."
+        return item
+    item["cabecas"] = sum(c["quantidade"] for c in dados["categorias"])
+
+    texto_classe = config.get("classe") or classe_padrao
+    if not texto_classe:
+        item["erro"] = "Classe não informada (use --classe ou o mapa)."
+        return item
+    item["classe"] = _resolver_classe(texto_classe, classes)
+
+    texto_op = config.get("operacao") or operacao_padrao
+    op = operacao_automatica(dados)
+    if not op:
+        if not texto_op:
+            item["erro"] = "Operação não informada (use --operacao ou o mapa)."
+            return item
+        op = resolver_operacao(texto_op)
+    item["operacao"] = op
+
+    if consolidado is None:
+        item["relatorio"] = generate_report(dados, item["classe"], indice_pauta)
+    else:
+        # generate_report já grava o evento "relatorio"; aqui ele é medido à parte
+        with etapa("relatorio", len(dados["categorias"])) as ev:
+            df_prod = produtos_relatorio(dados, item["classe"], indice_pauta)
+            item["aba"] = consolidado.adicionar(dados, df_prod)
+            ev["saida"] = len(df_prod)
+        item["relatorio"] = consolidado.caminho
+        item["produtos"] = df_prod.to_dict("records")
+
+    if cred:
+        try:
+            ie, _ = get_credentials(item["fazenda"] or "", cred, limiar)
+            item["inscricao_estadual"] = ie
+        except ValueError as e:
+            item["status"] = "sem_credencial"
+            item["erro"] = str(e)
+            if getattr(e, "sugestoes", None):
+                item["sugestoes"] = [{"fazenda": nome, "score": round(score, 3)}
+                                     for nome, score in e.sugestoes]
+            return item
+
+    item["status"] = "ok"
+    return item
+
+def processar_lote(caminhos: list[str], classe_padrao: str = None,
+                   operacao_padrao: str = None, mapa: dict = None,
+                   workers: int = None, usar_cache: bool = True,
+                   posicional: bool = False, offline: bool = None,
+                   limiar: float = None, consolidado: bool = False,
+                   gzip: bool = False, retomar: bool = True,
+                   controle: ControleGTAs = None) -> dict:
+    """
+    Carrega pauta e planilha de credenciais uma vez e processa todas as GTAs.
+    A extração dos PDFs roda em paralelo (`workers` processos) enquanto os
+    relatórios são gerados; PDFs já vistos saem do cache de GTAs. Um erro
+    numa GTA fica registrado no manifesto e não interrompe o lote.
+    `consolidado`: um workbook para o lote todo e registros em JSON Lines
+    (comprimidos se `gzip`).
+    Com `retomar`, GTAs que o `controle` (padrão: controle_gtas) já dá como
+    relatadas com sucesso voltam no manifesto com "retomada": True, sem
+    serem relidas. No modo `consolidado` não há retomada (o workbook novo
+    precisa de todas as GTAs), e uma GTA só conta como relatada depois que
+    o workbook é gravado.
+    """
+    inicio = datetime.now()
+    df_pauta = download_and_load_pauta(offline=offline)
+    classes = {normalize_text(c): c for c in df_pauta['Classe'].dropna().unique()}
+    indice = PautaIndex(df_pauta)
+    logging.info(f"✅ Pauta carregada ({len(indice)} preços)")
+
+    try:
+        cred = get_latest_file("Arquivos", ".xlsx")
+        logging.info(f"🔐 Credenciais: {cred}")
+    except FileNotFoundError as e:
+        cred = None
+        logging.warning(f"⚠️ {e} — credenciais não serão conferidas.")
+
+    retomar = retomar and not consolidado
+    proprio = controle is None
+    if proprio:
+        controle = ControleGTAs()
+    shas = controle.chaves(caminhos)
+    itens, pendentes = [], []
+    for c in caminhos:
+        anterior = controle.detalhes(shas[c])
+        if retomar and controle.concluida(shas[c], "relatorio") and anterior.get("status") == "ok":
+            itens.append({**anterior, "arquivo": c, "retomada": True})
+        else:
+            pendentes.append(c)
+    if itens:
+        logging.info(f"⏭️ {len(itens)} GTA(s) já processada(s) em execução anterior: puladas")
+
+    cache = abrir_cache() if usar_cache else None
+    livro = registros = None
+    relatadas = []  # consolidado: (sha, numero, etapa, caminho, item) até o workbook existir
+    if consolidado:
+        ts = inicio.strftime('%d.%m.%Y_%H-%M-%S')
+        livro = RelatorioConsolidado(os.path.join(PASTA_RELATORIOS, f"CONSOLIDADO_LOTE_{ts}.xlsx"))
+        registros = ArquivoJSONL(ARQUIVO_JSONL + (".gz" if gzip else ""))
+    extraidos = extrair_em_paralelo(pendentes, workers=workers, cache=cache,
+                                    posicional=posicional, shas=shas)
+    try:
+        for n, res in enumerate(extraidos, start=1):
+            caminho = res["caminho"]
+            logging.info(f"📄 [{n}/{len(pendentes)}] {caminho}")
+            if res["dados"] is not None:
+                controle.registrar(shas[caminho], res["dados"].get("numero_gta"), "lida", caminho)
+            with etapa("lote_gta", len((res["dados"] or {}).get("categorias") or [])) as ev:
+                try:
+                    if res["erro"]:
+                        item = {"arquivo": caminho, "status": "erro",
+                                "erro": f"Falha na leitura do PDF: {res['erro']}"}
+                    else:
+                        item = processar_gta(caminho, res["dados"], indice, classes, cred,
+                                             classe_padrao, operacao_padrao, mapa, limiar, livro)
+                except Exception as e:
+                    logging.exception(f"❌ Falha em {caminho}")
+                    item = {"arquivo": caminho, "status": "erro", "erro": f"{type(e).__name__}: {e}"}
+                if item["status"] != "ok":
+                    ev["resultado"] = "falha"
+            if registros is not None and res["dados"] is not None:
+                registros.acrescentar({
+                    "numero_gta": res["dados"].get("numero_gta"),
+                    "arquivo":    caminho,
+                    "status":     item["status"],
+                    "classe":     item.get("classe"),
+                    "operacao":   item.get("operacao"),
+                    "dados":      res["dados"],
+                    "produtos":   item.pop("produtos", None),
+                })
+            if item["status"] == "ok":
+                logging.info(f"✅ GTA {item.get('numero_gta')}: {item.get('relatorio')}")
+            else:
+                logging.error(f"❌ {caminho}: {item.get('erro')}")
+            if item.get("relatorio"):
+                relatadas.append((shas[caminho], item.get("numero_gta"), "relatorio", caminho, item))
+                if livro is None:
+                    controle.registrar(*relatadas.pop())
+            itens.append(item)
+    finally:
+        try:
+            if cache is not None:
+                cache.fechar()
+            if livro is not None:
+                livro.fechar()
+                logging.info(f"📊 Relatório consolidado: {livro.caminho}")
+                for registro in relatadas:
+                    controle.registrar(*registro)
+        finally:
+            if proprio:
+                controle.fechar()
+
+    resumo = {}
+    for item in itens:
+        resumo[item["status"]] = resumo.get(item["status"], 0) + 1
+
+    return {
+        "inicio":   inicio.isoformat(timespec="seconds"),
+        "fim":      datetime.now().isoformat(timespec="seconds"),
+        "total":    len(itens),
+        "retomadas": sum(1 for item in itens if item.get("retomada")),
+        "resumo":   resumo,
+        "gtas":     itens
+    }
+
+def salvar_manifesto(manifesto: dict, pasta: str = PASTA_RELATORIOS) -> str:
+    os.makedirs(pasta, exist_ok=True)
+    ts = datetime.now().strftime('%d.%m.%Y_%H-%M-%S')
+    caminho = os.path.join(pasta, f"MANIFESTO_LOTE_{ts}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    return caminho
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processa várias GTAs sem interface gráfica.")
+    parser.add_argument("entrada", help="pasta com PDFs ou padrão glob (entre aspas)")
+    parser.add_argument("--classe", help="classe de gado para todas as GTAs")
+    parser.add_argument("--operacao", help="operação para todas as GTAs (ex.: abate, recria)")
+    parser.add_argument("--mapa", help="JSON/CSV com classe/operação por arquivo")
+    parser.add_argument("--workers", type=int, help="processos para ler os PDFs (padrão: nº de CPUs)")
+    parser.add_argument("--sem-cache", action="store_true", help="relê todos os PDFs, ignorando o cache")
+    parser.add_argument("--posicional", action="store_true",
+                        help="lê a tabela de categorias pela posição na página")
+    parser.add_argument("--offline", action="store_true",
+                        help="não baixa a pauta; usa só a que já existe localmente")
+    parser.add_argument("--consolidado", action="store_true",
+                        help="um workbook para o lote (aba por GTA + resumo) e registros em JSON Lines")
+    parser.add_argument("--gzip", action="store_true", help="com --consolidado, grava o JSON Lines comprimido")
+    parser.add_argument("--limiar", type=float,
+                        help="score mínimo (0 a 1) para aceitar fazenda por nome aproximado")
+    parser.add_argument("--refazer", action="store_true",
+                        help="processa de novo as GTAs que já têm relatório de execuções anteriores")
+    args = parser.parse_args(argv)
+
+    configurar_logs("lote")
+    logging.info(f"🧭 Trace: {iniciar_trace('lote')}")
+    caminhos = listar_pdfs(args.entrada)
+    if not caminhos:
+        logging.error(f"❌ Nenhum PDF encontrado em {args.entrada}")
+        return 1
+    logging.info(f"▶️ Lote com {len(caminhos)} GTA(s)")
+
+    mapa = carregar_mapa(args.mapa) if args.mapa else {}
+    manifesto = processar_lote(caminhos, args.classe, args.operacao, mapa,
+                               args.workers, not args.sem_cache, args.posicional,
+                               args.offline or None, args.limiar,
+                               args.consolidado, args.gzip, not args.refazer)
+    caminho = salvar_manifesto(manifesto)
+    logging.info(f"🏁 Lote concluído: {manifesto['resumo']} — manifesto em {caminho}")
+    # 2: alguma GTA com erro; 3: sem erro, mas alguma não ficou ok (ex.: sem_credencial)
+    if manifesto["resumo"].get("erro", 0):
+        return 2
+    return 0 if set(manifesto["resumo"]) <= {"ok"} else 3
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,29 +1,38 @@
 #!/usr/bin/env python3
+#
+# Uso:
+#   python main.py                                   fluxo completo (janelas + navegador)
+#   python main.py --preencher                       idem, preenchendo a NF-e Avulsa
+#   python main.py --emitir                          preenche e emite a NF-e
+#   python main.py --somente-leitura "GTA 414733.pdf"  só extrai a GTA e grava o JSON
+#   python main.py --somente-relatorio "JSON/GTA 414733_dados.json" --classe Comum
+#   python main.py --profile-startup [--somente-leitura ...]
+#
+# Cada modo importa só o que usa (MODULOS): ler uma GTA não carrega pandas,
+# Selenium nem Tk. --profile-startup mede essas importações com
+# `python -X importtime` num subprocesso e mostra as mais caras.
 
-import os, sys, logging
-from datetime import datetime
-import tkinter as tk
-
-from pegar_dados_GTA import extrair_dados_gta_via_interface
-from pauta          import download_and_load_pauta
-from report         import generate_report
-from login          import perform_login_with_selenium, escolher_operacao_gui
-from utils          import get_latest_file
-
-# logs
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s: %(message)s",
-    handlers=[
-        logging.FileHandler(f"{LOG_DIR}/run_{ts}.log", encoding="utf-8"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+import os, sys, time, json, logging, argparse, importlib, subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import configurar_logs
+from instrumentacao import iniciar_trace
+
+# módulos de cada modo, importados em _carregar() na hora de rodar
+MODULOS = {
+    "completo":  ["pegar_dados_GTA", "pauta", "report", "login", "credenciais",
+                  "tkinter", "selenium.webdriver", "esperas", "driver_pool",
+                  "formulario_nfe"],
+    "leitura":   ["pegar_dados_GTA"],
+    "relatorio": ["pauta", "report"],
+}
+
+def _carregar(modo: str):
+    for nome in MODULOS[modo]:
+        importlib.import_module(nome)
 
 def selecionar_classe_gui(df_pauta):
+    import tkinter as tk
     classes = sorted(df_pauta['Classe'].dropna().unique())
     root = tk.Tk()
     root.title("Seleção de Classe")
@@ -37,45 +46,232 @@ def selecionar_classe_gui(df_pauta):
     root.destroy()
     return escolha
 
-def main():
-    logging.info("▶️ Iniciando fluxo")
-    dados = extrair_dados_gta_via_interface()
-    if not dados.get('categorias'):
-        logging.error("❌ GTA falhou."); sys.exit(1)
-    logging.info("✅ GTA extraída")
+def _carregar_credenciais() -> str:
+    from credenciais import indice_credenciais
+    from utils import get_latest_file
+    cred = get_latest_file("Arquivos", ".xlsx")
+    indice_credenciais(cred)  # lê e indexa a planilha antes do login
+    return cred
 
-    df_pauta = download_and_load_pauta()
-    logging.info("✅ Pauta carregada")
+def _aguardar(futuro, etapa: str):
+    """
+    Resultado da etapa em segundo plano, registrando quanto o fluxo ficou parado por ela.
+    """
+    t0 = time.perf_counter()
+    resultado = futuro.result()
+    espera = time.perf_counter() - t0
+    if espera >= 0.1:
+        logging.info(f"⏳ Aguardando {etapa}: {espera:.1f}s")
+    return resultado
 
-    classe = selecionar_classe_gui(df_pauta)
-    logging.info(f"📋 Classe: {classe}")
+def _carregar_pauta(offline: bool = None):
+    from pauta       import download_and_load_pauta
+    from pauta_index import PautaIndex
+    df_pauta = download_and_load_pauta(offline=offline)
+    return df_pauta, PautaIndex(df_pauta)  # um índice para relatório e formulário
 
-    excel_rel = generate_report(dados, classe, df_pauta)
-    logging.info(f"✅ Relatório: {excel_rel}")
+def _fluxo(ex, preencher: bool = False, emitir: bool = False, offline: bool = None) -> int:
+    from pegar_dados_GTA import extrair_dados_gta_via_interface, selecionar_pdf
+    from report          import generate_report, produtos_relatorio
+    from formulario_nfe  import preencher_nfe
+    from login           import (perform_login_with_selenium, escolher_operacao_gui,
+                                 operacao_automatica, abrir_navegador)
+    from controle_gtas   import ControleGTAs
 
+    # Pauta, navegador e planilha de credenciais começam já, em paralelo;
+    # as janelas (Tk) ficam na thread principal e cada passo só espera a
+    # etapa de que depende.
+    f_pauta = ex.submit(_carregar_pauta, offline)
+    f_nav   = ex.submit(abrir_navegador)
+    f_cred  = ex.submit(_carregar_credenciais)
+    navegador_em_uso = False
+    controle = None
     try:
-        cred = get_latest_file("Arquivos", ".xlsx")
-        logging.info(f"🔐 Credenciais: {cred}")
-    except FileNotFoundError as e:
-        logging.error(f"❌ {e}"); sys.exit(1)
-
-    cpf_p = dados.get('cpf_procedencia','')
-    cpf_d = dados.get('cpf_destino','')
-    if cpf_p and cpf_p == cpf_d:
-        op = "REMESSA INTERNA DE TRANSFERÊNCIA DE BOVINO"
+        caminho = selecionar_pdf()
+        if not caminho:
+            logging.error("❌ Nenhum arquivo selecionado."); return 1
+        f_gta = ex.submit(extrair_dados_gta_via_interface, caminho)
+        # mesmo controle do lote e da emissão paralela: nada é emitido duas vezes
+        controle = ControleGTAs()
+        sha = controle.chaves([caminho])[caminho]
+
+        df_pauta, indice = _aguardar(f_pauta, "pauta")
+        logging.info("✅ Pauta carregada")
+
+        classe = selecionar_classe_gui(df_pauta)
+        logging.info(f"📋 Classe: {classe}")
+
+        dados = _aguardar(f_gta, "leitura da GTA")
+        if not dados.get('categorias'):
+            logging.error("❌ GTA falhou."); return 1
+        logging.info("✅ GTA extraída")
+        numero = dados.get('numero_gta')
+        controle.registrar(sha, numero, "lida", caminho)
+        f_rel = ex.submit(generate_report, dados, classe, indice)
+
+        op = operacao_automatica(dados) or escolher_operacao_gui()
+        logging.info(f"🔄 Operação: {op}")
+
+        try:
+            cred = _aguardar(f_cred, "credenciais")
+            logging.info(f"🔐 Credenciais: {cred}")
+        except FileNotFoundError as e:
+            logging.error(f"❌ {e}"); return 1
+
+        driver = _aguardar(f_nav, "navegador")
+        navegador_em_uso = True
+        _, ok = perform_login_with_selenium(
+            excel_path=cred,
+            farm_name=dados.get('estabelecimento_procedencia',''),
+            operacao=op,
+            driver=driver
+        )
+        excel_rel = _aguardar(f_rel, "relatório")
+        logging.info(f"✅ Relatório: {excel_rel}")
+        controle.registrar(sha, numero, "relatorio", caminho, {
+            "numero_gta": numero, "fazenda": dados.get('estabelecimento_procedencia'),
+            "classe": classe, "operacao": op, "relatorio": excel_rel})
+        if not ok:
+            logging.error("❌ Login/menu falhou."); return 1
+        controle.registrar(sha, numero, "login", caminho)
+
+        # NF-e Avulsa: só com --preencher/--emitir (seletores em formulario_nfe / NFE_SELETORES)
+        protocolo = controle.emitida(numero)
+        if protocolo is None and controle.concluida(sha, "emitida"):
+            protocolo = controle.detalhes(sha).get("protocolo") or ""
+        if (preencher or emitir) and protocolo is not None:
+            logging.info(f"⏭️ GTA {numero} já emitida (protocolo {protocolo or '?'}): "
+                         f"formulário não preenchido")
+        elif preencher or emitir:
+            try:
+                nota = preencher_nfe(driver, dados, produtos_relatorio(dados, classe, indice), op,
+                                     emitir=emitir)
+            except Exception as e:
+                logging.exception(f"❌ Formulário da NF-e: {e}"); return 1
+            if emitir:
+                controle.registrar(sha, numero, "emitida", caminho, {"protocolo": nota["protocolo"]})
+    finally:
+        if controle is not None:
+            controle.fechar()
+        if not navegador_em_uso:
+            # saída antecipada: não espera a pauta que ainda está baixando
+            ex.shutdown(wait=False, cancel_futures=True)
+            _fechar_navegador(f_nav)
+    logging.info("🏁 Concluído! Navegador aberto.")
+    return 0
+
+def _fechar_navegador(f_nav):
+    # o fluxo parou antes do login: não deixa um Chrome vazio aberto
+    if f_nav.cancel():
+        return
+    try:
+        f_nav.result().quit()
+    except Exception:
+        pass
+
+def _somente_leitura(caminho: str) -> int:
+    from pegar_dados_GTA import extrair_dados_gta_via_interface
+    dados = extrair_dados_gta_via_interface(caminho)
+    if not dados.get('categorias'):
+        logging.error("❌ GTA falhou."); return 1
+    logging.info("✅ GTA extraída")
+    return 0
+
+def _somente_relatorio(caminho_json: str, classe: str = None, offline: bool = None) -> int:
+    from pauta  import download_and_load_pauta
+    from report import generate_report
+    from utils  import normalize_text
+    with open(caminho_json, encoding="utf-8") as f:
+        dados = json.load(f)
+    df_pauta = download_and_load_pauta(offline=offline)
+    if classe:
+        classes = {normalize_text(c): c for c in df_pauta['Classe'].dropna().unique()}
+        if normalize_text(classe) not in classes:
+            logging.error(f"❌ Classe '{classe}' não existe na pauta."); return 1
+        classe = classes[normalize_text(classe)]
     else:
-        op = escolher_operacao_gui()
-    logging.info(f"🔄 Operação: {op}")
+        classe = selecionar_classe_gui(df_pauta)
+    logging.info(f"📋 Classe: {classe}")
+    logging.info(f"✅ Relatório: {generate_report(dados, classe, df_pauta)}")
+    return 0
 
-    driver, ok = perform_login_with_selenium(
-        excel_path=cred,
-        farm_name=dados.get('estabelecimento_procedencia',''),
-        operacao=op
+def _modo(args) -> str:
+    if args.somente_leitura:
+        return "leitura"
+    if args.somente_relatorio:
+        return "relatorio"
+    return "completo"
+
+def perfil_importacao(modo: str, limite: int = 15) -> int:
+    """
+    Roda `python -X importtime` importando main e os módulos do `modo` e
+    imprime o total e os pacotes mais caros (tempo próprio somado).
+    """
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import main; main._carregar({modo!r})"],
+        cwd=pasta, capture_output=True, text=True
     )
-    if not ok:
-        logging.error("❌ Login/menu falhou."); sys.exit(1)
+    parede = time.perf_counter() - t0
+    if proc.returncode:
+        print(proc.stderr)
+        return proc.returncode
 
-    logging.info("🏁 Concluído! Navegador aberto.")
+    por_pacote, total = {}, 0
+    for linha in proc.stderr.splitlines():
+        # "import time:      self [us] |  cumulative | imported package"
+        partes = linha.split("|")
+        if not linha.startswith("import time:") or len(partes) != 3 or not partes[1].strip().isdigit():
+            continue
+        proprio = int(partes[0].split(":")[1])
+        nome = partes[2].strip()
+        pacote = nome.split(".")[0]
+        por_pacote[pacote] = por_pacote.get(pacote, 0) + proprio
+        total += proprio
+
+    print(f"⏱️ Importações do modo '{modo}': {total / 1e3:.0f} ms "
+          f"({len(por_pacote)} pacotes; processo inteiro {parede * 1e3:.0f} ms)")
+    for pacote, us in sorted(por_pacote.items(), key=lambda kv: -kv[1])[:limite]:
+        print(f"  {pacote:28s} {us / 1e3:8.1f} ms  {100 * us / total:5.1f}%")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emissão de NF-e a partir da GTA.")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--somente-leitura", metavar="PDF",
+                       help="só extrai os dados da GTA e grava o JSON")
+    grupo.add_argument("--somente-relatorio", metavar="JSON",
+                       help="só gera o relatório a partir do JSON de uma GTA já lida")
+    parser.add_argument("--classe", help="classe de gado do relatório (sem ela, abre a janela)")
+    parser.add_argument("--offline", action="store_true",
+                        help="não baixa a pauta; usa só a que já existe localmente")
+    parser.add_argument("--preencher", action="store_true",
+                        help="preenche a NF-e Avulsa depois do login (padrão: só abre a emissão)")
+    parser.add_argument("--emitir", action="store_true",
+                        help="preenche e emite a NF-e depois de conferir os totais")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="mostra o tempo de importação do modo escolhido e sai")
+    args = parser.parse_args(argv)
+
+    modo = _modo(args)
+    if args.profile_startup:
+        return perfil_importacao(modo)
+
+    configurar_logs("run")
+    logging.info(f"🧭 Trace: {iniciar_trace('run')}")
+    if modo == "leitura":
+        return _somente_leitura(args.somente_leitura)
+    if modo == "relatorio":
+        return _somente_relatorio(args.somente_relatorio, args.classe, args.offline or None)
+
+    logging.info("▶️ Iniciando fluxo")
+    # sem `with`: a saída do bloco esperaria as etapas que o fluxo abandonou
+    ex = ThreadPoolExecutor(max_workers=5, thread_name_prefix="etapa")
+    try:
+        return _fluxo(ex, args.preencher, args.emitir, args.offline or None)
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
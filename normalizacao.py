@@ -0,0 +1,59 @@
+# normalizacao.py
+#
+# Normalização de texto usada para casar GTA, pauta e credenciais:
+# maiúsculas, sem acentos e com espaços simples ("Olho D'Água" → "OLHO D'AGUA").
+#
+# - `normalizar` guarda os resultados (lru_cache): descrições, classes e
+#   nomes de fazenda se repetem muito entre GTAs e execuções;
+# - texto só com caracteres Latin (< U+0370) sai por str.translate, sem
+#   NFD caractere a caractere; o resto vai pelo caminho unicodedata;
+# - `normalizar_serie` normaliza só os valores distintos de uma coluna
+#   (pandas só é importado aí: quem só normaliza texto não paga por ele).
+
+import unicodedata
+from functools import lru_cache
+
+_LIMITE_TABELA = 0x370
+
+def _normalizar_unicode(s: str) -> str:
+    s = unicodedata.normalize('NFD', s)
+    return ''.join(ch for ch in s if unicodedata.category(ch) != 'Mn')
+
+def _montar_tabela() -> dict:
+    tabela = {}
+    for cp in range(0x80, _LIMITE_TABELA):
+        ch = chr(cp)
+        sem_acento = _normalizar_unicode(ch)
+        if sem_acento != ch:
+            tabela[cp] = sem_acento
+    return tabela
+
+_TABELA = _montar_tabela()
+
+@lru_cache(maxsize=1 << 16)
+def _normalizar(texto: str) -> str:
+    s = texto.upper()
+    if not s.isascii():
+        if max(s) < '\u0370':
+            s = s.translate(_TABELA)
+        else:
+            s = _normalizar_unicode(s)
+    return ' '.join(s.split())
+
+def normalizar(texto) -> str:
+    """
+    Converte para maiúsculas, remove acentos e normaliza espaços.
+    Aceita qualquer valor (é convertido com str()).
+    """
+    return _normalizar(texto if type(texto) is str else str(texto))
+
+def normalizar_serie(serie, funcao=normalizar):
+    """
+    Aplica `funcao` uma vez por valor distinto da série e espalha o resultado.
+    Equivale a `serie.apply(funcao)`, exceto que valores ausentes (NaN e
+    None) são tratados todos como NaN.
+    """
+    import pandas as pd
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    valores = [funcao(v) for v in unicos]
+    return pd.Series(valores).take(codigos).set_axis(serie.index)
@@ -3,20 +3,42 @@
 import os
 import time
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
-from utils import normalize_text, get_latest_file
+from utils import get_latest_file, sha256_arquivo
+from downloads import aguardar_download
+from pauta_db import importar_pauta, carregar_pauta, versao_mais_recente
+from instrumentacao import instrumentar
+from resiliencia import tentar, ErroSefaz
 
 PASTA_DESTINO = os.path.join(os.getcwd(), "Pautas Fiscais")
 
+# Política de atualização da pauta local:
+#   "mesmo_dia" – só baixa se ainda não existe a pauta de hoje (padrão)
+#   "ttl"       – só baixa se a pauta local tiver mais de PAUTA_TTL_HORAS
+#   "hash"      – sempre baixa, mas descarta o arquivo novo se for idêntico ao último
+POLITICAS      = ("mesmo_dia", "ttl", "hash")
+POLITICA_PAUTA = os.environ.get("PAUTA_POLITICA", "mesmo_dia")
+TTL_HORAS      = float(os.environ.get("PAUTA_TTL_HORAS", "24"))
+# PAUTA_OFFLINE=1: nunca abre o navegador; falha na hora se não houver pauta local
+OFFLINE        = os.environ.get("PAUTA_OFFLINE", "") not in ("", "0")
+# Tempo máximo para o Excel terminar de baixar (em segundos)
+DOWNLOAD_TIMEOUT = float(os.environ.get("PAUTA_DOWNLOAD_TIMEOUT", "60"))
+
 def baixar_pauta():
     """
-    Baixa a pauta fiscal via Selenium e fecha o navegador ao final.
+    Baixa a pauta fiscal via Selenium, num Chrome próprio fechado ao final.
+    A exportação é repetida em falhas transitórias (resiliencia.tentar);
+    esgotadas as tentativas levanta ErroSefaz.
     """
+    # Selenium só é carregado quando a pauta precisa mesmo ser baixada
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from driver_pool import caminho_chromedriver
+
     os.makedirs(PASTA_DESTINO, exist_ok=True)
     chrome_options = Options()
     prefs = {
@@ -25,46 +47,96 @@ def baixar_pauta():
         "directory_upgrade": True
     }
     chrome_options.add_experimental_option("prefs", prefs)
+    driver = webdriver.Chrome(service=ChromeService(caminho_chromedriver()),
+                              options=chrome_options)
 
-    driver = webdriver.Chrome(options=chrome_options)
-    try:
+    def exportar():
         driver.get("https://pautafiscal.sefaz.to.gov.br/secao/1/3")
         wait = WebDriverWait(driver, 20)
         botao = wait.until(EC.element_to_be_clickable(
             (By.XPATH, "//button[.//span[contains(text(),'Exportar Excel')]]")
         ))
+        clique = time.time()
         botao.click()
         print("⏳ Aguardando download do Excel...")
-        time.sleep(10)
+        return aguardar_download(PASTA_DESTINO, ".xlsx", timeout=DOWNLOAD_TIMEOUT, desde=clique)
+
+    try:
+        antigo = tentar(exportar, nome="exportação da pauta", servico="pauta")
 
         # Renomeia o arquivo baixado
-        arquivos = [f for f in os.listdir(PASTA_DESTINO) if f.lower().endswith(".xlsx")]
-        arquivos.sort(key=lambda f: os.path.getmtime(os.path.join(PASTA_DESTINO, f)), reverse=True)
-        if not arquivos:
-            raise FileNotFoundError("❌ Nenhum .xlsx encontrado em Pautas Fiscais.")
-        antigo = os.path.join(PASTA_DESTINO, arquivos[0])
         data = time.strftime("%d.%m.%Y")
         novo = os.path.join(PASTA_DESTINO, f"PAUTA FISCAL - {data}.xlsx")
         os.replace(antigo, novo)
         print(f"✅ Download concluído e salvo como: {novo}")
     finally:
         driver.quit()
+    return novo
 
-def download_and_load_pauta() -> pd.DataFrame:
+def _pauta_local():
+    try:
+        return get_latest_file(PASTA_DESTINO, ext=".xlsx")
+    except FileNotFoundError:
+        return None
+
+def pauta_atual(politica: str = None, ttl_horas: float = None):
     """
-    Baixa a pauta (se ainda não baixou hoje), carrega o Excel,
-    adiciona colunas de normalização e retorna o DataFrame.
+    Caminho da pauta local se ela ainda vale pela política (sem precisar
+    abrir o navegador), ou None se for preciso baixar.
     """
-    baixar_pauta()
-    # pega o arquivo mais recente .xlsx na pasta
-    arquivo = get_latest_file(PASTA_DESTINO, ext=".xlsx")
-    print(f"📁 Pauta fiscal carregada: {arquivo}\n")
+    politica = politica or POLITICA_PAUTA
+    ttl_horas = TTL_HORAS if ttl_horas is None else ttl_horas
+    if politica not in POLITICAS:
+        raise ValueError(f"Política de pauta desconhecida: {politica}")
 
-    # lê a aba 'Dados'
-    df = pd.read_excel(arquivo, sheet_name="Dados")
+    arquivo = _pauta_local()
+    if arquivo is None or politica == "hash":
+        return None
+    if politica == "mesmo_dia":
+        hoje = os.path.join(PASTA_DESTINO, f"PAUTA FISCAL - {time.strftime('%d.%m.%Y')}.xlsx")
+        return hoje if os.path.exists(hoje) else None
+    idade_h = (time.time() - os.path.getmtime(arquivo)) / 3600
+    return arquivo if idade_h <= ttl_horas else None
 
-    # normaliza descrições e classes
-    df['Descricao_Normalizada'] = df['Descrição'].apply(normalize_text)
-    df['Classe_Normalizada']   = df['Classe'].apply(normalize_text)
+@instrumentar("pauta", saida=len)
+def download_and_load_pauta(politica: str = None, ttl_horas: float = None,
+                            offline: bool = None) -> pd.DataFrame:
+    """
+    Garante uma pauta atual pela `politica` (baixando só quando preciso),
+    importa o Excel para a base local (só na primeira vez que essa versão
+    aparece) e retorna o DataFrame já normalizado.
+    Em modo `offline` usa apenas o que já existe localmente. Se a SEFAZ
+    não responder (ErroSefaz), segue com a última pauta local, se houver.
+    """
+    offline = OFFLINE if offline is None else offline
+    if offline:
+        arquivo = _pauta_local()
+        if arquivo is None:
+            if versao_mais_recente() is None:
+                raise FileNotFoundError(
+                    f"❌ Modo offline e nenhuma pauta local em {PASTA_DESTINO}."
+                )
+            print("📁 Modo offline: usando a última pauta importada.\n")
+            return carregar_pauta()
+    else:
+        arquivo = pauta_atual(politica, ttl_horas)
+        if arquivo:
+            print(f"📁 Pauta fiscal local ainda vale ({politica or POLITICA_PAUTA}): download pulado.")
+        else:
+            anterior = _pauta_local()
+            try:
+                arquivo = baixar_pauta()
+            except ErroSefaz as e:
+                if anterior is None:
+                    raise
+                print(f"⚠️ Pauta não baixada ({e.categoria}: {e}); usando a última local: {anterior}")
+                arquivo = anterior
+            if (politica or POLITICA_PAUTA) == "hash" and anterior and anterior != arquivo \
+                    and sha256_arquivo(anterior) == sha256_arquivo(arquivo):
+                os.remove(arquivo)
+                arquivo = anterior
+                print("📁 Pauta baixada é idêntica à anterior: mantida a versão existente.")
 
-    return df
+    versao = importar_pauta(arquivo)
+    print(f"📁 Pauta fiscal carregada: {arquivo} (versão {versao})\n")
+    return carregar_pauta(versao)
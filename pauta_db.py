@@ -0,0 +1,133 @@
+# pauta_db.py
+#
+# Base local (SQLite) com as pautas fiscais já importadas.
+# Cada planilha é lida do .xlsx uma única vez, com as colunas
+# Classe_Normalizada / Descricao_Normalizada já calculadas (as mesmas chaves
+# do PautaIndex, que as usa em vez de renormalizar a pauta a cada execução);
+# as execuções seguintes carregam a pauta direto do SQLite.
+#
+# Cada versão (data de publicação, "PAUTA FISCAL - dd.mm.aaaa.xlsx")
+# fica numa tabela própria, registrada em `versoes`.
+
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+
+import pandas as pd
+
+from utils import sha256_arquivo
+from normalizacao import normalizar_serie
+from pauta_index import normalize_desc
+
+PASTA_PAUTAS = os.path.join(os.getcwd(), "Pautas Fiscais")
+CAMINHO_DB   = os.path.join(PASTA_PAUTAS, "pauta.sqlite")
+
+_RE_DATA = re.compile(r'(\d{2})\.(\d{2})\.(\d{4})')
+# Suba quando a normalização das colunas *_Normalizada mudar: as versões
+# importadas com outra são reimportadas do .xlsx.
+VERSAO_CHAVES = "2"
+
+_conexoes = {}
+_lock = threading.Lock()
+# (caminho_db, versao) -> (tabela, sha256, coluna_preco, chaves); None = mais recente
+_info_cache = {}
+
+def _conectar(caminho_db: str = CAMINHO_DB) -> sqlite3.Connection:
+    with _lock:
+        con = _conexoes.get(caminho_db)
+        if con is None:
+            os.makedirs(os.path.dirname(caminho_db), exist_ok=True)
+            con = sqlite3.connect(caminho_db, check_same_thread=False)
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS versoes (
+                    versao       TEXT PRIMARY KEY,
+                    tabela       TEXT NOT NULL,
+                    arquivo      TEXT NOT NULL,
+                    sha256       TEXT NOT NULL,
+                    coluna_preco TEXT,
+                    linhas       INTEGER NOT NULL,
+                    importado_em TEXT NOT NULL
+                )
+            """)
+            if "chaves" not in {c[1] for c in con.execute("PRAGMA table_info(versoes)")}:
+                con.execute("ALTER TABLE versoes ADD COLUMN chaves TEXT")
+            _conexoes[caminho_db] = con
+        return con
+
+def versao_do_arquivo(arquivo: str) -> str:
+    """
+    Versão da pauta (AAAA-MM-DD): a data do nome do arquivo
+    ("PAUTA FISCAL - dd.mm.aaaa.xlsx") ou, na falta dela, a data de modificação.
+    """
+    m = _RE_DATA.search(os.path.basename(arquivo))
+    if m:
+        d, mth, a = m.groups()
+        return f"{a}-{mth}-{d}"
+    return date.fromtimestamp(os.path.getmtime(arquivo)).isoformat()
+
+def _info_versao(con, versao: str):
+    return con.execute(
+        "SELECT tabela, sha256, coluna_preco, chaves FROM versoes WHERE versao = ?", (versao,)
+    ).fetchone()
+
+def _info(caminho_db: str, versao: str = None):
+    chave = (caminho_db, versao)
+    if chave not in _info_cache:
+        con = _conectar(caminho_db)
+        v = versao or versao_mais_recente(caminho_db)
+        info = _info_versao(con, v) if v else None
+        if not info:
+            raise FileNotFoundError(f"Pauta {v or ''} não encontrada em {caminho_db}")
+        _info_cache[chave] = info
+    return _info_cache[chave]
+
+def importar_pauta(arquivo: str, caminho_db: str = CAMINHO_DB) -> str:
+    """
+    Importa o .xlsx (aba 'Dados') para a base, se essa versão ainda não estiver
+    lá com o mesmo conteúdo. Retorna a versão.
+    """
+    con = _conectar(caminho_db)
+    versao = versao_do_arquivo(arquivo)
+    sha = sha256_arquivo(arquivo)
+    info = _info_versao(con, versao)
+    if info and info[1] == sha and info[3] == VERSAO_CHAVES:
+        return versao
+
+    df = pd.read_excel(arquivo, sheet_name="Dados")
+    df['Descricao_Normalizada'] = normalizar_serie(df['Descrição'], normalize_desc)
+    df['Classe_Normalizada']   = normalizar_serie(df['Classe'])
+    coluna_preco = next((c for c in df.columns if 'valor' in str(c).lower()), None)
+
+    tabela = "pauta_" + versao.replace("-", "")
+    with _lock, con:
+        df.to_sql(tabela, con, if_exists="replace", index=False)
+        con.execute(
+            "INSERT OR REPLACE INTO versoes (versao, tabela, arquivo, sha256, coluna_preco, "
+            "linhas, importado_em, chaves) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (versao, tabela, os.path.basename(arquivo), sha, coluna_preco,
+             len(df), datetime.now().isoformat(timespec="seconds"), VERSAO_CHAVES)
+        )
+        _info_cache.clear()
+    print(f"🗄️ Pauta {versao} importada para {caminho_db} ({len(df)} linhas)")
+    return versao
+
+def versao_mais_recente(caminho_db: str = CAMINHO_DB):
+    """
+    Versão mais recente já importada, ou None se a base estiver vazia.
+    """
+    linha = _conectar(caminho_db).execute("SELECT MAX(versao) FROM versoes").fetchone()
+    return linha[0]
+
+def carregar_pauta(versao: str = None, caminho_db: str = CAMINHO_DB) -> pd.DataFrame:
+    """
+    DataFrame da pauta (já com as colunas normalizadas), sem tocar no .xlsx.
+    Sem `versao`, usa a mais recente.
+    """
+    tabela, _, _, chaves = _info(caminho_db, versao)
+    df = pd.read_sql_query(f'SELECT * FROM "{tabela}"', _conectar(caminho_db))
+    if chaves != VERSAO_CHAVES:
+        # importada com outra normalização: o PautaIndex recalcula as chaves
+        df = df.drop(columns=['Classe_Normalizada', 'Descricao_Normalizada'], errors="ignore")
+    return df
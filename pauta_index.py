@@ -0,0 +1,85 @@
+# pauta_index.py
+#
+# Tabela de preços da pauta fiscal pronta para consulta:
+# (classe normalizada, descrição normalizada) -> Decimal.
+# Montada uma vez a partir do DataFrame carregado; cada relatório só faz
+# buscas em dict, em vez de renormalizar a pauta inteira e fazer merge.
+#
+#   indice = PautaIndex(df_pauta)
+#   indice.price([("Comum", "Bovinos Femea 13 a 24 Meses")])  # [Decimal('1800.00')]
+
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+import pandas as pd
+
+from normalizacao import normalizar, normalizar_serie
+
+_RE_BOVINOS = re.compile(r'\bBOVINOS\b')
+
+@lru_cache(maxsize=4096)
+def normalize_desc(s) -> str:
+    """
+    Normaliza a descrição de categoria para casar GTA e pauta.
+    """
+    t = str(s).upper()
+    # singulariza Bovinos → Bovino
+    t = _RE_BOVINOS.sub('BOVINO', t)
+    # remove acentos e caracteres supérfluos
+    return normalizar(t)
+
+def parse_preco(valor):
+    """
+    Preço da pauta como Decimal: aceita "1.800,00", "1800.00" ou número.
+    Vazio ou ilegível → None.
+    """
+    if valor is None or (isinstance(valor, float) and valor != valor):
+        return None
+    if isinstance(valor, (int, float, Decimal)):
+        return Decimal(str(valor))
+    s = str(valor).strip().replace("R$", "").replace(" ", "")
+    if not s:
+        return None
+    if "," in s:
+        s = s.replace(".", "").replace(",", ".")
+    try:
+        return Decimal(s)
+    except InvalidOperation:
+        return None
+
+class PautaIndex:
+    def __init__(self, df_pauta: pd.DataFrame):
+        """
+        Precisa das colunas 'Classe', 'Descrição' e uma com 'valor' no nome.
+        As chaves vêm de Classe_Normalizada/Descricao_Normalizada quando a
+        pauta já as traz (pauta_db); senão são calculadas aqui.
+        Se a mesma chave aparecer mais de uma vez, vale a primeira linha.
+        """
+        if 'Classe' not in df_pauta.columns or 'Descrição' not in df_pauta.columns:
+            raise KeyError("df_pauta deve conter colunas 'Classe' e 'Descrição'")
+        self.coluna_preco = next((c for c in df_pauta.columns if 'valor' in str(c).lower()), None)
+        if not self.coluna_preco:
+            raise KeyError("Coluna de preço não encontrada na pauta (buscando 'valor').")
+
+        if 'Classe_Normalizada' in df_pauta.columns and 'Descricao_Normalizada' in df_pauta.columns:
+            classes, descricoes = df_pauta['Classe_Normalizada'], df_pauta['Descricao_Normalizada']
+        else:
+            classes = normalizar_serie(df_pauta['Classe'])
+            descricoes = normalizar_serie(df_pauta['Descrição'], normalize_desc)
+        precos = {}
+        for chave, bruto in zip(zip(classes, descricoes), df_pauta[self.coluna_preco]):
+            if chave not in precos:
+                precos[chave] = parse_preco(bruto)
+        self._precos = precos
+
+    def __len__(self):
+        return len(self._precos)
+
+    def price(self, rows) -> list:
+        """
+        Preços (Decimal ou None) para pares (classe, descrição) ainda não
+        normalizados, na mesma ordem.
+        """
+        get = self._precos.get
+        return [get((normalizar(classe), normalize_desc(descricao))) for classe, descricao in rows]
@@ -2,12 +2,23 @@
 
 import os
 import json
-import tkinter as tk
-from tkinter import filedialog
 import fitz  # PyMuPDF
 import re
+import time
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache_gta import CacheGTA
+from utils import normalize_text
+from instrumentacao import instrumentar, tamanho_arquivo, registrar_evento
+
+# Suba esta versão sempre que a interpretação do PDF mudar:
+# o cache de GTAs descarta tudo o que foi gravado por outra versão.
+VERSAO_PARSER = "3"
 
 def selecionar_pdf():
+    import tkinter as tk
+    from tkinter import filedialog
     root = tk.Tk()
     root.withdraw()
     root.attributes('-topmost', True)
@@ -25,115 +36,223 @@ def selecionar_pdf():
     root.destroy()
     return caminho
 
-def ler_pdf(caminho):
-    texto = ""
+def iterar_paginas(caminho):
+    """
+    Gera as páginas do PDF sob demanda. O documento fica aberto só enquanto
+    o gerador está em uso e é fechado ao final ou num `break` de quem consome.
+    """
     with fitz.open(caminho) as doc:
         for pag in doc:
-            texto += pag.get_text()
-    return texto
+            yield pag
 
-def extrair_dados_gta_via_interface():
-    caminho = selecionar_pdf()
-    if not caminho:
-        print("❌ Nenhum arquivo selecionado.")
-        return {}
+def ler_pdf(caminho, max_paginas: int = None):
+    return "".join(pag.get_text() for pag in islice(iterar_paginas(caminho), max_paginas))
 
-    texto = ler_pdf(caminho)
-    linhas = texto.splitlines()
-    dados = {}
+# Cabeçalhos da tabela de categorias (texto normalizado começa com o prefixo)
+_CABECALHOS = (
+    ("grupo",      "GRUPO"),
+    ("especie",    "ESPECIE"),
+    ("categoria",  "CATEGORIA"),
+    ("faixa",      "FAIXA"),
+    ("sexo",       "SEXO"),
+    ("quantidade", "QUANT"),
+)
 
-    # Número da GTA
-    m_num = re.search(r'\bNumero\b.*?(\d{5,})', texto, re.IGNORECASE | re.DOTALL)
-    dados["numero_gta"] = m_num.group(1).strip() if m_num else None
+def categorias_posicionais(pagina: dict) -> list:
+    """
+    Lê a tabela de categorias pela posição dos textos na página
+    (saída de page.get_text("dict")), em vez de contar linhas a partir de
+    "GRUPO". Cada célula vai para a coluna cujo cabeçalho está mais perto
+    no eixo x; as linhas são agrupadas pela altura. Retorna [] se a tabela
+    não for encontrada.
+    """
+    spans = [
+        (s["bbox"], s["text"].strip())
+        for b in pagina.get("blocks", []) if b.get("type", 0) == 0
+        for l in b["lines"] for s in l["spans"] if s["text"].strip()
+    ]
+    grupo = next((bb for bb, t in spans if normalize_text(t) == "GRUPO"), None)
+    if grupo is None:
+        return []
+    altura = grupo[3] - grupo[1]
+    meio_y = (grupo[1] + grupo[3]) / 2
 
-    # UF
-    dados["uf"] = None
-    for i, ln in enumerate(linhas):
-        if ln.strip().upper() == "UF":
-            for nx in linhas[i+1:i+6]:
-                v = nx.strip()
-                if re.fullmatch(r'[A-Z]{2}', v):
-                    dados["uf"] = v
-                    break
-            break
+    # cabeçalhos na mesma linha de "GRUPO": coluna -> centro x
+    colunas = {}
+    for bb, t in spans:
+        if abs((bb[1] + bb[3]) / 2 - meio_y) > altura / 2:
+            continue
+        chave = normalize_text(t)
+        for col, prefixo in _CABECALHOS:
+            if col not in colunas and chave.startswith(prefixo):
+                colunas[col] = (bb[0] + bb[2]) / 2
+    if any(c not in colunas for c in ("grupo", "especie", "faixa", "sexo", "quantidade")):
+        return []
 
-    # Série
-    dados["serie"] = None
-    for i, ln in enumerate(linhas):
-        if ln.strip().upper() in ("SÉRIE", "SERIE"):
-            for nx in linhas[i+1:i+6]:
-                v = nx.strip()
-                if len(v)==1 and v.isalnum():
-                    dados["serie"] = v
-                    break
+    # células abaixo do cabeçalho, agrupadas em linhas pela altura
+    linhas = []
+    for bb, t in sorted((x for x in spans if x[0][1] >= grupo[3] - altura / 4),
+                        key=lambda x: ((x[0][1] + x[0][3]) / 2, x[0][0])):
+        y = (bb[1] + bb[3]) / 2
+        if not linhas or y - linhas[-1][0] > altura / 2:
+            linhas.append((y, {}))
+        x = (bb[0] + bb[2]) / 2
+        col = min(colunas, key=lambda c: abs(colunas[c] - x))
+        celulas = linhas[-1][1]
+        celulas[col] = f"{celulas[col]} {t}" if col in celulas else t
+
+    categorias = []
+    for _, c in linhas:
+        qt = _RE_NAO_DIG.sub('', c.get("quantidade", ""))
+        if not c.get("grupo") or not c.get("especie") or not c.get("faixa") or not qt:
             break
+        cat = c.get("categoria")
+        categorias.append({
+            "grupo": c["grupo"],
+            "especie": c["especie"],
+            "categoria": cat if cat and cat != '-' else None,
+            "faixa": c["faixa"],
+            "sexo": c.get("sexo", ""),
+            "quantidade": int(qt)
+        })
+    return categorias
 
-    # Validade
-    m_val = re.search(r'Validade\s*[:\-]\s*(\d{2}/\d{2}/\d{4})', texto)
-    dados["validade"] = m_val.group(1) if m_val else None
+# Especificação dos campos de texto corrido, compilada na importação.
+# `quantos`: 1 = primeira ocorrência (re.search), 2 = procedência/destino,
+# None = todas (re.findall); a busca para assim que tem o que precisa.
+_CAMPOS = (
+    # (campo, quantos, padrão)
+    ("numero",          1,    re.compile(r'\bNumero\b.*?(\d{5,})', re.IGNORECASE | re.DOTALL)),
+    ("validade",        1,    re.compile(r'Validade\s*[:\-]\s*(\d{2}/\d{2}/\d{4})')),
+    ("cpf",             2,    re.compile(r'CPF/CNPJ[:]\s*(\d+)')),
+    ("nome",            2,    re.compile(r'Nome[:]\s*(.+)')),
+    ("estabelecimento", 2,    re.compile(r'Estabelecimento[:]\s*(.+)')),
+    ("municipio",       2,    re.compile(r'Município - UF[:]\s*(.+)')),
+    ("finalidade",      1,    re.compile(r'Finalidade[:]\s*(.+?)\s+Meio de Transporte', re.DOTALL)),
+)
 
-    # CPF/CNPJ
-    cpfs = re.findall(r'CPF/CNPJ[:]\s*(\d+)', texto)
-    dados["cpf_procedencia"] = cpfs[0] if len(cpfs)>0 else None
-    dados["cpf_destino"]     = cpfs[1] if len(cpfs)>1 else None
+# opções horizontais (fallback da tabela de categorias). Com IGNORECASE o `re`
+# testa posição por posição; a versão em minúsculas, sobre texto.lower(), usa
+# a busca literal rápida e o padrão original só confirma onde ela achou.
+_RE_HORIZONTAL = re.compile(
+    r'(Bovideos|Bovídeos)\s+(Bovinos)\s+\-\s+(.+?)\s+(Macho|Fêmea|Femea)\s+(\d+)',
+    re.IGNORECASE)
+_RE_HORIZONTAL_MIN = re.compile(
+    r'(bovideos|bovídeos)\s+(bovinos)\s+\-\s+(.+?)\s+(macho|fêmea|femea)\s+(\d+)')
+# Caracteres que o IGNORECASE equipara a letras ASCII mas que o lower() não
+# leva até elas (İ, ı, ſ, K, Å): se aparecerem, vale o padrão IGNORECASE puro.
+_CASO_ESPECIAL = '\u0130\u0131\u017f\u212a\u212b'
 
-    # Nomes
-    nomes = re.findall(r'Nome[:]\s*(.+)', texto)
-    dados["nome_procedencia"] = nomes[0].strip() if len(nomes)>0 else None
-    dados["nome_destino"]     = nomes[1].strip() if len(nomes)>1 else None
+_RE_UF       = re.compile(r'[A-Z]{2}')
+_RE_NAO_DIG  = re.compile(r'\D+')
 
-    # Estabelecimentos
-    ests = re.findall(r'Estabelecimento[:]\s*(.+)', texto)
-    dados["estabelecimento_procedencia"] = ests[0].strip() if len(ests)>0 else None
-    dados["estabelecimento_destino"]     = ests[1].strip() if len(ests)>1 else None
+def _varrer_rotulos(texto: str) -> dict:
+    """
+    Aplica cada padrão de _CAMPOS e devolve, por campo, a lista de tuplas
+    de grupos (mesmo resultado de re.search/re.findall).
+    """
+    return {
+        nome: [m.groups() for m in islice(padrao.finditer(texto), quantos)]
+        for nome, quantos, padrao in _CAMPOS
+    }
 
-    # Municípios
-    muns = re.findall(r'Município - UF[:]\s*(.+)', texto)
-    dados["municipio_procedencia"] = muns[0].strip() if len(muns)>0 else None
-    dados["municipio_destino"]     = muns[1].strip() if len(muns)>1 else None
+def _categorias_horizontais(texto: str) -> list:
+    minusculo = texto.lower()
+    if len(minusculo) != len(texto) or any(c in texto for c in _CASO_ESPECIAL):
+        return _RE_HORIZONTAL.findall(texto)
+    return [
+        _RE_HORIZONTAL.match(texto, m.start()).groups()
+        for m in _RE_HORIZONTAL_MIN.finditer(minusculo)
+    ]
 
-    # Finalidade
-    m_fin = re.search(r'Finalidade[:]\s*(.+?)\s+Meio de Transporte', texto, re.DOTALL)
-    dados["finalidade"] = m_fin.group(1).strip() if m_fin else None
+def _categorias_verticais(linhas: list, idx: int) -> list:
+    # data começa 6 linhas adiante do header "Grupo"
+    categorias = []
+    # enquanto houver blocos completos de 6 linhas
+    for start in range(idx + 6, len(linhas) - 5, 6):
+        grp, esp, cat, fx, sx, qt = map(str.strip, linhas[start:start+6])
+        if cat == '-':
+            cat = None
+        if not qt.isdecimal():
+            qt = _RE_NAO_DIG.sub('', qt)
+        if not grp or not esp or not fx or not qt:
+            break
+        try:
+            qtd = int(qt)
+        except:
+            break
+        categorias.append({
+            "grupo": grp,
+            "especie": esp,          # ESPÉCIE correta
+            "categoria": cat,
+            "faixa": fx,
+            "sexo": sx,
+            "quantidade": qtd
+        })
+    return categorias
 
-    # Extrai categorias: layout vertical
+def _varrer_linhas(linhas: list):
+    """
+    Uma passada pelas linhas para os campos em layout vertical:
+    UF, Série e a tabela de categorias abaixo de "GRUPO".
+    """
+    uf = serie = None
     categorias = []
-    # localiza índice do header "Grupo"
-    for idx, ln in enumerate(linhas):
-        if ln.strip().upper() == "GRUPO":
-            # data começa 6 linhas adiante
-            start = idx + 6
-            # enquanto houver blocos completos
-            while start + 5 < len(linhas):
-                grp = linhas[start].strip()
-                esp = linhas[start+1].strip()    # ESPÉCIE correta
-                cat = linhas[start+2].strip() if linhas[start+2].strip()!='-' else None
-                fx  = linhas[start+3].strip()
-                sx  = linhas[start+4].strip()
-                qt  = re.sub(r'\D+', '', linhas[start+5].strip())
-                if not grp or not esp or not fx or not qt:
+    achou_uf = achou_serie = achou_grupo = False
+    for i, ln in enumerate(linhas):
+        chave = ln.strip()
+        if len(chave) > 5:
+            continue  # upper() nunca encurta: não pode ser UF, SÉRIE nem GRUPO
+        chave = chave.upper()
+        if not achou_uf and chave == "UF":
+            achou_uf = True
+            for nx in linhas[i+1:i+6]:
+                v = nx.strip()
+                if _RE_UF.fullmatch(v):
+                    uf = v
                     break
-                try:
-                    qtd = int(qt)
-                except:
+        elif not achou_serie and chave in ("SÉRIE", "SERIE"):
+            achou_serie = True
+            for nx in linhas[i+1:i+6]:
+                v = nx.strip()
+                if len(v)==1 and v.isalnum():
+                    serie = v
                     break
-                categorias.append({
-                    "grupo": grp,
-                    "especie": esp,
-                    "categoria": cat,
-                    "faixa": fx,
-                    "sexo": sx,
-                    "quantidade": qtd
-                })
-                start += 6
+        elif not achou_grupo and chave == "GRUPO":
+            achou_grupo = True
+            categorias = _categorias_verticais(linhas, i)
+        if achou_uf and achou_serie and achou_grupo:
             break
+    return uf, serie, categorias
 
-    # opções horizontais (fallback)
-    padrao_h = re.findall(
-        r'(Bovideos|Bovídeos)\s+(Bovinos)\s+\-\s+(.+?)\s+(Macho|Fêmea|Femea)\s+(\d+)',
-        texto, re.IGNORECASE
-    )
-    for grp, esp, fx, sx, qt in padrao_h:
+def _valor(grupos: list, n: int):
+    return grupos[n][0].strip() if len(grupos) > n else None
+
+def interpretar_texto_gta(texto: str) -> dict:
+    """
+    Interpreta o texto já extraído do PDF e devolve o dicionário `dados`.
+    Função pura: não abre janelas nem grava arquivos.
+    """
+    achados = _varrer_rotulos(texto)
+    uf, serie, categorias = _varrer_linhas(texto.splitlines())
+
+    dados = {
+        "numero_gta":                  _valor(achados["numero"], 0),
+        "uf":                          uf,
+        "serie":                       serie,
+        "validade":                    _valor(achados["validade"], 0),
+        "cpf_procedencia":             _valor(achados["cpf"], 0),
+        "cpf_destino":                 _valor(achados["cpf"], 1),
+        "nome_procedencia":            _valor(achados["nome"], 0),
+        "nome_destino":                _valor(achados["nome"], 1),
+        "estabelecimento_procedencia": _valor(achados["estabelecimento"], 0),
+        "estabelecimento_destino":     _valor(achados["estabelecimento"], 1),
+        "municipio_procedencia":       _valor(achados["municipio"], 0),
+        "municipio_destino":           _valor(achados["municipio"], 1),
+        "finalidade":                  _valor(achados["finalidade"], 0),
+    }
+
+    for grp, esp, fx, sx, qt in _categorias_horizontais(texto):
         categorias.append({
             "grupo": grp,
             "especie": esp,
@@ -143,7 +262,10 @@ def extrair_dados_gta_via_interface():
             "quantidade": int(qt)
         })
 
-    # remove duplicados
+    dados["categorias"] = _sem_duplicados(categorias)
+    return dados
+
+def _sem_duplicados(categorias: list) -> list:
     unicos = []
     seen = set()
     for c in categorias:
@@ -151,15 +273,152 @@ def extrair_dados_gta_via_interface():
         if key not in seen:
             seen.add(key)
             unicos.append(c)
-    dados["categorias"] = unicos
+    return unicos
+
+def _completo(dados: dict) -> bool:
+    return bool(dados["categorias"]) and all(v is not None for v in dados.values())
+
+def extrair_dados_gta(caminho: str, posicional: bool = False) -> dict:
+    """
+    Lê o PDF em `caminho` e devolve `dados`, sem Tk e sem gravar JSON.
+    É a função usada pelos workers do processamento paralelo.
+
+    A primeira página é interpretada sozinha e, se já traz todos os campos
+    (na GTA, tudo fica nela), o resto do PDF nem é lido. Senão, todas as
+    páginas são lidas e o texto inteiro é interpretado uma vez só.
+    Com `posicional`, a tabela de categorias é lida pela posição dos textos
+    (get_text("dict")) em vez do layout fixo de 6 linhas após "GRUPO".
+    """
+    textos, tabela = [], []
 
-    # salva JSON
-    pasta = "JSON"
+    def interpretar(texto):
+        dados = interpretar_texto_gta(texto)
+        if tabela:
+            dados["categorias"] = _sem_duplicados(tabela)
+        return dados
+
+    for pag in iterar_paginas(caminho):
+        textos.append(pag.get_text())
+        if posicional and not tabela:
+            tabela = categorias_posicionais(pag.get_text("dict"))
+        if len(textos) == 1:
+            dados = interpretar(textos[0])
+            if _completo(dados):
+                return dados
+    if len(textos) == 1:
+        return dados
+    return interpretar("".join(textos))
+
+def salvar_dados_json(dados: dict, caminho: str, pasta: str = "JSON") -> str:
+    """
+    Grava `dados` em JSON/<nome do PDF>_dados.json e retorna o caminho.
+    """
     os.makedirs(pasta, exist_ok=True)
     base = os.path.splitext(os.path.basename(caminho))[0]
     out = os.path.join(pasta, f"{base}_dados.json")
     with open(out, "w", encoding="utf-8") as f:
         json.dump(dados, f, ensure_ascii=False, indent=2)
+    return out
+
+def _extrair_com_erro(caminho: str, posicional: bool = False) -> dict:
+    # roda no processo filho: qualquer erro volta como texto, não derruba o lote;
+    # a duração volta junto para o pai gravar o evento "gta" no trace
+    t0 = time.perf_counter()
+    try:
+        res = {"caminho": caminho, "dados": extrair_dados_gta(caminho, posicional), "erro": None}
+    except Exception as e:
+        res = {"caminho": caminho, "dados": None, "erro": f"{type(e).__name__}: {e}"}
+    res["duracao_s"] = time.perf_counter() - t0
+    return res
+
+def _registrar_gta(res: dict):
+    categorias = (res["dados"] or {}).get("categorias") or []
+    if res["erro"]:
+        resultado, campos = "erro", {"erro": res["erro"][:300]}
+    else:
+        resultado, campos = ("ok" if categorias else "falha"), {"saida": len(categorias)}
+    registrar_evento("gta", res["duracao_s"], tamanho_arquivo(res["caminho"]), resultado, **campos)
+
+def extrair_em_paralelo(caminhos, workers: int = None, ordenado: bool = True, cache=None,
+                        posicional: bool = False, shas: dict = None):
+    """
+    Extrai várias GTAs num ProcessPoolExecutor com `workers` processos
+    (padrão: nº de CPUs). Gera um dict {"caminho", "dados", "erro"} por arquivo,
+    na ordem de `caminhos` (ordenado=True) ou conforme forem terminando.
+    Um PDF com problema volta com "erro" preenchido e o lote continua.
+    Com `cache` (CacheGTA), PDFs já lidos não passam pelo pool; `shas`
+    ({caminho: SHA-256} já calculados) evita ler os PDFs só para o hash.
+    `posicional` é repassado a extrair_dados_gta. Cada PDF lido no pool
+    vira um evento "gta" no trace (os do cache não).
+    """
+    variante = "posicional" if posicional else ""
+    caminhos = list(caminhos)
+    hashes, prontos = {}, {}
+    if cache is not None:
+        for c in caminhos:
+            try:
+                hashes[c] = cache.chave(c, variante, (shas or {}).get(c))
+            except OSError:
+                continue  # o worker vai relatar o erro de leitura
+            dados = cache.obter(hashes[c])
+            if dados is not None:
+                prontos[c] = {"caminho": c, "dados": dados, "erro": None}
+    faltantes = [c for c in caminhos if c not in prontos]
+
+    def guardar(res):
+        _registrar_gta(res)
+        sha = hashes.get(res["caminho"])
+        if sha and res["erro"] is None:
+            cache.guardar(sha, res["dados"])
+        return res
 
+    if not faltantes:
+        for c in caminhos:
+            yield prontos[c]
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if ordenado:
+            lidos = pool.map(_extrair_com_erro, faltantes, [posicional] * len(faltantes),
+                             chunksize=4)
+            for c in caminhos:
+                yield prontos[c] if c in prontos else guardar(next(lidos))
+        else:
+            futuros = [pool.submit(_extrair_com_erro, c, posicional) for c in faltantes]
+            for c in caminhos:
+                if c in prontos:
+                    yield prontos[c]
+            for fut in as_completed(futuros):
+                yield guardar(fut.result())
+
+def abrir_cache(**kwargs):
+    """
+    Abre o cache de GTAs (JSON/cache_gta.sqlite) na versão atual do parser.
+    """
+    return CacheGTA(VERSAO_PARSER, **kwargs)
+
+@instrumentar("gta", tamanho=lambda caminho=None: tamanho_arquivo(caminho),
+              saida=lambda dados: len(dados.get("categorias") or []),
+              sucesso=lambda dados: bool(dados.get("categorias")))
+def extrair_dados_gta_via_interface(caminho=None):
+    """
+    Extrai os dados da GTA. Sem `caminho`, abre o diálogo para escolher o PDF;
+    com `caminho` (modo lote), roda sem nenhuma janela.
+    """
+    if caminho is None:
+        caminho = selecionar_pdf()
+    if not caminho:
+        print("❌ Nenhum arquivo selecionado.")
+        return {}
+
+    cache = abrir_cache()
+    try:
+        sha = cache.chave(caminho)
+        dados = cache.obter(sha)
+        if dados is None:
+            dados = extrair_dados_gta(caminho)
+            cache.guardar(sha, dados)
+    finally:
+        cache.fechar()
+    out = salvar_dados_json(dados, caminho)
     print(f"✅ Dados da GTA extraídos e salvos em: {out}")
     return dados
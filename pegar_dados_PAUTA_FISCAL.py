@@ -4,13 +4,10 @@ import os
 import time
 import pandas as pd
 from datetime import date
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
-from utils import normalize_text, get_latest_file
+from utils import get_latest_file
+from downloads import aguardar_download
+from pauta_db import importar_pauta, carregar_pauta
 
 # Pasta onde as pautas fiscais são salvas
 PASTA_DESTINO = os.path.join(os.getcwd(), "Pautas Fiscais")
@@ -26,6 +23,12 @@ def baixar_pauta():
     faz login se necessário, clica em "Exportar Excel" e aguarda o .xlsx ser baixado.
     Retorna o caminho completo do arquivo baixado.
     """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     os.makedirs(PASTA_DESTINO, exist_ok=True)
 
     # Configura o Chrome para download automático
@@ -47,25 +50,15 @@ def baixar_pauta():
     btn_export = wait.until(EC.element_to_be_clickable(
         (By.XPATH, "//button[.//span[text()='Exportar Excel']]")
     ))
-    btn_expaort.click()
-
-    # Aguarda até DOWNLOAD_TIMEOUT segundos pelo download do arquivo .xlsx
-    deadline = time.time() + DOWNLOAD_TIMEOUT
-    arquivo_baixado = None
-    while time.time() < deadline:
-        xls = [f for f in os.listdir(PASTA_DESTINO) if f.lower().endswith('.xlsx')]
-        if xls:
-            xls.sort(key=lambda f: os.path.getmtime(os.path.join(PASTA_DESTINO, f)), reverse=True)
-            latest = xls[0]
-            # Desconsidera arquivos temporários do Excel
-            if not latest.startswith('~$'):
-                arquivo_baixado = os.path.join(PASTA_DESTINO, latest)
-                break
-        time.sleep(1)
-
-    driver.quit()
-    if not arquivo_baixado:
-        raise FileNotFoundError(f"❌ Timeout de {DOWNLOAD_TIMEOUT}s ao baixar pauta fiscal")
+    clique = time.time()
+    btn_export.click()
+
+    # Aguarda até DOWNLOAD_TIMEOUT segundos o .xlsx terminar de baixar
+    try:
+        arquivo_baixado = aguardar_download(DOWNLOAD_DIR, ".xlsx",
+                                            timeout=DOWNLOAD_TIMEOUT, desde=clique)
+    finally:
+        driver.quit()
 
     print(f"✅ Download concluído e salvo como: {arquivo_baixado}")
     return arquivo_baixado
@@ -100,10 +93,7 @@ def download_and_load_pauta() -> pd.DataFrame:
     else:
         arquivo = baixar_pauta()
 
-    print(f"📁 Pauta fiscal carregada: {arquivo}\n")
-
-    # Lê e normaliza
-    df = pd.read_excel(arquivo, sheet_name="Dados")
-    df['Descricao_Normalizada'] = df['Descrição'].apply(normalize_text)
-    df['Classe_Normalizada']   = df['Classe'].apply(normalize_text)
-    return df
\ No newline at end of file
+    # Importa para a base local (lê o .xlsx só na primeira vez) e carrega
+    versao = importar_pauta(arquivo)
+    print(f"📁 Pauta fiscal carregada: {arquivo} (versão {versao})\n")
+    return carregar_pauta(versao)
\ No newline at end of file
@@ -0,0 +1,170 @@
+# relatorio_xlsx.py
+#
+# Escrita dos relatórios em Excel, linha a linha (streaming).
+#
+# `linhas_relatorio` gera as linhas da aba "Dados GTA" na ordem em que
+# aparecem na planilha; cada célula é um valor simples ou um par
+# (valor, estilo). Os escritores gravam essas linhas sem montar a planilha
+# inteira em memória:
+#   - "xlsxwriter" – opcional (constant_memory), ~1,5x mais rápido;
+#   - "openpyxl"   – Workbook(write_only=True) com estilos nomeados.
+# O padrão ("auto") usa o xlsxwriter se estiver instalado e o openpyxl
+# caso contrário; a variável RELATORIO_ENGINE fixa um dos dois. Cada motor
+# só é importado quando um escritor dele é aberto.
+#
+#   with abrir_escritor("saida.xlsx") as esc:
+#       esc.aba("Dados GTA", linhas_relatorio(dados, produtos))
+
+import os
+import logging
+from decimal import Decimal
+
+ENGINE  = os.environ.get("RELATORIO_ENGINE", "auto")
+ENGINES = ("auto", "xlsxwriter", "openpyxl")
+
+# estilos compartilhados por todas as células: nome -> (negrito, formato numérico)
+ESTILOS = {
+    "negrito": (True, None),
+    "moeda":   (False, "#,##0.00"),
+}
+
+CABECALHO_PRODUTOS = ['Espécie', 'Sexo', 'Faixa', 'Quantidade', 'Classe', 'Preço Pauta Fiscal', 'Data']
+
+def linhas_relatorio(dados: dict, produtos, cabecalho=CABECALHO_PRODUTOS):
+    """
+    Linhas da aba "Dados GTA": cabeçalho da GTA (A1–B4), procedência/destino
+    (A6–E10), tabela de produtos a partir da linha 12 e dados adicionais
+    uma linha abaixo da tabela. `produtos` é um iterável de tuplas na ordem
+    de `cabecalho`; a coluna de preço sai com formato de moeda.
+    """
+    b = "negrito"
+    yield [("GTA", b)]
+    yield ["Número", dados.get('numero_gta', '')]
+    yield ["UF",     dados.get('uf', '')]
+    yield ["Série",  dados.get('serie', '')]
+    yield []
+    yield [("PROCEDÊNCIA", b), None, None, ("DESTINO", b)]
+    for rotulo_p, campo_p, rotulo_d, campo_d in (
+        ("CPF / CNPJ Procedencia",      'cpf_procedencia',
+         "CPF / CNPJ Destino",          'cpf_destino'),
+        ("Nome Procedencia",            'nome_procedencia',
+         "Nome Destino",                'nome_destino'),
+        ("Estabelecimento Procedencia", 'estabelecimento_procedencia',
+         "Estabelecimento Destino",     'estabelecimento_destino'),
+        ("Municipio Procedencia",       'municipio_procedencia',
+         "Municipio Destino",           'municipio_destino'),
+    ):
+        yield [(rotulo_p, b), dados.get(campo_p, ''), None, (rotulo_d, b), dados.get(campo_d, '')]
+    yield []
+
+    # Tabela de produtos (linha 12)
+    yield [(h, b) for h in cabecalho]
+    col_preco = cabecalho.index('Preço Pauta Fiscal') if 'Preço Pauta Fiscal' in cabecalho else -1
+    for produto in produtos:
+        linha = list(produto)
+        if col_preco >= 0:
+            linha[col_preco] = (linha[col_preco], "moeda")
+        yield linha
+
+    # Dados adicionais
+    yield []
+    yield [("DADOS ADICIONAIS", b)]
+    yield ["Finalidade", dados.get('finalidade', '')]
+    yield ["Validade",   dados.get('validade', '')]
+
+def _separar(celula):
+    if type(celula) is tuple:
+        return celula
+    return celula, None
+
+class EscritorOpenpyxl:
+    def __init__(self, caminho: str):
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, NamedStyle
+        self.caminho = caminho
+        self.wb = Workbook(write_only=True)
+        for nome, (negrito, formato) in ESTILOS.items():
+            estilo = NamedStyle(name=nome)
+            estilo.font = Font(bold=negrito)
+            if formato:
+                estilo.number_format = formato
+            self.wb.add_named_style(estilo)
+
+    def aba(self, nome: str, linhas, larguras: dict = None):
+        from openpyxl.cell import WriteOnlyCell
+        ws = self.wb.create_sheet(title=nome[:31])
+        for coluna, largura in (larguras or {}).items():
+            ws.column_dimensions[coluna].width = largura
+        for linha in linhas:
+            saida = []
+            for celula in linha:
+                valor, estilo = _separar(celula)
+                if estilo is None:
+                    saida.append(valor)
+                else:
+                    c = WriteOnlyCell(ws, value=valor)
+                    c.style = estilo
+                    saida.append(c)
+            ws.append(saida)
+
+    def fechar(self):
+        self.wb.save(self.caminho)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is None:
+            self.fechar()
+
+class EscritorXlsxwriter:
+    def __init__(self, caminho: str):
+        import xlsxwriter
+        self.caminho = caminho
+        self.wb = xlsxwriter.Workbook(caminho, {"constant_memory": True})
+        self.formatos = {}
+        for nome, (negrito, formato) in ESTILOS.items():
+            props = {"bold": negrito}
+            if formato:
+                props["num_format"] = formato
+            self.formatos[nome] = self.wb.add_format(props)
+
+    def aba(self, nome: str, linhas, larguras: dict = None):
+        ws = self.wb.add_worksheet(nome[:31])
+        for coluna, largura in (larguras or {}).items():
+            ws.set_column(f"{coluna}:{coluna}", largura)
+        formatos = self.formatos
+        for r, linha in enumerate(linhas):
+            for c, celula in enumerate(linha):
+                valor, estilo = _separar(celula)
+                if valor is None and estilo is None:
+                    continue
+                if isinstance(valor, Decimal):
+                    valor = float(valor)
+                ws.write(r, c, valor, formatos.get(estilo))
+
+    def fechar(self):
+        self.wb.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is None:
+            self.fechar()
+
+def abrir_escritor(caminho: str, engine: str = None):
+    """
+    Escritor do motor pedido (ou RELATORIO_ENGINE). Sem o xlsxwriter
+    instalado, "auto" e "xlsxwriter" usam o openpyxl.
+    """
+    engine = engine or ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de relatório desconhecido: {engine}")
+    if engine != "openpyxl":
+        try:
+            return EscritorXlsxwriter(caminho)
+        except ImportError:
+            if engine == "xlsxwriter":
+                logging.warning("⚠️ xlsxwriter não instalado; usando openpyxl.")
+    return EscritorOpenpyxl(caminho)
@@ -0,0 +1,178 @@
+# resiliencia.py
+#
+# Novas tentativas e disjuntor para as conversas com a SEFAZ.
+#
+# Passos idempotentes (abrir uma página, exportar a pauta) passam por
+# tentar(): uma falha transitória (timeout, conexão, erro de rede do Chrome)
+# é repetida com espera exponencial e jitter; as demais sobem na hora.
+# Falhas transitórias seguidas abrem o disjuntor do serviço: por
+# SEFAZ_PAUSA_S segundos nenhuma chamada sai e quem chama recebe
+# CircuitoAberto na hora, em vez de insistir com um portal fora do ar.
+#
+#   campo = abrir_pagina(driver, URL_SEFAZ, EC.element_to_be_clickable(...), "login")
+#   arquivo = tentar(exportar, nome="pauta")
+#
+# Todo erro pode ser classificado com categoria(): transitorio, navegador,
+# dados, indisponivel ou desconhecido.
+
+import os
+import time
+import random
+import logging
+import threading
+
+TENTATIVAS = int(os.environ.get("SEFAZ_TENTATIVAS", "3"))
+BASE_S     = float(os.environ.get("SEFAZ_BACKOFF_S", "1.0"))
+TETO_S     = float(os.environ.get("SEFAZ_BACKOFF_MAX_S", "20"))
+# falhas transitórias seguidas que abrem o disjuntor, e por quanto tempo
+FALHAS_MAX = int(os.environ.get("SEFAZ_FALHAS_MAX", "5"))
+PAUSA_S    = float(os.environ.get("SEFAZ_PAUSA_S", "60"))
+
+TRANSITORIO  = "transitorio"   # vale tentar de novo
+NAVEGADOR    = "navegador"     # o Chrome morreu ou perdeu a janela
+DADOS        = "dados"         # planilha, GTA ou formulário com problema
+INDISPONIVEL = "indisponivel"  # disjuntor aberto
+DESCONHECIDO = "desconhecido"
+CATEGORIAS   = (TRANSITORIO, NAVEGADOR, DADOS, INDISPONIVEL, DESCONHECIDO)
+
+class ErroSefaz(RuntimeError):
+    def __init__(self, etapa: str, categoria: str, causa: Exception = None, mensagem: str = None):
+        self.etapa = etapa
+        self.categoria = categoria
+        self.causa = causa
+        super().__init__(mensagem or f"{etapa}: {type(causa).__name__}: {causa}")
+
+class CircuitoAberto(ErroSefaz):
+    def __init__(self, servico: str, restante: float):
+        self.restante = restante
+        super().__init__(servico, INDISPONIVEL,
+                         mensagem=f"{servico}: muitas falhas seguidas, nova tentativa em {restante:.0f}s")
+
+def categoria(erro: Exception) -> str:
+    """
+    Categoria do erro (uma de CATEGORIAS).
+    """
+    if isinstance(erro, ErroSefaz):
+        return erro.categoria
+    if isinstance(erro, (TimeoutError, ConnectionError)):
+        return TRANSITORIO
+    if type(erro).__module__.split(".")[0] in ("requests", "urllib3"):
+        return TRANSITORIO
+    if isinstance(erro, (ValueError, KeyError, FileNotFoundError)):
+        return DADOS
+    try:
+        from selenium.common import exceptions as se
+    except ImportError:
+        return DESCONHECIDO
+    if isinstance(erro, (se.TimeoutException, se.StaleElementReferenceException)):
+        return TRANSITORIO
+    if isinstance(erro, (se.InvalidSessionIdException, se.NoSuchWindowException)):
+        return NAVEGADOR
+    # o navegador está bem; a página não tem o que se esperava dela
+    if isinstance(erro, (se.NoSuchElementException, se.ElementNotInteractableException,
+                         se.ElementClickInterceptedException, se.InvalidSelectorException,
+                         se.JavascriptException)):
+        return DADOS
+    if isinstance(erro, se.WebDriverException):
+        return TRANSITORIO if "net::ERR_" in (erro.msg or "") else NAVEGADOR
+    return DESCONHECIDO
+
+class Disjuntor:
+    def __init__(self, nome: str, falhas_max: int = FALHAS_MAX, pausa: float = PAUSA_S):
+        """
+        Abre depois de `falhas_max` falhas seguidas e fica aberto por
+        `pausa` segundos; depois deixa as chamadas passarem de novo, e uma
+        nova falha o reabre na hora.
+        """
+        self.nome = nome
+        self.falhas_max = falhas_max
+        self.pausa = pausa
+        self.falhas = 0
+        self._aberto_ate = 0.0
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """
+        Levanta CircuitoAberto se o disjuntor ainda estiver aberto.
+        """
+        with self._lock:
+            restante = self._aberto_ate - time.monotonic()
+        if restante > 0:
+            raise CircuitoAberto(self.nome, restante)
+
+    def sucesso(self):
+        with self._lock:
+            self.falhas = 0
+            self._aberto_ate = 0.0
+
+    def falha(self):
+        with self._lock:
+            self.falhas += 1
+            if self.falhas < self.falhas_max:
+                return
+            self._aberto_ate = time.monotonic() + self.pausa
+        logging.warning(f"🔌 {self.nome}: {self.falhas} falha(s) seguida(s); "
+                        f"chamadas suspensas por {self.pausa:.0f}s")
+
+_disjuntores = {}
+_lock_disjuntores = threading.Lock()
+
+def disjuntor(nome: str = "sefaz") -> Disjuntor:
+    """
+    Disjuntor do serviço, o mesmo para todo o processo.
+    """
+    with _lock_disjuntores:
+        return _disjuntores.setdefault(nome, Disjuntor(nome))
+
+def espera_backoff(tentativa: int, base: float = BASE_S, teto: float = TETO_S) -> float:
+    """
+    Espera antes da `tentativa` seguinte (1, 2, ...): sorteada entre zero e
+    base·2^(tentativa-1), limitada a `teto`.
+    """
+    return random.uniform(0, min(teto, base * 2 ** (tentativa - 1)))
+
+def tentar(funcao, *args, nome: str = None, tentativas: int = None, base: float = BASE_S,
+           teto: float = TETO_S, servico: str = "sefaz", **kwargs):
+    """
+    Chama `funcao(*args, **kwargs)` repetindo as falhas transitórias até
+    `tentativas` vezes. Esgotadas as tentativas levanta ErroSefaz (com a
+    falha original em `causa`); erros de outras categorias sobem como estão.
+    Com `servico`, as falhas transitórias contam no disjuntor dele (None:
+    sem disjuntor).
+    """
+    nome = nome or getattr(funcao, "__name__", "sefaz")
+    tentativas = TENTATIVAS if tentativas is None else max(1, tentativas)
+    dj = disjuntor(servico) if servico else None
+    for n in range(1, tentativas + 1):
+        if dj is not None:
+            dj.permitir()
+        try:
+            resultado = funcao(*args, **kwargs)
+        except Exception as e:
+            if categoria(e) != TRANSITORIO:
+                raise
+            if dj is not None:
+                dj.falha()
+            if n == tentativas:
+                raise ErroSefaz(nome, TRANSITORIO, e) from e
+            espera = espera_backoff(n, base, teto)
+            logging.warning(f"🔁 {nome}: {type(e).__name__} (tentativa {n}/{tentativas}); "
+                            f"repetindo em {espera:.1f}s")
+            time.sleep(espera)
+        else:
+            if dj is not None:
+                dj.sucesso()
+            return resultado
+
+def abrir_pagina(driver, url: str, pronto, nome: str = "pagina", timeout: float = 20, **opcoes):
+    """
+    driver.get(url) e espera a condição `pronto` (ex.: EC.element_to_be_clickable),
+    com as novas tentativas de tentar(). Retorna o que `pronto` devolver.
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    def carregar():
+        driver.get(url)
+        return WebDriverWait(driver, timeout).until(pronto)
+
+    return tentar(carregar, nome=nome, **opcoes)
@@ -0,0 +1,166 @@
+# sessoes_sefaz.py
+#
+# Reaproveita o login da SEFAZ entre GTAs da mesma fazenda. Depois do
+# primeiro login de uma IE, guarda o navegador autenticado, os cookies e as
+# URLs do menu e da emissão de NF-e Avulsa; nas GTAs seguintes vai direto
+# para a emissão. Se o portal devolver a página de login (sessão expirada),
+# ou se a sessão estiver parada há mais de SESSAO_MINUTOS, faz o login de
+# novo sem que quem chamou perceba.
+#
+#   sessoes = SessoesSefaz(cred)
+#   for dados in gtas_da_fazenda:
+#       driver, ok = sessoes.abrir(driver, dados["estabelecimento_procedencia"])
+#       preencher_nfe(driver, dados, df_prod, op)
+#   logging.info(sessoes.resumo())   # 🔐 sessões: 1 login(s), 4 reaproveitada(s), 0 expirada(s)
+#
+# As sessões ficam só na memória do processo (nada de cookie em disco).
+
+import os
+import time
+import logging
+import threading
+
+from login import get_credentials, autenticar, abrir_nfe_avulsa, na_pagina_de_login, URL_SEFAZ, TIMEOUT
+from esperas import Cronometro, esperar
+from instrumentacao import instrumentar
+from resiliencia import tentar, CircuitoAberto
+
+# minutos sem uso depois dos quais a sessão é tratada como vencida
+JANELA_MINUTOS = float(os.environ.get("SESSAO_MINUTOS", "15"))
+# quanto esperar a URL mudar depois do clique em NF-e Avulsa; se não mudar,
+# a sessão volta à emissão sempre pelo menu
+ESPERA_URL = 5
+
+class SessoesSefaz:
+    def __init__(self, excel_path: str, url: str = URL_SEFAZ, janela_minutos: float = None):
+        """
+        `excel_path`: planilha de credenciais; `url`: página de login.
+        """
+        self.excel_path = excel_path
+        self.url = url
+        self.janela = 60 * (JANELA_MINUTOS if janela_minutos is None else janela_minutos)
+        self.contadores = {"logins": 0, "reaproveitadas": 0, "expiradas": 0}
+        self._sessoes = {}  # ie -> {"driver", "cookies", "url_menu", "url_nfe", "uso"}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessoes)
+
+    def resumo(self) -> str:
+        c = self.contadores
+        return (f"🔐 sessões: {c['logins']} login(s), {c['reaproveitadas']} reaproveitada(s), "
+                f"{c['expiradas']} expirada(s)")
+
+    @instrumentar("sessao", sucesso=lambda retorno: retorno[1])
+    def abrir(self, driver, farm_name: str):
+        """
+        Deixa `driver` na emissão de NF-e Avulsa logado na IE da fazenda,
+        reaproveitando a sessão dela quando possível. Retorna (driver, ok).
+        CircuitoAberto (SEFAZ fora do ar) sobe para quem chama decidir se adia.
+        """
+        crono = Cronometro(f"sessão {farm_name}")
+        try:
+            ie, pwd = get_credentials(farm_name, self.excel_path)
+            sessao = self._vigente(ie)
+            if sessao is not None:
+                if self._retomar(driver, sessao, crono):
+                    self._guardar(ie, driver, sessao["url_menu"], sessao["url_nfe"])
+                    self._contar("reaproveitadas")
+                    crono.registrar()
+                    return driver, True
+                logging.info(f"🔁 Sessão da IE {ie} expirou; entrando de novo.")
+                self._contar("expiradas")
+                self.descartar(ie)
+            self._login(driver, ie, pwd, crono)
+            self._contar("logins")
+        except CircuitoAberto:
+            crono.registrar(logging.WARNING)
+            raise
+        except Exception:
+            logging.exception(f"❌ Erro ao abrir a sessão de {farm_name}")
+            crono.registrar(logging.WARNING)
+            return driver, False
+        crono.registrar()
+        return driver, True
+
+    def descartar(self, ie: str):
+        """
+        Esquece a sessão da IE (o próximo abrir() faz login).
+        """
+        with self._lock:
+            self._sessoes.pop(ie, None)
+
+    def desvincular(self, driver):
+        """
+        O navegador foi limpo ou fechado: as sessões dele passam a depender
+        só dos cookies guardados.
+        """
+        if driver is None:
+            return
+        with self._lock:
+            for sessao in self._sessoes.values():
+                if sessao["driver"] is driver:
+                    sessao["driver"] = None
+
+    def _contar(self, chave: str):
+        with self._lock:
+            self.contadores[chave] += 1
+
+    def _vigente(self, ie: str):
+        with self._lock:
+            sessao = self._sessoes.get(ie)
+            if sessao is not None and time.monotonic() - sessao["uso"] > self.janela:
+                del self._sessoes[ie]
+                self.contadores["expiradas"] += 1
+                return None
+            return sessao
+
+    def _guardar(self, ie: str, driver, url_menu: str, url_nfe: str):
+        cookies = driver.get_cookies()
+        with self._lock:
+            self._sessoes[ie] = {"driver": driver, "cookies": cookies, "url_menu": url_menu,
+                                 "url_nfe": url_nfe, "uso": time.monotonic()}
+
+    def _carregada(self, driver):
+        """
+        Espera a página terminar de carregar e diz se o portal mandou para
+        o login ("login") ou não ("ok"); None se não carregar a tempo.
+        """
+        if not esperar(driver, lambda d: d.execute_script("return document.readyState") == "complete",
+                       TIMEOUT):
+            return None
+        return "login" if na_pagina_de_login(driver, self.url) else "ok"
+
+    def _retomar(self, driver, sessao: dict, crono) -> bool:
+        with crono.etapa("retomar"):
+            if driver is not sessao["driver"]:
+                # outro navegador (ou o mesmo já limpo): leva os cookies da sessão
+                tentar(driver.get, sessao["url_menu"], nome="retomar sessão")
+                driver.delete_all_cookies()
+                for cookie in sessao["cookies"]:
+                    try:
+                        driver.add_cookie(cookie)
+                    except Exception:
+                        pass
+            tentar(driver.get, sessao["url_nfe"] or sessao["url_menu"], nome="retomar sessão")
+            if self._carregada(driver) != "ok":
+                return False
+        if sessao["url_nfe"] is None:
+            from selenium.common.exceptions import TimeoutException
+            try:
+                abrir_nfe_avulsa(driver, crono)
+            except TimeoutException:
+                return False  # sem o menu: a sessão não vale mais
+            return self._carregada(driver) == "ok"
+        return True
+
+    def _login(self, driver, ie: str, pwd: str, crono):
+        autenticar(driver, ie, pwd, self.url, crono)
+        url_menu = driver.current_url
+        abrir_nfe_avulsa(driver, crono)
+        with crono.etapa("pronto"):
+            esperar(driver, lambda d: d.current_url != url_menu, ESPERA_URL)
+            if self._carregada(driver) == "login":
+                raise RuntimeError("Portal voltou para o login ao abrir a NF-e Avulsa.")
+        url_nfe = driver.current_url
+        self._guardar(ie, driver, url_menu, url_nfe if url_nfe != url_menu else None)
@@ -0,0 +1,51 @@
+# similaridade.py
+#
+# Busca aproximada de nomes por trigramas (coeficiente de Dice).
+# O índice invertido trigrama -> nomes é montado uma vez; cada consulta
+# só visita os nomes que compartilham algum trigrama com ela.
+#
+#   idx = IndiceTrigramas(["VERONICA II", "SANTA ANA"])
+#   idx.ranquear("VERONICA")   # [(0.82, 0), ...]
+
+from collections import Counter
+
+def trigramas(texto: str) -> set:
+    """
+    Trigramas de cada palavra, com espaço nas bordas (" AB", "ABC", "BC ").
+    """
+    grams = set()
+    for palavra in texto.split():
+        p = f" {palavra} "
+        grams.update(p[i:i + 3] for i in range(len(p) - 2))
+    return grams
+
+class IndiceTrigramas:
+    def __init__(self, nomes: list[str]):
+        """
+        `nomes` já normalizados; as posições na lista são os ids devolvidos.
+        """
+        self._tamanhos = []
+        self._invertido = {}
+        for i, nome in enumerate(nomes):
+            grams = trigramas(nome)
+            self._tamanhos.append(len(grams))
+            for g in grams:
+                self._invertido.setdefault(g, []).append(i)
+
+    def ranquear(self, consulta: str, limite: int = 5, minimo: float = 0.0) -> list[tuple]:
+        """
+        Até `limite` pares (score, id), do mais parecido ao menos,
+        com score de 0 a 1 e pelo menos `minimo`.
+        """
+        grams = trigramas(consulta)
+        if not grams:
+            return []
+        comuns = Counter()
+        for g in grams:
+            comuns.update(self._invertido.get(g, ()))
+        n = len(grams)
+        scores = (
+            (2 * c / (n + self._tamanhos[i]), i) for i, c in comuns.items()
+        )
+        ranking = sorted((s for s in scores if s[0] >= minimo), key=lambda s: (-s[0], s[1]))
+        return ranking[:limite]
@@ -0,0 +1,5 @@
+# Os módulos do projeto ficam na raiz do repositório (sem pacote).
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
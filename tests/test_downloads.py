@@ -0,0 +1,51 @@
+import os
+import time
+import threading
+
+import pytest
+
+import downloads
+from downloads import aguardar_download
+
+@pytest.fixture(params=["inotify", "polling"])
+def modo(request, monkeypatch):
+    if request.param == "polling":
+        monkeypatch.setattr(downloads, "_abrir_inotify", lambda pasta: None)
+    return request.param
+
+def _baixar_depois(pasta, nome, atraso=0.2):
+    # imita o Chrome: grava em .crdownload e renomeia ao terminar
+    def baixar():
+        temporario = os.path.join(pasta, nome + ".crdownload")
+        with open(temporario, "wb") as f:
+            f.write(b"PK" + b"\0" * 100)
+        time.sleep(atraso)
+        os.replace(temporario, os.path.join(pasta, nome))
+    t = threading.Thread(target=baixar)
+    t.start()
+    return t
+
+def test_crdownload_renomeado(tmp_path, modo):
+    t = _baixar_depois(str(tmp_path), "PAUTA.xlsx")
+    caminho = aguardar_download(str(tmp_path), ".xlsx", timeout=5, estabilidade=0.3, intervalo=0.05)
+    t.join()
+    assert caminho == os.path.join(str(tmp_path), "PAUTA.xlsx")
+    assert not os.path.exists(caminho + ".crdownload")
+
+def test_timeout_sem_download(tmp_path, modo):
+    t0 = time.monotonic()
+    with pytest.raises(TimeoutError):
+        aguardar_download(str(tmp_path), ".xlsx", timeout=0.3, intervalo=0.05)
+    assert time.monotonic() - t0 < 2
+
+def test_timeout_com_crdownload_parado(tmp_path, modo):
+    (tmp_path / "PAUTA.xlsx.crdownload").write_bytes(b"PK")
+    with pytest.raises(TimeoutError):
+        aguardar_download(str(tmp_path), ".xlsx", timeout=0.3, intervalo=0.05)
+
+def test_ignora_arquivo_anterior_ao_clique(tmp_path, modo):
+    antigo = tmp_path / "PAUTA ANTIGA.xlsx"
+    antigo.write_bytes(b"PK")
+    os.utime(antigo, (time.time() - 3600, time.time() - 3600))
+    with pytest.raises(TimeoutError):
+        aguardar_download(str(tmp_path), ".xlsx", timeout=0.3, intervalo=0.05)
@@ -0,0 +1,90 @@
+import pytest
+from selenium.common.exceptions import WebDriverException, TimeoutException, NoSuchElementException
+
+from driver_pool import PoolDrivers
+
+class DriverFalso:
+    def __init__(self):
+        self.fechado = False
+        self.vivo = True
+        self.comandos = []
+
+    @property
+    def window_handles(self):
+        if not self.vivo:
+            raise WebDriverException("chrome not reachable")
+        return ["janela"]
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.comandos.append(cmd)
+
+    def get(self, url):
+        self.comandos.append(url)
+
+    def quit(self):
+        self.fechado = True
+
+@pytest.fixture
+def criados():
+    return []
+
+@pytest.fixture
+def fabrica(criados):
+    def criar():
+        driver = DriverFalso()
+        criados.append(driver)
+        return driver
+    return criar
+
+def test_reaproveita_e_limpa_entre_sessoes(fabrica, criados):
+    with PoolDrivers(tamanho=1, fabrica=fabrica) as pool:
+        with pool.sessao() as primeiro:
+            pass
+        with pool.sessao() as segundo:
+            pass
+    assert primeiro is segundo
+    assert len(criados) == 1
+    assert primeiro.comandos[:2] == ["Network.clearBrowserCookies", "about:blank"]
+
+def test_fechar_encerra_todos(fabrica, criados):
+    with PoolDrivers(tamanho=2, fabrica=fabrica) as pool:
+        pool.aquecer()
+        assert len(criados) == 2
+        assert not any(d.fechado for d in criados)
+    assert all(d.fechado for d in criados)
+
+def test_troca_apos_max_usos(fabrica, criados):
+    with PoolDrivers(tamanho=1, max_usos=2, fabrica=fabrica) as pool:
+        for _ in range(3):
+            with pool.sessao():
+                pass
+    assert len(criados) == 2
+    assert criados[0].fechado
+
+def test_descarta_navegador_com_erro(fabrica, criados):
+    with PoolDrivers(tamanho=1, fabrica=fabrica) as pool:
+        with pytest.raises(WebDriverException):
+            with pool.sessao():
+                raise WebDriverException("caiu")
+        assert criados[0].fechado
+        with pool.sessao() as driver:
+            assert driver is criados[1]
+
+@pytest.mark.parametrize("erro", [TimeoutException("lento"), NoSuchElementException("#campo")])
+def test_mantem_navegador_em_erro_da_pagina(fabrica, criados, erro):
+    with PoolDrivers(tamanho=1, fabrica=fabrica) as pool:
+        with pytest.raises(type(erro)):
+            with pool.sessao():
+                raise erro
+        assert not criados[0].fechado
+        with pool.sessao() as driver:
+            assert driver is criados[0]
+
+def test_substitui_navegador_morto(fabrica, criados):
+    with PoolDrivers(tamanho=1, fabrica=fabrica) as pool:
+        with pool.sessao() as driver:
+            pass
+        driver.vivo = False
+        with pool.sessao() as novo:
+            assert novo is not driver
+        assert driver.fechado
@@ -1,16 +1,19 @@
 import os
-import unicodedata
+import sys
+import logging
 import re
+import hashlib
+from datetime import datetime
+
+from normalizacao import normalizar
 
 def normalize_text(text: str) -> str:
     """
     Converte para maiúsculas, remove acentos e normaliza espaços.
     Exemplo: "Olho D'Água" → "OLHO D AGUA"
+    (Implementação com cache em normalizacao.normalizar.)
     """
-    s = str(text).upper()
-    s = unicodedata.normalize('NFD', s)
-    s = ''.join(ch for ch in s if unicodedata.category(ch) != 'Mn')
-    return ' '.join(s.split())
+    return normalizar(text)
 
 def limpar_nome(text: str) -> str:
     """
@@ -37,3 +40,31 @@ def get_latest_file(folder: str, ext: str = ".xlsx") -> str:
         reverse=True
     )
     return os.path.join(folder, arquivos[0])
+
+def configurar_logs(prefixo: str = "run", pasta: str = "logs") -> str:
+    """
+    Configura o logging para gravar em `pasta/<prefixo>_<timestamp>.log`
+    e no stdout. Retorna o caminho do arquivo de log.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    caminho = os.path.join(pasta, f"{prefixo}_{ts}.log")
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s: %(message)s",
+        handlers=[
+            logging.FileHandler(caminho, encoding="utf-8"),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    return caminho
+
+def sha256_arquivo(caminho: str, bloco: int = 1 << 20) -> str:
+    """
+    Hash SHA-256 (hex) do conteúdo do arquivo, lido em blocos de 1 MiB.
+    """
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for parte in iter(lambda: f.read(bloco), b""):
+            h.update(parte)
+    return h.hexdigest()